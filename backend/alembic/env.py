@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from core.config import settings
 from database import Base
-from models import User, Room, Membership, Bill, BillItem
+from models import User, Room, Membership, Bill, BillItem, BillItemShare, ParseJob, ImportJob, StoredImage, ImageReservation, ImageCleanupTask, RoomBalance, RoomCategoryTotal, RoomCategoryDaily, UserCategoryDaily, SyncTombstone
 
 # this is the Alembic Config object
 config = context.config
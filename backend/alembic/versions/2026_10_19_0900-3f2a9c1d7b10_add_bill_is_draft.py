@@ -0,0 +1,30 @@
+"""add bills.is_draft
+
+Revision ID: 3f2a9c1d7b10
+Revises: 
+Create Date: 2026-10-19 09:00:00
+
+Tables are created by ``Base.metadata.create_all`` on startup; migrations
+only carry changes to existing tables. Stamp fresh databases with
+``alembic stamp head``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'bills',
+        sa.Column('is_draft', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('bills', 'is_draft')
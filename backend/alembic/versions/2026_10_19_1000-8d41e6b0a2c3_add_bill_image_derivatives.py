@@ -0,0 +1,26 @@
+"""add bill image derivative urls
+
+Revision ID: 8d41e6b0a2c3
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41e6b0a2c3'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bills', sa.Column('display_url', sa.String(), nullable=True))
+    op.add_column('bills', sa.Column('thumbnail_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bills', 'thumbnail_url')
+    op.drop_column('bills', 'display_url')
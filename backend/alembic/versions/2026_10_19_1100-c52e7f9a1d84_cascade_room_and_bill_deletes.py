@@ -0,0 +1,42 @@
+"""cascade room and bill deletes in the database
+
+Revision ID: c52e7f9a1d84
+Revises: 8d41e6b0a2c3
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e7f9a1d84'
+down_revision = '8d41e6b0a2c3'
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table)
+CASCADED_FOREIGN_KEYS = [
+    ('bills', 'room_id', 'rooms'),
+    ('bill_items', 'bill_id', 'bills'),
+    ('memberships', 'room_id', 'rooms'),
+]
+
+
+def _recreate_foreign_keys(ondelete) -> None:
+    for table, column, referent in CASCADED_FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _recreate_foreign_keys('CASCADE')
+    for table, column, _ in CASCADED_FOREIGN_KEYS:
+        op.create_index(f'ix_{table}_{column}', table, [column])
+
+
+def downgrade() -> None:
+    for table, column, _ in CASCADED_FOREIGN_KEYS:
+        op.drop_index(f'ix_{table}_{column}', table_name=table)
+    _recreate_foreign_keys(None)
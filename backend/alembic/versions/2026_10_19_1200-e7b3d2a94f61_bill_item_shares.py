@@ -0,0 +1,61 @@
+"""move bill item shares from a JSON column to bill_item_shares
+
+Revision ID: e7b3d2a94f61
+Revises: c52e7f9a1d84
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3d2a94f61'
+down_revision = 'c52e7f9a1d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The application creates the table itself if it starts before this
+    # migration runs, and may already have written shares to it
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS bill_item_shares (
+            item_id INTEGER NOT NULL REFERENCES bill_items (id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            weight FLOAT NOT NULL DEFAULT 1,
+            PRIMARY KEY (item_id, user_id)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_bill_item_shares_user_id_item_id ON bill_item_shares (user_id, item_id)")
+
+    # Equal splits become weight 1 each; ids of deleted users are dropped.
+    # Shares are source data rather than a rollup, so existing rows are kept
+    op.execute("""
+        INSERT INTO bill_item_shares (item_id, user_id, weight)
+        SELECT DISTINCT bill_items.id, users.id, 1.0
+        FROM bill_items
+        CROSS JOIN LATERAL json_array_elements_text(bill_items.shared_by::json) AS shared(user_id)
+        JOIN users ON users.id = shared.user_id::int
+        ON CONFLICT (item_id, user_id) DO NOTHING
+    """)
+
+    op.drop_column('bill_items', 'shared_by')
+
+
+def downgrade() -> None:
+    op.add_column('bill_items', sa.Column('shared_by', sa.JSON(), nullable=False, server_default='[]'))
+    op.execute("""
+        UPDATE bill_items
+        SET shared_by = shares.user_ids
+        FROM (
+            SELECT item_id, json_agg(user_id ORDER BY user_id) AS user_ids
+            FROM bill_item_shares
+            GROUP BY item_id
+        ) AS shares
+        WHERE shares.item_id = bill_items.id
+    """)
+    op.alter_column('bill_items', 'shared_by', server_default=None)
+
+    op.drop_index('ix_bill_item_shares_user_id_item_id', table_name='bill_item_shares')
+    op.drop_table('bill_item_shares')
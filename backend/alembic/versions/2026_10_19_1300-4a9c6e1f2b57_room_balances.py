@@ -0,0 +1,54 @@
+"""running per-room balances
+
+Revision ID: 4a9c6e1f2b57
+Revises: e7b3d2a94f61
+Create Date: 2026-10-19 13:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9c6e1f2b57'
+down_revision = 'e7b3d2a94f61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The application creates the table itself if it starts before this
+    # migration runs, and may already have added to it; recompute in full
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS room_balances (
+            room_id INTEGER NOT NULL REFERENCES rooms (id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            paid FLOAT NOT NULL DEFAULT 0,
+            owed FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (room_id, user_id)
+        )
+    """)
+    op.execute("DELETE FROM room_balances")
+
+    # Backfill from finalized bills and their weighted shares
+    op.execute("""
+        INSERT INTO room_balances (room_id, user_id, paid, owed)
+        SELECT room_id, user_id, SUM(paid), SUM(owed)
+        FROM (
+            SELECT room_id, uploaded_by AS user_id, total_amount AS paid, 0.0 AS owed
+            FROM bills
+            WHERE NOT is_draft
+            UNION ALL
+            SELECT bills.room_id, shares.user_id, 0.0,
+                   bill_items.amount * shares.weight
+                   / SUM(shares.weight) OVER (PARTITION BY shares.item_id)
+            FROM bill_item_shares AS shares
+            JOIN bill_items ON bill_items.id = shares.item_id
+            JOIN bills ON bills.id = bill_items.bill_id
+            WHERE NOT bills.is_draft
+        ) AS contributions
+        GROUP BY room_id, user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('room_balances')
@@ -0,0 +1,160 @@
+"""item categories and spending rollups
+
+Revision ID: 9b8e2c6d4f13
+Revises: 4a9c6e1f2b57
+Create Date: 2026-10-19 14:00:00
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b8e2c6d4f13'
+down_revision = '4a9c6e1f2b57'
+branch_labels = None
+depends_on = None
+
+
+# The categorizer's description rules as of this revision, frozen so the
+# backfill doesn't change with later edits to services/categorizer_service.py
+DESCRIPTION_RULES = {
+    "Groceries": (
+        "milk", "bread", "egg", "eggs", "rice", "flour", "atta", "sugar", "salt", "butter",
+        "cheese", "paneer", "yogurt", "curd", "vegetables", "veg", "fruit", "fruits",
+        "apple", "apples", "banana", "bananas", "onion", "onions", "potato", "potatoes",
+        "tomato", "tomatoes", "oil", "cereal", "oats", "dal", "lentils", "cooking gas"
+    ),
+    "Dining": (
+        "pizza", "burger", "fries", "sandwich", "coffee", "latte", "cappuccino", "espresso",
+        "tea", "chai", "beer", "wine", "cocktail", "dessert", "starter", "starters",
+        "entree", "main course", "meal", "lunch", "dinner", "breakfast", "brunch",
+        "biryani", "noodles", "pasta", "sushi", "tip", "service charge", "cover charge"
+    ),
+    "Transport": (
+        "fuel", "petrol", "diesel", "gas", "taxi", "cab", "ride", "fare", "toll", "parking",
+        "bus", "train", "metro", "metro card", "auto"
+    ),
+    "Utilities": (
+        "electricity", "water bill", "internet", "wifi", "wi-fi", "broadband", "phone bill",
+        "mobile recharge", "recharge", "gas bill", "cylinder"
+    ),
+    "Rent": ("rent", "lease", "security deposit", "maintenance charge", "society maintenance"),
+    "Entertainment": (
+        "movie", "movies", "cinema", "ticket", "tickets", "concert", "netflix", "spotify",
+        "subscription", "game", "games", "popcorn"
+    ),
+    "Health": ("medicine", "medicines", "tablets", "syrup", "doctor", "consultation", "vitamins"),
+    "Travel": ("hotel", "flight", "airfare", "room night", "luggage", "visa", "train ticket", "bus ticket"),
+    "Household": (
+        "soap", "shampoo", "detergent", "toilet paper", "tissues", "cleaner", "broom",
+        "bulb", "batteries", "kitchen roll", "trash bags", "garbage bags", "dishwash"
+    ),
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['.&-][a-z0-9]+)*")
+
+
+def _tokens(text):
+    return tuple(_TOKEN.findall(text.lower()))
+
+
+def _categorize(description, index, longest):
+    """Category of the longest rule phrase in the description, leftmost first"""
+    tokens = _tokens(description)
+    for length in range(min(longest, len(tokens)), 0, -1):
+        for start in range(len(tokens) - length + 1):
+            category = index.get(tokens[start:start + length])
+            if category:
+                return category
+    return None
+
+
+def upgrade() -> None:
+    op.add_column('bills', sa.Column('merchant_name', sa.String(), nullable=True))
+    op.add_column('bill_items', sa.Column('category', sa.String(), nullable=False, server_default='Other'))
+
+    # The application creates the tables itself if it starts before this
+    # migration runs, and may already have added to them; recompute in full
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS room_category_totals (
+            room_id INTEGER NOT NULL REFERENCES rooms (id) ON DELETE CASCADE,
+            category VARCHAR NOT NULL,
+            amount FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (room_id, category)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS user_category_daily (
+            room_id INTEGER NOT NULL REFERENCES rooms (id) ON DELETE CASCADE,
+            day DATE NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            category VARCHAR NOT NULL,
+            amount FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (room_id, day, user_id, category)
+        )
+    """)
+    op.execute("DELETE FROM room_category_totals")
+    op.execute("DELETE FROM user_category_daily")
+
+    # Categorize existing items once per distinct description
+    index = {}
+    for category, phrases in DESCRIPTION_RULES.items():
+        for phrase in phrases:
+            index.setdefault(_tokens(phrase), category)
+    longest = max(len(phrase) for phrase in index)
+
+    bind = op.get_bind()
+    descriptions = [row[0] for row in bind.execute(sa.text("SELECT DISTINCT description FROM bill_items"))]
+    categorized = [
+        {"description": description, "category": _categorize(description, index, longest)}
+        for description in descriptions
+    ]
+    categorized = [row for row in categorized if row["category"]]
+    if categorized:
+        bind.execute(sa.text("""
+            CREATE TEMP TABLE item_categories (description text PRIMARY KEY, category text NOT NULL)
+            ON COMMIT DROP
+        """))
+        bind.execute(
+            sa.text("INSERT INTO item_categories (description, category) VALUES (:description, :category)"),
+            categorized
+        )
+        bind.execute(sa.text("""
+            UPDATE bill_items SET category = item_categories.category
+            FROM item_categories
+            WHERE item_categories.description = bill_items.description
+        """))
+
+    # Backfill rollups from finalized bills
+    op.execute("""
+        INSERT INTO room_category_totals (room_id, category, amount)
+        SELECT bills.room_id, bill_items.category, SUM(bill_items.amount)
+        FROM bill_items
+        JOIN bills ON bills.id = bill_items.bill_id
+        WHERE NOT bills.is_draft
+        GROUP BY bills.room_id, bill_items.category
+    """)
+    op.execute("""
+        INSERT INTO user_category_daily (room_id, day, user_id, category, amount)
+        SELECT room_id, day, user_id, category, SUM(amount)
+        FROM (
+            SELECT bills.room_id, bills.created_at::date AS day, shares.user_id, bill_items.category,
+                   bill_items.amount * shares.weight
+                   / SUM(shares.weight) OVER (PARTITION BY shares.item_id) AS amount
+            FROM bill_item_shares AS shares
+            JOIN bill_items ON bill_items.id = shares.item_id
+            JOIN bills ON bills.id = bill_items.bill_id
+            WHERE NOT bills.is_draft
+        ) AS shares
+        GROUP BY room_id, day, user_id, category
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_category_daily')
+    op.drop_table('room_category_totals')
+    op.drop_column('bill_items', 'category')
+    op.drop_column('bills', 'merchant_name')
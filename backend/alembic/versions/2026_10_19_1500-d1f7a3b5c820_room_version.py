@@ -0,0 +1,24 @@
+"""room version for cached reports
+
+Revision ID: d1f7a3b5c820
+Revises: 9b8e2c6d4f13
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f7a3b5c820'
+down_revision = '9b8e2c6d4f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('rooms', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('rooms', 'version')
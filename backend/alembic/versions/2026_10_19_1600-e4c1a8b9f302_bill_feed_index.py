@@ -0,0 +1,24 @@
+"""index for the cross-room bill feed
+
+Revision ID: e4c1a8b9f302
+Revises: d1f7a3b5c820
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c1a8b9f302'
+down_revision = 'd1f7a3b5c820'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_bills_room_id_created_at_id', 'bills', ['room_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bills_room_id_created_at_id', table_name='bills')
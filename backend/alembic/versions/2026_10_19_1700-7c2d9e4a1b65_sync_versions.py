@@ -0,0 +1,35 @@
+"""row versions for delta sync
+
+Revision ID: 7c2d9e4a1b65
+Revises: e4c1a8b9f302
+Create Date: 2026-10-19 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d9e4a1b65'
+down_revision = 'e4c1a8b9f302'
+branch_labels = None
+depends_on = None
+
+SYNC_VERSION = sa.text("pg_current_xact_id()::text::bigint")
+
+
+def upgrade() -> None:
+    # sync_tombstones is created by the application on startup
+    for table in ('rooms', 'memberships', 'bills', 'bill_items'):
+        op.add_column(table, sa.Column('sync_version', sa.BigInteger(), nullable=False, server_default=SYNC_VERSION))
+    op.create_index('ix_memberships_room_id_sync_version', 'memberships', ['room_id', 'sync_version'])
+    op.create_index('ix_bills_room_id_sync_version', 'bills', ['room_id', 'sync_version'])
+    op.create_index('ix_bill_items_sync_version', 'bill_items', ['sync_version'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bill_items_sync_version', table_name='bill_items')
+    op.drop_index('ix_bills_room_id_sync_version', table_name='bills')
+    op.drop_index('ix_memberships_room_id_sync_version', table_name='memberships')
+    for table in ('bill_items', 'bills', 'memberships', 'rooms'):
+        op.drop_column(table, 'sync_version')
@@ -0,0 +1,67 @@
+"""full-text and trigram search over items and merchants
+
+Revision ID: a6f0b3c7d2e9
+Revises: 7c2d9e4a1b65
+Create Date: 2026-10-19 18:00:00
+
+The application creates the search_vector columns and their indexes on a
+fresh database, but not pg_trgm or the trigram indexes, so every step here
+is idempotent and can also be run against such a database. Without pg_trgm
+(not installed, or the role may not create it) search matches words only.
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import DBAPIError
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6f0b3c7d2e9'
+down_revision = '7c2d9e4a1b65'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _create_trigram_extension(bind) -> bool:
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if not available:
+        logger.warning("pg_trgm is not installed; search will not match typos")
+        return False
+    try:
+        with bind.begin_nested():
+            bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError as exc:
+        logger.warning("Could not create pg_trgm (%s); search will not match typos", exc.orig)
+        return False
+    return True
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE bills ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(merchant_name, ''))) STORED"
+    )
+    op.execute(
+        "ALTER TABLE bill_items ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', description)) STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_bills_search_vector ON bills USING gin (search_vector)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_bill_items_search_vector ON bill_items USING gin (search_vector)")
+
+    if _create_trigram_extension(op.get_bind()):
+        op.execute("CREATE INDEX IF NOT EXISTS ix_bills_merchant_name_trgm ON bills USING gin (merchant_name gin_trgm_ops)")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_bill_items_description_trgm ON bill_items USING gin (description gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_bill_items_description_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_bills_merchant_name_trgm")
+    op.drop_index('ix_bill_items_search_vector', table_name='bill_items')
+    op.drop_index('ix_bills_search_vector', table_name='bills')
+    op.drop_column('bill_items', 'search_vector')
+    op.drop_column('bills', 'search_vector')
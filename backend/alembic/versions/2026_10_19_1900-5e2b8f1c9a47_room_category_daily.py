@@ -0,0 +1,44 @@
+"""per-room daily category totals
+
+Revision ID: 5e2b8f1c9a47
+Revises: a6f0b3c7d2e9
+Create Date: 2026-10-19 19:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8f1c9a47'
+down_revision = 'a6f0b3c7d2e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The application creates the table itself if it starts before this
+    # migration runs, and may already have added to it; recompute in full
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS room_category_daily (
+            room_id INTEGER NOT NULL REFERENCES rooms (id) ON DELETE CASCADE,
+            day DATE NOT NULL,
+            category VARCHAR NOT NULL,
+            amount FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (room_id, day, category)
+        )
+    """)
+    op.execute("DELETE FROM room_category_daily")
+
+    # Backfill from finalized bills
+    op.execute("""
+        INSERT INTO room_category_daily (room_id, day, category, amount)
+        SELECT bills.room_id, bills.created_at::date, bill_items.category, SUM(bill_items.amount)
+        FROM bill_items
+        JOIN bills ON bills.id = bill_items.bill_id
+        WHERE NOT bills.is_draft
+        GROUP BY bills.room_id, bills.created_at::date, bill_items.category
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('room_category_daily')
@@ -0,0 +1,24 @@
+"""original key of queued image derivatives
+
+Revision ID: b3d8f0a2c6e1
+Revises: 5e2b8f1c9a47
+Create Date: 2026-10-19 20:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d8f0a2c6e1'
+down_revision = '5e2b8f1c9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The application creates the queue table itself at startup
+    op.execute("ALTER TABLE IF EXISTS image_cleanup_queue ADD COLUMN IF NOT EXISTS original_key VARCHAR")
+
+
+def downgrade() -> None:
+    op.drop_column('image_cleanup_queue', 'original_key')
@@ -0,0 +1,59 @@
+"""reference counts of images uploaded before reference counting
+
+Revision ID: f2a7c4e9d058
+Revises: b3d8f0a2c6e1
+Create Date: 2026-10-19 21:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c4e9d058'
+down_revision = 'b3d8f0a2c6e1'
+branch_labels = None
+depends_on = None
+
+
+def _base_url() -> str:
+    """Public URL prefix of stored objects, as the configured storage backend builds it"""
+    if settings.STORAGE_BACKEND == "local":
+        base_url = settings.LOCAL_STORAGE_PUBLIC_URL
+    else:
+        base_url = (
+            settings.S3_PUBLIC_URL
+            or f"https://{settings.S3_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com"
+        )
+    return base_url.rstrip('/') + '/'
+
+
+def upgrade() -> None:
+    # The application creates the table itself at startup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS stored_images (
+            key VARCHAR PRIMARY KEY,
+            url VARCHAR NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_stored_images_url ON stored_images (url)")
+
+    # One reference per bill. Rows the application already keeps get the
+    # same count; images stored elsewhere are left untracked
+    op.get_bind().execute(sa.text("""
+        INSERT INTO stored_images (key, url, ref_count, created_at)
+        SELECT substr(image_url, length(:prefix) + 1), image_url, COUNT(*), timezone('utc', now())
+        FROM bills
+        WHERE left(image_url, length(:prefix)) = :prefix AND length(image_url) > length(:prefix)
+        GROUP BY image_url
+        ON CONFLICT (key) DO UPDATE SET ref_count = excluded.ref_count
+    """), {"prefix": _base_url()})
+
+
+def downgrade() -> None:
+    # The counts cannot be told apart from those kept since; leave them
+    pass
@@ -0,0 +1,122 @@
+"""
+Ledger export memory benchmark
+Seeds throwaway rooms of increasing size, exports each as CSV and NDJSON
+and reports rows per second and peak Python memory. The streaming export
+should stay flat; --orm adds the old approach (load every Bill/BillItem,
+serialize one list) for comparison.
+
+Run from backend/ against a scratch database:
+    python -m benchmarks.export_memory --items 1000 10000 100000 --orm
+"""
+import argparse
+import io
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, Iterable, List
+from sqlalchemy import delete
+from database import SessionLocal
+from models.bill import Bill
+from models.room import Membership, Room
+from models.user import User
+from schemas import BillResponse
+from services.export_service import export_service
+from services.ledger_import_service import ledger_import_service
+
+
+def _seed(items: int, members: int = 4) -> Dict[str, Any]:
+    """A room with ``members`` users and ``items`` items, four per bill"""
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        users = [
+            User(name=f"Bench {tag} {i}", email=f"bench-{tag}-{i}@example.com", google_id=f"bench-{tag}-{i}")
+            for i in range(members)
+        ]
+        db.add_all(users)
+        db.flush()
+        room = Room(name=f"Export bench {tag}", secret=Room.generate_secret(), created_by=users[0].id)
+        db.add(room)
+        db.flush()
+        db.add_all(Membership(user_id=user.id, room_id=room.id) for user in users)
+        db.commit()
+
+        emails = [user.email for user in users]
+        lines = ["bill_ref,date,paid_by,description,amount,shared_by,weights,merchant"]
+        for i in range(items):
+            sharers = [emails[i % members], emails[(i + 1) % members]]
+            lines.append(
+                f"b{i // 4},2024-{1 + (i // 4) % 12:02d}-{1 + (i // 4) % 28:02d},{emails[(i // 4) % members]},"
+                f"Item {i} \"quoted\",{(i % 50) + 0.25},{';'.join(sharers)},2;1,Store {i % 7}"
+            )
+        result = ledger_import_service.import_csv(db, room.id, io.BytesIO("\n".join(lines).encode()))
+        assert not result.error_count, result.errors
+        return {"room_id": room.id, "user_ids": [user.id for user in users]}
+    finally:
+        db.close()
+
+
+def _cleanup(seeded: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(Room).where(Room.id == seeded["room_id"]))
+        db.execute(delete(User).where(User.id.in_(seeded["user_ids"])))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _orm_export(room_id: int) -> Iterable[bytes]:
+    """What an export built on get_room_bills would do"""
+    db = SessionLocal()
+    try:
+        bills = db.query(Bill).filter(Bill.room_id == room_id).order_by(Bill.created_at).all()
+        payload = "[" + ",".join(BillResponse.model_validate(bill).model_dump_json() for bill in bills) + "]"
+        yield payload.encode()
+    finally:
+        db.close()
+
+
+def _measure(chunks: Callable[[], Iterable[bytes]]) -> Dict[str, Any]:
+    # Timed and traced in separate passes: tracemalloc slows Python down several times
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in chunks())
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in chunks():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "bytes": size, "peak_mb": peak / 1024 / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--orm", action="store_true", help="Also measure the load-everything approach")
+    args = parser.parse_args()
+
+    modes: List[tuple] = [
+        ("csv", lambda room_id: lambda: export_service.stream(room_id, "csv")),
+        ("ndjson", lambda room_id: lambda: export_service.stream(room_id, "ndjson")),
+    ]
+    if args.orm:
+        modes.append(("orm-json", lambda room_id: lambda: _orm_export(room_id)))
+
+    print(f"{'items':>9} {'mode':<9} {'seconds':>8} {'rows/s':>9} {'MB out':>8} {'peak MB':>8}")
+    for items in args.items:
+        seeded = _seed(items)
+        try:
+            for name, make in modes:
+                result = _measure(make(seeded["room_id"]))
+                print(
+                    f"{items:>9} {name:<9} {result['seconds']:>8.2f} {items / result['seconds']:>9.0f} "
+                    f"{result['bytes'] / 1024 / 1024:>8.1f} {result['peak_mb']:>8.1f}"
+                )
+        finally:
+            _cleanup(seeded)
+
+
+if __name__ == "__main__":
+    main()
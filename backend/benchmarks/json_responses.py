@@ -0,0 +1,150 @@
+"""
+List endpoint response benchmark
+For the room list, room details and room bills endpoints, compares the
+old response path (ORM objects, model_validate per row, then FastAPI's
+response_model validation and stdlib json encoding) with the listing
+service's Core projections rendered by orjson. Reports wall and CPU time
+per response for the query and the serialization, and checks that both
+paths produce the same JSON.
+
+Run from backend/ against a scratch database:
+    python -m benchmarks.json_responses --items 200 2000 20000 --rooms 50
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import delete
+from benchmarks.export_memory import _cleanup, _seed
+from database import SessionLocal
+from models.bill import Bill
+from models.room import Membership, Room
+from schemas import BillResponse, RoomResponse, RoomWithMembers, UserResponse
+from services.listing_service import listing_service
+
+ROOMS_ADAPTER = TypeAdapter(List[RoomResponse])
+ROOM_ADAPTER = TypeAdapter(RoomWithMembers)
+BILLS_ADAPTER = TypeAdapter(List[BillResponse])
+
+
+def _fastapi_render(adapter: TypeAdapter, content: Any) -> bytes:
+    """What FastAPI 0.109 does with a response_model: validate, dump to JSON types, json.dumps"""
+    validated = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(
+        adapter.dump_python(validated, mode="json"),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+
+
+def _old_rooms(db, user_id: int, room_id: int) -> List[RoomResponse]:
+    rooms = []
+    for membership in db.query(Membership).filter(Membership.user_id == user_id).all():
+        room = membership.room
+        response = RoomResponse.model_validate(room)
+        response.member_count = db.query(Membership).filter(Membership.room_id == room.id).count()
+        rooms.append(response)
+    return rooms
+
+
+def _old_room(db, user_id: int, room_id: int) -> RoomWithMembers:
+    # RoomWithMembers.model_validate(room) itself failed (a Room has no members attribute)
+    room = db.query(Room).filter(Room.id == room_id).first()
+    members = [UserResponse.model_validate(m.user) for m in db.query(Membership).filter(Membership.room_id == room_id).all()]
+    response = RoomWithMembers(**RoomResponse.model_validate(room).model_dump(), members=members)
+    response.member_count = len(members)
+    return response
+
+
+def _old_bills(db, user_id: int, room_id: int) -> List[BillResponse]:
+    bills = db.query(Bill).filter(Bill.room_id == room_id).order_by(Bill.created_at.desc()).all()
+    return [BillResponse.model_validate(bill) for bill in bills]
+
+
+ENDPOINTS = [
+    ("GET /rooms", _old_rooms, lambda db, user_id, room_id: listing_service.rooms_of(db, user_id), ROOMS_ADAPTER),
+    ("GET /rooms/{id}", _old_room, lambda db, user_id, room_id: listing_service.room_with_members(db, room_id), ROOM_ADAPTER),
+    ("GET /bills/room/{id}", _old_bills, lambda db, user_id, room_id: listing_service.room_bills(db, room_id), BILLS_ADAPTER),
+]
+
+
+def _time(repeat: int, query: Callable[[Any], Any], render: Callable[[Any], bytes]) -> Dict[str, float]:
+    totals = {"query_ms": 0.0, "query_cpu_ms": 0.0, "render_ms": 0.0, "render_cpu_ms": 0.0}
+    body = b""
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            wall, cpu = time.perf_counter(), time.process_time()
+            content = query(db)
+            totals["query_ms"] += time.perf_counter() - wall
+            totals["query_cpu_ms"] += time.process_time() - cpu
+
+            wall, cpu = time.perf_counter(), time.process_time()
+            body = render(content)
+            totals["render_ms"] += time.perf_counter() - wall
+            totals["render_cpu_ms"] += time.process_time() - cpu
+        finally:
+            db.close()
+    result = {key: value * 1000 / repeat for key, value in totals.items()}
+    result["body"] = body
+    return result
+
+
+def _normalized(body: bytes) -> Any:
+    """Parsed JSON with bill items in id order; the old path left their order to the database"""
+    content = json.loads(body)
+    for bill in content if isinstance(content, list) else []:
+        bill.get("items", []).sort(key=lambda item: item["id"])
+    return content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[200, 2000, 20000])
+    parser.add_argument("--rooms", type=int, default=50, help="Extra rooms the user is in, for GET /rooms")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'items':>6} {'endpoint':<20} {'path':<5} {'query ms':>9} {'cpu':>7} "
+        f"{'render ms':>10} {'cpu':>7} {'KB':>7}"
+    )
+    for items in args.items:
+        seeded = _seed(items)
+        user_id = seeded["user_ids"][0]
+        db = SessionLocal()
+        try:
+            extra = [Room(name=f"Bench extra {i}", secret=Room.generate_secret(), created_by=user_id) for i in range(args.rooms)]
+            db.add_all(extra)
+            db.flush()
+            db.add_all(Membership(user_id=user_id, room_id=room.id) for room in extra)
+            db.commit()
+
+            for name, old_query, new_query, adapter in ENDPOINTS:
+                old = _time(
+                    args.repeat,
+                    lambda db: old_query(db, user_id, seeded["room_id"]),
+                    lambda content: _fastapi_render(adapter, content)
+                )
+                new = _time(
+                    args.repeat,
+                    lambda db: new_query(db, user_id, seeded["room_id"]),
+                    lambda content: ORJSONResponse(content).body
+                )
+                assert _normalized(old["body"]) == _normalized(new["body"]), f"{name}: responses differ"
+                for path, result in (("old", old), ("new", new)):
+                    print(
+                        f"{items:>6} {name:<20} {path:<5} {result['query_ms']:>9.2f} {result['query_cpu_ms']:>7.2f} "
+                        f"{result['render_ms']:>10.2f} {result['render_cpu_ms']:>7.2f} {len(result['body']) / 1024:>7.0f}"
+                    )
+        finally:
+            db.rollback()
+            db.execute(delete(Room).where(Room.created_by == user_id))
+            db.commit()
+            db.close()
+            _cleanup(seeded)
+
+
+if __name__ == "__main__":
+    main()
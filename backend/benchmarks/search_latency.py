@@ -0,0 +1,144 @@
+"""
+Bill search latency benchmark
+Seeds throwaway rooms with generated receipts (one user in all of them,
+plus a room they are not in), then runs a mix of word, phrase and typo
+queries through search_service and reports latency percentiles.
+
+Run from backend/ against a scratch database:
+    python -m benchmarks.search_latency --items 1000000 --rooms 10 --repeat 20
+"""
+import argparse
+import io
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+from sqlalchemy import delete, text
+from database import SessionLocal
+from models.room import Membership, Room
+from models.user import User
+from services.ledger_import_service import ledger_import_service
+from services.search_service import search_service
+
+DISHES = [
+    "Margherita Pizza", "Pepperoni Pizza", "Garlic Bread", "Caesar Salad", "Chicken Burger",
+    "Veggie Burger", "French Fries", "Onion Rings", "Chocolate Milkshake", "Iced Latte",
+    "Cappuccino", "Green Tea", "Paneer Tikka", "Butter Chicken", "Garlic Naan", "Mango Lassi",
+    "Pad Thai", "Spring Rolls", "Sushi Platter", "Miso Soup", "Fish Tacos", "Nachos",
+    "Chicken Biryani", "Masala Dosa", "Cheesecake", "Tiramisu", "Craft Beer", "House Wine",
+    "Sparkling Water", "Paper Towels", "Dish Soap", "Olive Oil", "Basmati Rice", "Whole Milk",
+    "Cheddar Cheese", "Free Range Eggs", "Sourdough Loaf", "Bananas", "Avocados", "Toothpaste"
+]
+MERCHANTS = [
+    "Pizza Palace", "Burger Barn", "Spice Route", "Tokyo Table", "Taco Town", "Corner Cafe",
+    "Fresh Mart", "City Grocers", "The Brew House", "Dosa Point", "Sweet Tooth Bakery"
+]
+QUERIES = [
+    "pizza", "pizzas", "garlic", "chicken burger", "\"butter chicken\"", "latte", "sushi",
+    "pizza palace", "spice route", "cheese -cake",
+    # Typos, matched by trigram similarity
+    "piza", "cappucino", "biriyani", "tiramsu", "margarita", "avacado"
+]
+
+
+def _seed(items: int, rooms: int, members: int = 4) -> Dict[str, Any]:
+    """``rooms`` rooms of ``items`` items in total; the first user is in all of them"""
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        users = [
+            User(name=f"Bench {tag} {i}", email=f"bench-{tag}-{i}@example.com", google_id=f"bench-{tag}-{i}")
+            for i in range(members + 1)
+        ]
+        db.add_all(users)
+        db.flush()
+        outsider = users.pop()
+        room_ids = []
+        for r in range(rooms + 1):
+            room_users = users if r < rooms else [outsider]
+            room = Room(name=f"Search bench {tag} {r}", secret=Room.generate_secret(), created_by=room_users[0].id)
+            db.add(room)
+            db.flush()
+            db.add_all(Membership(user_id=user.id, room_id=room.id) for user in room_users)
+            room_ids.append(room.id)
+        db.commit()
+
+        generator = random.Random(tag)
+        emails = [user.email for user in users]
+        for r, room_id in enumerate(room_ids):
+            room_emails = emails if r < rooms else [outsider.email]
+            count = items // rooms if r < rooms else items // (rooms * 10) or 1
+            lines = ["bill_ref,date,paid_by,description,amount,shared_by,merchant"]
+            for i in range(count):
+                bill = i // 5
+                lines.append(
+                    f"b{bill},2024-{1 + bill % 12:02d}-{1 + bill % 28:02d},{room_emails[bill % len(room_emails)]},"
+                    f"{generator.choice(DISHES)},{generator.randint(100, 5000) / 100},{';'.join(room_emails)},"
+                    f"{MERCHANTS[bill % len(MERCHANTS)]}"
+                )
+            result = ledger_import_service.import_csv(db, room_id, io.BytesIO("\n".join(lines).encode()))
+            assert not result.error_count, result.errors
+        db.execute(text("ANALYZE bills"))
+        db.execute(text("ANALYZE bill_items"))
+        db.commit()
+        return {"room_ids": room_ids, "user_ids": [user.id for user in users] + [outsider.id]}
+    finally:
+        db.close()
+
+
+def _cleanup(seeded: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(Room).where(Room.id.in_(seeded["room_ids"])))
+        db.execute(delete(User).where(User.id.in_(seeded["user_ids"])))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20, help="Runs of each query")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seeded = _seed(args.items, args.rooms)
+    print(f"Seeded {args.items} items in {args.rooms} rooms in {time.perf_counter() - started:.1f}s")
+    user_id = seeded["user_ids"][0]
+
+    db = SessionLocal()
+    try:
+        print(f"{'query':<20} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        everything = []
+        for query in QUERIES:
+            search_service.search(db, user_id, query, args.limit)  # Warm up
+            samples = []
+            for _ in range(args.repeat):
+                begun = time.perf_counter()
+                page = search_service.search(db, user_id, query, args.limit)
+                samples.append(time.perf_counter() - begun)
+                db.rollback()
+            everything.extend(samples)
+            print(
+                f"{query:<20} {len(page.results):>5} {_percentile(samples, 0.5):>8.1f} "
+                f"{_percentile(samples, 0.95):>8.1f} {max(samples) * 1000:>8.1f}"
+            )
+        print(
+            f"{'all':<20} {'':>5} {_percentile(everything, 0.5):>8.1f} "
+            f"{_percentile(everything, 0.95):>8.1f} {max(everything) * 1000:>8.1f}"
+        )
+    finally:
+        db.close()
+        _cleanup(seeded)
+
+
+if __name__ == "__main__":
+    main()
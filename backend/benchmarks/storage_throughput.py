@@ -0,0 +1,91 @@
+"""
+Storage backend throughput benchmark
+Writes, stats and reads the same set of objects through each backend and
+reports operations and megabytes per second.
+
+Run from backend/:
+    python -m benchmarks.storage_throughput --backends local s3 --objects 200 --size 524288
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+from services.storage_backends import LocalStorageBackend, S3StorageBackend, StorageBackend
+
+
+async def _timed(name: str, keys: List[str], concurrency: int, size: int, op: Callable) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key: str):
+        async with semaphore:
+            await op(key)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(key) for key in keys))
+    seconds = time.perf_counter() - started
+    return {
+        "op": name,
+        "seconds": round(seconds, 3),
+        "ops_per_second": round(len(keys) / seconds, 1),
+        "mb_per_second": round(len(keys) * size / seconds / 1024 / 1024, 1) if size else None
+    }
+
+
+async def bench(backend: StorageBackend, objects: int, size: int, concurrency: int) -> List[Dict[str, Any]]:
+    prefix = f"benchmarks/{uuid.uuid4().hex}"
+    keys = [f"{prefix}/{i}.jpg" for i in range(objects)]
+    content = os.urandom(size)
+
+    async def get(key: str):
+        data = await backend.get(key)
+        assert len(data) == size
+
+    try:
+        return [
+            await _timed("put", keys, concurrency, size, lambda key: backend.put(key, content, "image/jpeg")),
+            await _timed("head", keys, concurrency, 0, backend.head),
+            await _timed("get", keys, concurrency, size, get)
+        ]
+    finally:
+        await backend.delete_many(keys)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=["local", "s3"], default=["local", "s3"])
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--size", type=int, default=512 * 1024, help="Object size in bytes")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{args.objects} objects x {args.size} bytes, concurrency {args.concurrency}")
+    print(f"{'backend':<8} {'op':<5} {'seconds':>9} {'ops/s':>9} {'MB/s':>8}")
+
+    for name in args.backends:
+        root = None
+        if name == "local":
+            root = tempfile.mkdtemp(prefix="storage-bench-")
+            backend = LocalStorageBackend(root, "http://localhost/files")
+        else:
+            backend = S3StorageBackend()
+
+        try:
+            results = await bench(backend, args.objects, args.size, args.concurrency)
+        finally:
+            if root:
+                shutil.rmtree(root, ignore_errors=True)
+
+        for result in results:
+            mb = result["mb_per_second"]
+            print(
+                f"{name:<8} {result['op']:<5} {result['seconds']:>9} "
+                f"{result['ops_per_second']:>9} {mb if mb is not None else '-':>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
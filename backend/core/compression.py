@@ -0,0 +1,228 @@
+"""
+Response compression
+Negotiates brotli or gzip from Accept-Encoding and compresses JSON, text,
+CSV and NDJSON responses of at least COMPRESSION_MINIMUM_SIZE bytes.
+Chunks of COMPRESSION_THREAD_MIN_SIZE bytes or more are compressed in a
+worker thread so a large body doesn't stall the event loop; streamed
+responses are compressed as they stream. Event streams, byte ranges and
+already-encoded bodies pass through untouched, and a route can opt out or
+change the threshold with @compression(...).
+"""
+import asyncio
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.config import settings
+
+# Preferred first when the client accepts both equally
+ENCODINGS = ("br", "gzip")
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml"
+)
+
+# Set on endpoint functions by @compression
+_ROUTE_OPTIONS = "__compression__"
+
+
+def compression(enabled: bool = True, minimum_size: Optional[int] = None) -> Callable:
+    """
+    Per-route compression settings; place below the @router decorator
+
+    Args:
+        enabled: False to never compress this route's responses
+        minimum_size: Smallest body compressed, instead of COMPRESSION_MINIMUM_SIZE
+    """
+    def decorate(endpoint: Callable) -> Callable:
+        setattr(endpoint, _ROUTE_OPTIONS, {"enabled": enabled, "minimum_size": minimum_size})
+        return endpoint
+    return decorate
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header, or None for identity"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = part.strip().split(";")
+        weight = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class _Encoder:
+    """One response's compressor; not thread-safe, used by one chunk at a time"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._process, self._finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip framing
+            self._process, self._finish = compressor.compress, compressor.flush
+
+    def compress(self, data: bytes, last: bool) -> Tuple[bytes, float]:
+        """Compressed output so far and the CPU seconds it took"""
+        started = time.thread_time()
+        output = self._process(data)
+        if last:
+            output += self._finish()
+        return output, time.thread_time() - started
+
+
+class CompressionStats:
+    """Bytes in and out and compression CPU time of this process, per encoding"""
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0, "offloaded_chunks": 0}
+        )
+        self.below_minimum = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        encodings = []
+        for encoding, stats in sorted(self.encodings.items()):
+            megabytes = stats["bytes_in"] / 1024 / 1024
+            encodings.append({
+                "encoding": encoding,
+                **stats,
+                "bytes_saved": stats["bytes_in"] - stats["bytes_out"],
+                "ratio": stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 1.0,
+                "cpu_ms_per_mb": stats["cpu_seconds"] * 1000 / megabytes if megabytes else 0.0
+            })
+        return {"encodings": encodings, "below_minimum": self.below_minimum}
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(scope, send, encoding))
+
+
+class _CompressingSend:
+    """Wraps ``send`` for one response, deciding at its start whether to compress"""
+
+    def __init__(self, scope: Scope, send: Send, encoding: str):
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if self._compressible(message):
+                self.start = message
+            else:
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            # e.g. zerocopysend: nothing to compress in flight
+            self.passthrough = True
+            if self.encoder is None:
+                await self.send(self.start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        stats = compression_stats.encodings[self.encoding]
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self._minimum_size():
+                compression_stats.below_minimum += 1
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            self.encoder = _Encoder(self.encoding)
+            stats["responses"] += 1
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                output = await self._compress(body, True, stats)
+                headers["Content-Length"] = str(len(output))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": output})
+                return
+            await self.send(self.start)
+
+        output = await self._compress(body, not more_body, stats)
+        await self.send({"type": "http.response.body", "body": output, "more_body": more_body})
+
+    def _compressible(self, start: Message) -> bool:
+        options = getattr(self.scope.get("endpoint"), _ROUTE_OPTIONS, {})
+        if not options.get("enabled", True):
+            return False
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "text/event-stream":
+            return False  # Must reach the client event by event
+        return (
+            content_type.startswith("text/")
+            or content_type in COMPRESSIBLE_TYPES
+            or content_type.endswith("+json")
+        )
+
+    def _minimum_size(self) -> int:
+        options = getattr(self.scope.get("endpoint"), _ROUTE_OPTIONS, {})
+        minimum_size = options.get("minimum_size")
+        return settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+
+    async def _compress(self, data: bytes, last: bool, stats: Dict[str, Any]) -> bytes:
+        if len(data) >= settings.COMPRESSION_THREAD_MIN_SIZE:
+            output, cpu_seconds = await asyncio.to_thread(self.encoder.compress, data, last)
+            stats["offloaded_chunks"] += 1
+        else:
+            output, cpu_seconds = self.encoder.compress(data, last)
+        stats["bytes_in"] += len(data)
+        stats["bytes_out"] += len(output)
+        stats["cpu_seconds"] += cpu_seconds
+        return output
@@ -16,18 +16,117 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str
     
+    # Image storage: "s3" or "local"
+    STORAGE_BACKEND: str = "s3"
+    LOCAL_STORAGE_PATH: str = "storage"
+    LOCAL_STORAGE_PUBLIC_URL: str = "http://localhost:8000/files"
+    
     # AWS S3
-    AWS_ACCESS_KEY_ID: str
-    AWS_SECRET_ACCESS_KEY: str
+    AWS_ACCESS_KEY_ID: Optional[str] = None  # Falls back to the default AWS credential chain
+    AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_REGION: str = "us-east-1"
-    S3_BUCKET_NAME: str
+    S3_BUCKET_NAME: str = "splitperfect-bills"
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. a local MinIO server
+    S3_PUBLIC_URL: Optional[str] = None  # Base URL for objects when not on AWS
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024
+    S3_PRESIGNED_EXPIRES_SECONDS: int = 300
+    MAX_IMAGE_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    
+    # Image derivatives
+    IMAGE_WORKERS: int = 2
+    IMAGE_DISPLAY_MAX_SIZE: int = 1600
+    IMAGE_THUMBNAIL_MAX_SIZE: int = 480
+    IMAGE_WEBP_QUALITY: int = 80
+    
+    # Deleted image cleanup
+    IMAGE_CLEANUP_BATCH_SIZE: int = 1000
+    IMAGE_CLEANUP_MAX_ATTEMPTS: int = 5
+    IMAGE_CLEANUP_RETRY_BACKOFF_SECONDS: int = 60
+    IMAGE_UPLOAD_RESERVATION_SECONDS: int = 24 * 3600  # Uploads no bill takes up within this are deleted
     
     # OpenAI
     OPENAI_API_KEY: str
+    LLM_MODEL: str = "gpt-4o-mini"
+    LLM_BASE_URL: Optional[str] = None
+    
+    # Hedged LLM requests (second OpenAI-compatible provider, e.g. a local model server)
+    LLM_HEDGE_BASE_URL: Optional[str] = None
+    LLM_HEDGE_API_KEY: Optional[str] = None
+    LLM_HEDGE_MODEL: Optional[str] = None
+    LLM_HEDGE_SUPPORTS_JSON_MODE: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 5.0
+    LLM_LATENCY_WINDOW: int = 200
+    
+    # Complexity-based model routing
+    LLM_FAST_MODEL: Optional[str] = None  # Defaults to LLM_MODEL
+    LLM_STRONG_MODEL: str = "gpt-4o"
+    LLM_ROUTER_MAX_SIMPLE_LINES: int = 25
+    LLM_ROUTER_MAX_SIMPLE_PRICE_LINES: int = 10
+    LLM_ROUTER_MAX_NON_LATIN_RATIO: float = 0.2
+    LLM_RECONCILE_TOLERANCE: float = 0.01
     
     # Google Cloud Vision (Optional)
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
     
+    # Background parse jobs
+    PARSE_JOB_MAX_ATTEMPTS: int = 3
+    PARSE_JOB_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    PARSE_JOB_RETRY_BACKOFF_SECONDS: int = 30
+    PARSE_WORKER_POLL_INTERVAL_SECONDS: float = 2.0
+    
+    # Bulk ZIP import
+    BULK_IMPORT_MAX_FILES: int = 100
+    BULK_IMPORT_MAX_IMAGE_BYTES: int = 20 * 1024 * 1024
+    BULK_IMPORT_UPLOAD_CONCURRENCY: int = 4
+    BULK_IMPORT_OCR_CONCURRENCY: int = 2
+    BULK_IMPORT_LLM_CONCURRENCY: int = 4
+    BULK_IMPORT_MAX_ARCHIVE_BYTES: int = 512 * 1024 * 1024
+    BULK_IMPORT_VISIBILITY_TIMEOUT_SECONDS: int = 1800  # An import job is retried if its worker is silent this long
+    
+    # CSV ledger import
+    LEDGER_IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    LEDGER_IMPORT_MAX_ERRORS: int = 100  # Errors listed in the response; all are counted
+    
+    # Item categorization
+    CATEGORIZER_CACHE_SIZE: int = 10000  # Distinct (description, merchant) lookups cached
+    
+    # PDF reports
+    REPORT_CACHE_PATH: str = "cache/reports"  # Rendered reports, one per room version
+    REPORT_RENDER_WORKERS: int = 2
+    REPORT_STREAM_BUFFER_CHUNKS: int = 64  # Rendered chunks held for a slow client
+    
+    # Ledger export
+    EXPORT_BATCH_SIZE: int = 2000  # Rows fetched from the cursor and encoded per chunk
+    
+    # Cross-room bill feed
+    BILL_FEED_PAGE_SIZE: int = 20
+    BILL_FEED_MAX_PAGE_SIZE: int = 100
+    
+    # Bill search
+    SEARCH_PAGE_SIZE: int = 20
+    SEARCH_MAX_PAGE_SIZE: int = 100
+    SEARCH_MAX_QUERY_LENGTH: int = 200
+    
+    # Room event streams
+    EVENT_BACKEND: str = "memory"  # "memory" (single worker) or "postgres" (LISTEN/NOTIFY across workers)
+    EVENT_CHANNEL: str = "room_events"
+    EVENT_SUBSCRIBER_QUEUE_SIZE: int = 100  # Undelivered events before a slow client is told to resync
+    EVENT_KEEPALIVE_SECONDS: int = 15
+    
+    # Response compression (brotli or gzip, as the client accepts)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Smaller bodies are sent as-is
+    COMPRESSION_THREAD_MIN_SIZE: int = 256 * 1024  # Larger chunks are compressed off the event loop
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11; higher is smaller and much slower
+    COMPRESSION_GZIP_LEVEL: int = 6
+    
+    # Request instrumentation (GET /metrics)
+    SERVER_TIMING_ENABLED: bool = False  # Adds a Server-Timing header with db, ocr, llm and storage time
+    SQL_STATEMENT_WARNING_THRESHOLD: int = 100  # Log requests running this many statements or more
+    METRICS_TOKEN: str = ""  # Bearer token Prometheus scrapes /metrics with; empty disables the endpoint
+    
     # URLs
     BACKEND_URL: str = "http://localhost:8000"
     FRONTEND_URL: str = "http://localhost:3000"
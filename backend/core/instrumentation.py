@@ -0,0 +1,299 @@
+"""
+Request instrumentation
+Prometheus metrics for where request time goes: per-route latency, the
+number and time of SQL statements each request runs (an N+1 regression
+shows up as a jump in statements per request), spans around calls to OCR,
+the LLM and storage, and LLM hedging and model routing counters. Served
+by GET /metrics; with SERVER_TIMING_ENABLED each response also carries a
+Server-Timing header with the same breakdown for that request.
+"""
+import functools
+import inspect
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from prometheus_client import REGISTRY, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.compression import compression_stats
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to complete a request", ["method", "route", "status"]
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements run by a request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250, 1000)
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time a request spent in SQL statements", ["route"]
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds", "Time of one SQL statement",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+)
+SPAN_SECONDS = Histogram(
+    "external_call_duration_seconds", "Time of a call to OCR, the LLM or storage",
+    ["service", "operation", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+# Requests that matched no route share one label
+UNMATCHED_ROUTE = "unmatched"
+
+
+class _RequestTiming:
+    """What one request spent, filled in by the SQL listeners and spans"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.spans: Dict[str, float] = defaultdict(float)
+        self._depth: Dict[str, int] = defaultdict(int)
+
+    def enter(self, service: str) -> None:
+        self._depth[service] += 1
+
+    def exit(self, service: str, seconds: float) -> None:
+        # A span inside a span of the same service is already counted
+        self._depth[service] -= 1
+        if not self._depth[service]:
+            self.spans[service] += seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        metrics = [
+            f"app;dur={total_seconds * 1000:.1f}",
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statements} statements"'
+        ]
+        metrics.extend(f"{service};dur={seconds * 1000:.1f}" for service, seconds in sorted(self.spans.items()))
+        return ", ".join(metrics)
+
+
+_current_request: ContextVar[Optional[_RequestTiming]] = ContextVar("current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_instrumentation_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    DB_STATEMENT_SECONDS.observe(seconds)
+    timing = _current_request.get()
+    if timing is not None:
+        timing.statements += 1
+        timing.db_seconds += seconds
+
+
+class _Span:
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        self.timing: Optional[_RequestTiming] = None
+        self.started = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.timing = _current_request.get()
+        if self.timing is not None:
+            self.timing.enter(self.service)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        seconds = time.perf_counter() - self.started
+        # A consumer closing a stream early is not a failed call
+        outcome = "ok" if exc_type is None or exc_type is GeneratorExit else "error"
+        SPAN_SECONDS.labels(self.service, self.operation, outcome).observe(seconds)
+        if self.timing is not None:
+            self.timing.exit(self.service, seconds)
+
+
+def span(service: str, operation: str) -> _Span:
+    """
+    Time a ``with`` block as a call to ``service``
+
+    Recorded in external_call_duration_seconds and, during a request, in
+    its Server-Timing breakdown.
+    """
+    return _Span(service, operation)
+
+
+def traced(service: str) -> Callable:
+    """Run every call of a function, coroutine or async generator in a span"""
+    def decorate(function: Callable) -> Callable:
+        operation = function.__name__
+
+        if inspect.isasyncgenfunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(service, operation):
+                    async for value in function(*args, **kwargs):
+                        yield value
+        elif inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(service, operation):
+                    return await function(*args, **kwargs)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(service, operation):
+                    return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class _CompressionCollector:
+    """Exports the counters kept by core.compression"""
+
+    def collect(self):
+        metrics = compression_stats.metrics()
+        families = {
+            "responses": CounterMetricFamily(
+                "compression_responses", "Responses compressed", labels=["encoding"]
+            ),
+            "bytes_in": CounterMetricFamily(
+                "compression_bytes_in", "Response bytes before compression", labels=["encoding"]
+            ),
+            "bytes_out": CounterMetricFamily(
+                "compression_bytes_out", "Response bytes after compression", labels=["encoding"]
+            ),
+            "cpu_seconds": CounterMetricFamily(
+                "compression_cpu_seconds", "CPU time spent compressing responses", labels=["encoding"]
+            ),
+        }
+        for stats in metrics["encodings"]:
+            for key, family in families.items():
+                family.add_metric([stats["encoding"]], stats[key])
+        yield from families.values()
+        yield CounterMetricFamily(
+            "compression_below_minimum", "Responses sent uncompressed for being under the size threshold",
+            value=metrics["below_minimum"]
+        )
+
+
+class _LLMCollector:
+    """Exports the hedging counters and provider latency of the LLM client and its model routes"""
+
+    def describe(self):
+        # Without this, registering calls collect(), importing the LLM service
+        # while it may itself be importing this module
+        return [
+            CounterMetricFamily("llm_requests", ""), CounterMetricFamily("llm_hedges", ""),
+            GaugeMetricFamily("llm_hedge_delay_seconds", ""), CounterMetricFamily("llm_provider_wins", ""),
+            CounterMetricFamily("llm_provider_cancelled", ""), GaugeMetricFamily("llm_provider_latency_seconds", ""),
+            CounterMetricFamily("llm_route_requests", ""), CounterMetricFamily("llm_route_escalations", ""),
+            GaugeMetricFamily("llm_route_latency_seconds", "")
+        ]
+
+    def collect(self):
+        # Imported here: the LLM service records its calls with this module's spans
+        from services.llm_service import llm_service
+
+        stats = llm_service.client.stats()
+        yield CounterMetricFamily("llm_requests", "Hedged LLM completions", value=stats["requests"])
+        yield CounterMetricFamily("llm_hedges", "LLM completions that sent a hedged request", value=stats["hedges"])
+        hedge_delay = GaugeMetricFamily(
+            "llm_hedge_delay_seconds", "Wait on the primary LLM provider before hedging, per model",
+            labels=["model"]
+        )
+        for model, seconds in stats["hedge_delay_seconds"].items():
+            hedge_delay.add_metric([model], seconds)
+        yield hedge_delay
+
+        wins = CounterMetricFamily(
+            "llm_provider_wins", "LLM completions answered by each provider", labels=["provider", "model"]
+        )
+        cancelled = CounterMetricFamily(
+            "llm_provider_cancelled", "LLM requests cancelled after another provider answered", labels=["provider"]
+        )
+        latency = GaugeMetricFamily(
+            "llm_provider_latency_seconds",
+            "Recent LLM latency per provider and model, counting cancelled requests at the time they ran",
+            labels=["provider", "model", "quantile"]
+        )
+        for name, provider in stats["providers"].items():
+            wins.add_metric([name, provider["model"]], provider["wins"])
+            cancelled.add_metric([name], provider["cancelled"])
+            for model, snapshot in provider["latency"].items():
+                for quantile in ("p50", "p95", "p99"):
+                    if snapshot[quantile] is not None:
+                        latency.add_metric([name, model, quantile], snapshot[quantile])
+        yield from (wins, cancelled, latency)
+
+        requests = CounterMetricFamily(
+            "llm_route_requests", "Bill parses per model route", labels=["route", "model"]
+        )
+        escalations = CounterMetricFamily(
+            "llm_route_escalations", "Fast-route parses re-run on the strong model for not adding up", labels=["route"]
+        )
+        route_latency = GaugeMetricFamily(
+            "llm_route_latency_seconds", "Recent bill parse latency per model route", labels=["route", "quantile"]
+        )
+        for route, stats in llm_service.router.snapshot().items():
+            requests.add_metric([route, stats["model"]], stats["requests"])
+            escalations.add_metric([route], stats["escalations"])
+            for quantile in ("p50", "p95", "p99"):
+                if stats["latency"][quantile] is not None:
+                    route_latency.add_metric([route, quantile], stats["latency"][quantile])
+        yield from (requests, escalations, route_latency)
+
+
+REGISTRY.register(_CompressionCollector())
+REGISTRY.register(_LLMCollector())
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = _RequestTiming()
+        token = _current_request.set(timing)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers.append("Server-Timing", timing.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            self._observe(scope, status, time.perf_counter() - started, timing)
+
+    @staticmethod
+    def _observe(scope: Scope, status: int, seconds: float, timing: _RequestTiming) -> None:
+        # The route template, not the path, so ids don't multiply the series
+        route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+        REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(seconds)
+        REQUEST_DB_STATEMENTS.labels(route).observe(timing.statements)
+        REQUEST_DB_SECONDS.labels(route).observe(timing.db_seconds)
+        if timing.statements >= settings.SQL_STATEMENT_WARNING_THRESHOLD:
+            logger.warning(
+                "%s %s ran %d SQL statements (%.0f ms)",
+                scope["method"], route, timing.statements, timing.db_seconds * 1000
+            )
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import stat as stat_module
+from typing import Any, Dict, Mapping, Optional, Tuple
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+def open_file(path: str) -> Tuple[int, os.stat_result]:
+    """
+    Open a regular file for reading and stat the open descriptor
+
+    The size and mtime then describe exactly the bytes the descriptor
+    reads, even if the path is replaced or unlinked afterwards. Raises
+    FileNotFoundError if ``path`` is missing or not a regular file.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        stat = os.fstat(fd)
+    except BaseException:
+        os.close(fd)
+        raise
+    if not stat_module.S_ISREG(stat.st_mode):
+        os.close(fd)
+        raise FileNotFoundError(path)
+    return fd, stat
+
+
+class FileRangeResponse(Response):
+    """
+    Sends ``length`` bytes of an open file starting at ``offset``
+
+    Takes ownership of ``fd`` (from open_file) and closes it once sent,
+    so the bytes sent belong to the file the caller checked. When the
+    ASGI server offers the ``http.response.zerocopysend`` extension the
+    kernel copies the file to the socket with sendfile; otherwise the
+    range is read in chunks with pread in a worker thread. The caller
+    supplies the status and headers (Content-Length, Content-Range,
+    ETag, ...).
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        fd: int,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None
+    ):
+        self.fd = fd
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        # No body attribute: Content-Length comes from the caller's headers
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers
+            })
+
+            if scope.get("method") == "HEAD" or self.length == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": self.fd,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False
+                })
+                return
+
+            position = self.offset
+            end = self.offset + self.length
+            while position < end:
+                chunk = await asyncio.to_thread(
+                    os.pread, self.fd, min(self.chunk_size, end - position), position
+                )
+                if not chunk:
+                    break
+                position += len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": position < end
+                })
+            if position < end:
+                # File truncated in place underneath us; end the response rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(self.fd)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Headers for text/event-stream responses; nginx must not buffer them
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
@@ -1,3 +1,4 @@
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,6 +9,7 @@ from sqlalchemy.orm import Session
 from core.config import settings
 from database import get_db
 from models.user import User
+from models.room import Membership
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -62,3 +64,31 @@ async def get_current_user(
         )
     
     return user
+
+
+async def verify_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> None:
+    """Require METRICS_TOKEN as the bearer token; the endpoint doesn't exist without one"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def require_membership(db: Session, room_id: int, user: User) -> None:
+    """Raise 403 unless ``user`` belongs to the room"""
+    membership = db.query(Membership).filter(
+        Membership.user_id == user.id,
+        Membership.room_id == room_id
+    ).first()
+    
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this room"
+        )
@@ -0,0 +1,73 @@
+"""
+Bulk-import a CSV ledger exported from another expense app into a room
+Run with: python import_ledger.py --room 12 history.csv [--dry-run]
+
+Column names default to bill_ref, date, paid_by, description, quantity,
+unit_price, amount, shared_by, weights, merchant and category; remap
+them with e.g. --column paid_by="Paid By" --column amount=Cost
+"""
+import argparse
+import sys
+
+from database import SessionLocal
+from models.room import Room
+from services.ledger_import_service import ledger_import_service, DEFAULT_COLUMNS
+
+
+def parse_columns(pairs):
+    columns = {}
+    for pair in pairs:
+        name, sep, header = pair.partition("=")
+        if not sep or name not in DEFAULT_COLUMNS:
+            raise SystemExit(f"--column expects FIELD=HEADER with FIELD one of {', '.join(DEFAULT_COLUMNS)}")
+        columns[name] = header
+    return columns
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import a CSV ledger into a room")
+    parser.add_argument("file", help="CSV file, one row per bill item")
+    parser.add_argument("--room", type=int, required=True, help="Room ID")
+    parser.add_argument("--dry-run", action="store_true", help="Validate without writing")
+    parser.add_argument("--column", action="append", default=[], metavar="FIELD=HEADER")
+    parser.add_argument("--date-format", help="strptime format of the date column (default ISO 8601)")
+    parser.add_argument("--list-separator", default=";", help="Separator inside shared_by and weights")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.get(Room, args.room) is None:
+            print(f"Room {args.room} not found", file=sys.stderr)
+            return 1
+
+        with open(args.file, "rb") as source:
+            result = ledger_import_service.import_csv(
+                db,
+                args.room,
+                source,
+                columns=parse_columns(args.column),
+                date_format=args.date_format,
+                list_separator=args.list_separator,
+                dry_run=args.dry_run
+            )
+    finally:
+        db.close()
+
+    for error in result.errors:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    if result.error_count > len(result.errors):
+        print(f"... {result.error_count - len(result.errors)} more errors", file=sys.stderr)
+
+    verb = "Would import" if args.dry_run else "Imported"
+    if result.error_count:
+        print(f"{result.error_count} errors in {result.rows} rows; nothing imported")
+        return 1
+    print(
+        f"{verb} {result.rows} rows as {result.bills} bills, {result.items} items "
+        f"and {result.shares} shares in {result.seconds}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,38 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
+from core.compression import CompressionMiddleware, compression_stats
+from core.instrumentation import InstrumentationMiddleware
+from core.security import get_current_user, verify_metrics_token
 from database import engine, Base
-from routes import auth_router, rooms_router, bills_router
+from models.user import User
+from routes import auth_router, rooms_router, bills_router, files_router, sync_router
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from services.event_service import event_service
+from schemas import CompressionMetrics
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Room events reach this process's subscribers only while the backend runs
+    await event_service.start()
+    yield
+    await event_service.stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="SplitPerfect API",
     description="AI-powered expense sharing and bill splitting application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Response models are still validated; orjson only replaces the stdlib encoder
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -23,10 +44,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/gzip for large JSON and CSV bodies, negotiated per request
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so request latency includes compression
+app.add_middleware(InstrumentationMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(rooms_router)
 app.include_router(bills_router)
+app.include_router(sync_router)
+
+# Images on local disk are served by the API; S3 serves its own
+if settings.STORAGE_BACKEND == "local":
+    app.include_router(files_router)
 
 
 @app.get("/")
@@ -49,6 +81,19 @@ async def health_check():
     }
 
 
+@app.get("/compression/metrics", response_model=CompressionMetrics)
+async def get_compression_metrics(current_user: User = Depends(get_current_user)):
+    """Bytes saved and CPU spent by response compression in this API process"""
+    return CompressionMetrics(**compression_stats.metrics())
+
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+async def get_metrics():
+    """Prometheus metrics of this API process"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,5 +1,12 @@
 from models.user import User
 from models.room import Room, Membership
-from models.bill import Bill, BillItem
+from models.bill import Bill, BillItem, BillItemShare
+from models.parse_job import ParseJob
+from models.import_job import ImportJob
+from models.stored_image import StoredImage, ImageReservation
+from models.image_cleanup import ImageCleanupTask
+from models.room_balance import RoomBalance
+from models.spending_rollup import RoomCategoryTotal, RoomCategoryDaily, UserCategoryDaily
+from models.sync import SyncTombstone
 
-__all__ = ["User", "Room", "Membership", "Bill", "BillItem"]
+__all__ = ["User", "Room", "Membership", "Bill", "BillItem", "BillItemShare", "ParseJob", "ImportJob", "StoredImage", "ImageReservation", "ImageCleanupTask", "RoomBalance", "RoomCategoryTotal", "RoomCategoryDaily", "UserCategoryDaily", "SyncTombstone"]
@@ -1,36 +1,102 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Boolean, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from database import Base
+from models.sync import sync_version_column
+
+# Text search configuration of the search_vector columns and their queries
+SEARCH_CONFIG = "english"
+
+# The pg_trgm extension and trigram indexes used by search are created by
+# migration a6f0b3c7d2e9, not on startup: creating an extension needs
+# privileges the application role shouldn't require
 
 
 class Bill(Base):
     __tablename__ = "bills"
     
     id = Column(Integer, primary_key=True, index=True)
-    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False, index=True)
     uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     image_url = Column(String, nullable=False)
+    display_url = Column(String, nullable=True)  # Compressed WebP version
+    thumbnail_url = Column(String, nullable=True)
+    merchant_name = Column(String, nullable=True)
     total_amount = Column(Float, default=0.0)
+    is_draft = Column(Boolean, nullable=False, default=False)  # Imported, shares not yet assigned
     created_at = Column(DateTime, default=datetime.utcnow)
+    sync_version = sync_version_column()
+    search_vector = deferred(Column(
+        TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', coalesce(merchant_name, ''))", persisted=True)
+    ))
     
     # Relationships
     room = relationship("Room", back_populates="bills")
     uploader = relationship("User", back_populates="uploaded_bills")
-    items = relationship("BillItem", back_populates="bill", cascade="all, delete-orphan")
+    items = relationship("BillItem", back_populates="bill", cascade="all, delete-orphan", passive_deletes=True)
+    
+    @property
+    def room_name(self):
+        return self.room.name
+    
+    __table_args__ = (
+        # Newest-first pages of a room's bills, keyed on (created_at, id)
+        Index("ix_bills_room_id_created_at_id", "room_id", "created_at", "id"),
+        Index("ix_bills_room_id_sync_version", "room_id", "sync_version"),
+        Index("ix_bills_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
 
 class BillItem(Base):
     __tablename__ = "bill_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    bill_id = Column(Integer, ForeignKey("bills.id"), nullable=False)
+    bill_id = Column(Integer, ForeignKey("bills.id", ondelete="CASCADE"), nullable=False, index=True)
     description = Column(String, nullable=False)
     quantity = Column(Integer, default=1)
     unit_price = Column(Float, nullable=False)
     amount = Column(Float, nullable=False)
-    shared_by = Column(JSON, nullable=False)  # List of user_ids
+    category = Column(String, nullable=False, default="Other")  # Assigned by the categorizer unless set
     created_at = Column(DateTime, default=datetime.utcnow)
+    sync_version = sync_version_column()  # Also bumped when only the shares change
+    search_vector = deferred(Column(
+        TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', description)", persisted=True)
+    ))
     
     # Relationships
     bill = relationship("Bill", back_populates="items")
+    shares = relationship(
+        "BillItemShare",
+        back_populates="item",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+        order_by="BillItemShare.user_id"
+    )
+    
+    @property
+    def shared_by(self):
+        """User ids sharing this item"""
+        return [share.user_id for share in self.shares]
+    
+    __table_args__ = (
+        Index("ix_bill_items_sync_version", "sync_version"),
+        Index("ix_bill_items_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+
+class BillItemShare(Base):
+    __tablename__ = "bill_item_shares"
+    
+    item_id = Column(Integer, ForeignKey("bill_items.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    weight = Column(Float, nullable=False, default=1.0)  # Relative to the item's other shares
+    
+    # Relationships
+    item = relationship("BillItem", back_populates="shares")
+    
+    __table_args__ = (
+        # "Which items include user X" without scanning every share
+        Index("ix_bill_item_shares_user_id_item_id", "user_id", "item_id"),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from database import Base
+
+
+class ImageCleanupTask(Base):
+    __tablename__ = "image_cleanup_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)  # S3 object key to delete
+    original_key = Column(String, nullable=True)  # StoredImage key a derivative was rendered from
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_image_cleanup_queue_available_at", "available_at"),
+    )
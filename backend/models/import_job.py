@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from database import Base
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="SET NULL"), nullable=True)  # None once the room is deleted
+    status = Column(String, nullable=False, default=PENDING)
+    filename = Column(String, nullable=False)
+    archive_key = Column(String, nullable=True)  # Stored ZIP archive; cleared once queued for deletion
+    result = Column(JSON, nullable=True)  # Draft bill ids, per-file failures and stage throughput
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_import_jobs_status_available_at", "status", "available_at"),
+    )
+    
+    # Relationships
+    user = relationship("User")
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from database import Base
+
+
+class ParseJob(Base):
+    __tablename__ = "parse_jobs"
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default=PENDING)
+    filename = Column(String, nullable=False)
+    image_data = Column(LargeBinary, nullable=True)  # Cleared once the job finishes
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_parse_jobs_status_available_at", "status", "available_at"),
+    )
+    
+    # Relationships
+    user = relationship("User")
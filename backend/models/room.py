@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from models.sync import sync_version_column
 import secrets
 
 
@@ -13,11 +14,13 @@ class Room(Base):
     secret = Column(String, unique=True, nullable=False, index=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1)  # Bumped by every change to the room's report
+    sync_version = sync_version_column()
     
     # Relationships
     creator = relationship("User", back_populates="created_rooms", foreign_keys=[created_by])
-    memberships = relationship("Membership", back_populates="room", cascade="all, delete-orphan")
-    bills = relationship("Bill", back_populates="room", cascade="all, delete-orphan")
+    memberships = relationship("Membership", back_populates="room", cascade="all, delete-orphan", passive_deletes=True)
+    bills = relationship("Bill", back_populates="room", cascade="all, delete-orphan", passive_deletes=True)
     
     @staticmethod
     def generate_secret():
@@ -30,9 +33,14 @@ class Membership(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False, index=True)
     joined_at = Column(DateTime, default=datetime.utcnow)
+    sync_version = sync_version_column()
     
     # Relationships
     user = relationship("User", back_populates="memberships")
     room = relationship("Room", back_populates="memberships")
+    
+    __table_args__ = (
+        Index("ix_memberships_room_id_sync_version", "room_id", "sync_version"),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from database import Base
+
+
+class RoomBalance(Base):
+    __tablename__ = "room_balances"
+    
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Running totals, updated by balance deltas on every bill and item change
+    paid = Column(Float, nullable=False, default=0.0)  # Total of finalized bills uploaded
+    owed = Column(Float, nullable=False, default=0.0)  # Weighted shares of finalized bill items
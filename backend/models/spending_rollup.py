@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey
+from database import Base
+
+
+class RoomCategoryTotal(Base):
+    __tablename__ = "room_category_totals"
+
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String, primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)  # Finalized item amounts in this category
+
+
+class RoomCategoryDaily(Base):
+    __tablename__ = "room_category_daily"
+
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # Bill date (UTC)
+    category = Column(String, primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)  # Finalized item amounts in this category that day
+
+
+class UserCategoryDaily(Base):
+    __tablename__ = "user_category_daily"
+
+    # Leading room_id, day serves date-range reports for a whole room
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # Bill date (UTC)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String, primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)  # User's weighted shares of finalized items
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from database import Base
+
+
+class StoredImage(Base):
+    __tablename__ = "stored_images"
+    
+    key = Column(String, primary_key=True)  # Content-addressed object key
+    url = Column(String, unique=True, nullable=False, index=True)
+    ref_count = Column(Integer, nullable=False, default=0)  # Bills referencing this image
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ImageReservation(Base):
+    __tablename__ = "image_reservations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)  # StoredImage key, kept until a bill takes it up or this expires
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_image_reservations_key_user_id", "key", "user_id"),
+        Index("ix_image_reservations_expires_at", "expires_at"),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index, text
+from datetime import datetime
+from database import Base
+
+# Row versions for delta sync are the 64-bit id of the transaction that last
+# wrote the row. Anything a client has not seen was written by a transaction
+# at or after the oldest one still running when it last synced.
+SYNC_VERSION = text("pg_current_xact_id()::text::bigint")
+
+
+def sync_version_column() -> Column:
+    return Column(BigInteger, nullable=False, server_default=SYNC_VERSION, onupdate=SYNC_VERSION)
+
+
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+
+    id = Column(BigInteger, primary_key=True)
+    entity = Column(String, nullable=False)  # room, bill or bill_item
+    entity_id = Column(Integer, nullable=False)
+    room_id = Column(Integer, nullable=False)  # No foreign key: the room may be gone too
+    user_id = Column(Integer, nullable=True)  # Set on room deletions, one per former member
+    sync_version = sync_version_column()
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_room_id_sync_version", "room_id", "sync_version"),
+        Index("ix_sync_tombstones_user_id_sync_version", "user_id", "sync_version"),
+    )
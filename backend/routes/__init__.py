@@ -1,5 +1,7 @@
 from routes.auth import router as auth_router
 from routes.rooms import router as rooms_router
 from routes.bills import router as bills_router
+from routes.files import router as files_router
+from routes.sync import router as sync_router
 
-__all__ = ["auth_router", "rooms_router", "bills_router"]
+__all__ = ["auth_router", "rooms_router", "bills_router", "files_router", "sync_router"]
@@ -1,71 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from typing import List
-import tempfile
+from typing import List, Dict, Any, Optional, Union
+from datetime import date
+import asyncio
+import dataclasses
+import json
+import logging
 import os
+import tempfile
 
-from database import get_db
+from database import SessionLocal, get_db
 from models.user import User
-from models.room import Membership
 from models.bill import Bill, BillItem
+from models.parse_job import ParseJob
+from models.import_job import ImportJob
 from schemas import (
     BillResponse, BillItemCreate, BillItemResponse,
-    ParsedBillResponse, ParsedBillItem
+    ParsedBillResponse, ParsedBillItem,
+    ParseJobCreated, ParseJobResponse, ParseQueueMetrics,
+    BulkImportResponse, ImportJobCreated, ImportJobResponse,
+    PresignedUploadRequest, PresignedUploadResponse, UploadConfirmRequest,
+    UploadAndParseResponse, ImageUploadResponse, UserItemShare,
+    BillItemUpdate, ItemSharesUpdate, BillItemChange,
+    LedgerImportResponse, BillFeedPage, SearchPage
 )
-from core.security import get_current_user
+from core.config import settings
+from core.security import get_current_user, require_membership
+from core.responses import SSE_HEADERS, sse_event
 from services.storage_service import storage_service
 from services.ocr_service import ocr_service
 from services.llm_service import llm_service
+from services.parse_job_service import parse_job_service
+from services.import_job_service import import_job_service
+from services.image_service import image_service
+from services.image_ref_service import image_ref_service
+from services.image_cleanup_service import image_cleanup_service
+from services.bill_item_service import bill_item_service
+from services.balance_service import balance_service
+from services.rollup_service import rollup_service
+from services.room_version_service import room_version_service
+from services.ledger_import_service import ledger_import_service
+from services.bill_feed_service import bill_feed_service
+from services.search_service import search_service
+from services.listing_service import listing_service
+from services.sync_service import sync_service
+from services.event_service import event_service
 
 router = APIRouter(prefix="/bills", tags=["Bills"])
 
+logger = logging.getLogger(__name__)
+
 
-@router.post("/upload")
+@router.post("/upload", response_model=ImageUploadResponse)
 async def upload_bill(
     room_id: int = Form(...),
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Upload a bill image to S3"""
-    # Verify membership
-    membership = db.query(Membership).filter(
-        Membership.user_id == current_user.id,
-        Membership.room_id == room_id
-    ).first()
+    """Upload a bill image to S3 along with display and thumbnail versions"""
+    require_membership(db, room_id, current_user)
     
-    if not membership:
+    # Validate file type
+    if not file.content_type.startswith('image/'):
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this room"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
         )
     
-    # Validate file type
-    if not file.content_type.startswith('image/'):
+    if file.size is not None and file.size > settings.MAX_IMAGE_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File must be at most {settings.MAX_IMAGE_UPLOAD_BYTES} bytes"
+        )
+    
+    # Stream to S3 in chunks through a temporary file the derivative
+    # worker then reads itself, so the image is never held in memory
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(file.filename)[1]) as spool:
+        try:
+            image_url = await storage_service.upload_bill_stream(
+                file, file.filename, spool=spool, max_size=settings.MAX_IMAGE_UPLOAD_BYTES
+            )
+            _reserve_upload(current_user.id, image_url)
+        except ValueError as e:
+            # The declared size can be missing or wrong; the stream is the truth
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to upload image: {str(e)}"
+            )
+        
+        return await _attach_derivatives(image_url, spool.name)
+
+
+@router.post("/upload/presign", response_model=PresignedUploadResponse)
+async def presign_bill_upload(
+    upload_request: PresignedUploadRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Issue a short-lived POST policy so the client can upload the image
+    straight to the bucket; call /bills/upload/confirm afterwards
+    """
+    require_membership(db, upload_request.room_id, current_user)
+    
+    # Validate file type and size
+    if not upload_request.content_type.startswith('image/'):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File must be an image"
         )
     
+    if upload_request.size <= 0 or upload_request.size > settings.MAX_IMAGE_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File must be between 1 byte and {settings.MAX_IMAGE_UPLOAD_BYTES} bytes"
+        )
+    
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Upload to S3
-        image_url = await storage_service.upload_bill_image(file_content, file.filename)
-        
-        return {
-            "image_url": image_url,
-            "message": "Image uploaded successfully"
-        }
+        presigned = await storage_service.create_presigned_upload(
+            upload_request.room_id,
+            current_user.id,
+            upload_request.filename,
+            upload_request.content_type,
+            upload_request.size
+        )
+        return PresignedUploadResponse(**presigned)
         
+    except NotImplementedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to upload image: {str(e)}"
+            detail=f"Failed to create upload URL: {str(e)}"
         )
 
 
+@router.post("/upload/confirm", response_model=ImageUploadResponse)
+async def confirm_bill_upload(
+    confirm_request: UploadConfirmRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Confirm a direct-to-bucket upload and return its image URL"""
+    require_membership(db, confirm_request.room_id, current_user)
+    
+    try:
+        image_url = await storage_service.confirm_presigned_upload(
+            confirm_request.key,
+            confirm_request.room_id,
+            current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    _reserve_upload(current_user.id, image_url)
+    
+    try:
+        content = await storage_service.download_bill_image(image_url)
+    except Exception as e:
+        logger.warning("Failed to fetch upload for derivatives: %s", e)
+        return ImageUploadResponse(image_url=image_url)
+    
+    return await _attach_derivatives(image_url, content)
+
+
 @router.post("/parse", response_model=ParsedBillResponse)
 async def parse_bill(
     file: UploadFile = File(...),
@@ -83,55 +194,418 @@ async def parse_bill(
         )
     
     try:
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        content = await file.read()
+        return await _parse_content(content, file.filename)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to parse bill: {str(e)}"
+        )
+
+
+@router.post("/upload-and-parse", response_model=UploadAndParseResponse)
+async def upload_and_parse_bill(
+    room_id: int = Form(...),
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a bill image and parse it in one request
+    The image is received once; the S3 upload and OCR + LLM parse run
+    concurrently from the same buffer
+    """
+    require_membership(db, room_id, current_user)
+    
+    # Validate file type
+    if not file.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    
+    try:
+        content = await file.read()
+        
+        upload, parsed = await asyncio.gather(
+            _upload_with_derivatives(content, file.filename, current_user.id),
+            _parse_content(content, file.filename)
+        )
+        
+        return UploadAndParseResponse(**upload.model_dump(), parsed=parsed)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload and parse bill: {str(e)}"
+        )
+
+
+@router.post("/parse/stream")
+async def parse_bill_stream(
+    file: UploadFile = File(...),
+    room_id: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Parse bill image using OCR + a streamed LLM completion
+    Returns Server-Sent Events: progress, merchant, item (one per ParsedBillItem),
+    then a final result event carrying the full ParsedBillResponse. If the
+    streamed items don't add up, a reparsing progress event is sent and the
+    result comes from the stronger model instead.
+    When room_id is given the image is also uploaded to S3 concurrently and
+    an uploaded event carries its image and derivative URLs. If the upload
+    fails, an upload_error event is sent instead and the result still
+    arrives, with a null image_url.
+    """
+    if room_id is not None:
+        require_membership(db, room_id, current_user)
+    
+    # Validate file type
+    if not file.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    
+    content = await file.read()
+    filename = file.filename
+    
+    async def event_stream():
+        upload_task = None
+        uploaded_image: Optional[ImageUploadResponse] = None
+        if room_id is not None:
+            upload_task = asyncio.create_task(_upload_with_derivatives(content, filename, current_user.id))
+        
+        def upload_event():
+            nonlocal upload_task, uploaded_image
+            if upload_task is None or not upload_task.done():
+                return None
+            task, upload_task = upload_task, None
+            try:
+                uploaded_image = task.result()
+            except Exception as e:
+                # The parse carries on; the image can be uploaded again
+                return sse_event("upload_error", {"detail": f"Failed to upload image: {str(e)}"})
+            return sse_event("uploaded", uploaded_image.model_dump())
         
         try:
-            # Extract text using OCR
-            ocr_text = await ocr_service.extract_text_from_image(tmp_path)
+            yield sse_event("progress", {"stage": "ocr_started"})
+            ocr_text = await ocr_service.extract_text_from_bytes(content, filename)
             
             if not ocr_text.strip():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Could not extract text from image"
-                )
+                yield sse_event("error", {"detail": "Could not extract text from image"})
+                return
             
-            # Parse with LLM
-            parsed_data = await llm_service.parse_bill_text(ocr_text)
-            
-            # Format response
-            items = [
-                ParsedBillItem(
-                    description=item['description'],
-                    quantity=item['quantity'],
-                    unit_price=item['unit_price'],
-                    total=item['total']
-                )
-                for item in parsed_data.get('items', [])
-            ]
-            
-            return ParsedBillResponse(
-                items=items,
-                total_amount=parsed_data.get('total_amount', 0.0),
-                merchant_name=parsed_data.get('merchant_name'),
-                date=parsed_data.get('date')
-            )
+            yield sse_event("progress", {"stage": "ocr_complete"})
             
+            async for kind, payload in llm_service.stream_bill_text(ocr_text):
+                uploaded = upload_event()
+                if uploaded:
+                    yield uploaded
+                
+                if kind == "field":
+                    key, value = payload
+                    if key == "merchant_name" and value:
+                        yield sse_event("merchant", {"merchant_name": value})
+                elif kind == "item":
+                    yield sse_event("item", _build_parsed_item(payload).model_dump())
+                elif kind == "reparsing":
+                    yield sse_event("progress", {"stage": "reparsing", "model": payload})
+                elif kind == "result":
+                    if upload_task is not None:
+                        await asyncio.wait([upload_task])
+                        yield upload_event()
+                    yield sse_event("result", {
+                        **_build_parsed_response(payload).model_dump(),
+                        "image_url": uploaded_image.image_url if uploaded_image else None
+                    })
+                    
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Failed to parse bill: {str(e)}"})
         finally:
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-        
-    except HTTPException:
-        raise
+            if upload_task is not None and not upload_task.done():
+                upload_task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.post("/parse/jobs", response_model=ParseJobCreated, status_code=status.HTTP_202_ACCEPTED)
+async def create_parse_job(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a bill image for background OCR + LLM parsing
+    Returns a job id to poll with GET /bills/parse/jobs/{job_id}
+    """
+    # Validate file type
+    if not file.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    
+    content = await file.read()
+    job = parse_job_service.enqueue(db, current_user.id, content, file.filename)
+    
+    return ParseJobCreated(job_id=job.id, status=job.status)
+
+
+@router.get("/parse/jobs/metrics", response_model=ParseQueueMetrics)
+async def get_parse_queue_metrics(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue depth and age, used to scale parse workers"""
+    return ParseQueueMetrics(**parse_job_service.metrics(db))
+
+
+@router.get("/parse/jobs/{job_id}", response_model=ParseJobResponse)
+async def get_parse_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status and, once finished, the result of a parse job"""
+    job = db.query(ParseJob).filter(
+        ParseJob.id == job_id,
+        ParseJob.user_id == current_user.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parse job not found"
+        )
+    
+    return ParseJobResponse.model_validate(job)
+
+
+@router.post("/import/zip", response_model=ImportJobCreated, status_code=status.HTTP_202_ACCEPTED)
+async def import_bills_zip(
+    room_id: int = Form(...),
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a ZIP archive of receipt photos for import as draft bills
+    A worker uploads, OCRs and parses each image in an overlapping
+    pipeline; poll GET /bills/import/jobs/{job_id} for the drafts,
+    per-stage throughput and any per-file failures
+    """
+    require_membership(db, room_id, current_user)
+    
+    if file.size is not None and file.size > settings.BULK_IMPORT_MAX_ARCHIVE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File must be at most {settings.BULK_IMPORT_MAX_ARCHIVE_BYTES} bytes"
+        )
+    
+    try:
+        archive_key = await storage_service.upload_import_archive(file)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to parse bill: {str(e)}"
+            detail=f"Failed to store archive: {str(e)}"
+        )
+    
+    try:
+        job = import_job_service.enqueue(db, current_user.id, room_id, archive_key, file.filename or "import.zip")
+    except Exception:
+        await storage_service.delete_objects([archive_key])
+        raise
+    
+    return ImportJobCreated(job_id=job.id, status=job.status)
+
+
+@router.get("/import/jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status and, once finished, the drafts and failures of an import job"""
+    job = db.query(ImportJob).filter(
+        ImportJob.id == job_id,
+        ImportJob.user_id == current_user.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    result = None
+    if job.result is not None:
+        bills = db.query(Bill).filter(
+            Bill.id.in_(job.result["bill_ids"]),
+            Bill.room_id == job.room_id
+        ).order_by(Bill.id).all()
+        result = BulkImportResponse(
+            bills=[BillResponse.model_validate(bill) for bill in bills],
+            failures=job.result["failures"],
+            stages=job.result["stages"],
+            total_seconds=job.result["total_seconds"]
+        )
+    
+    return ImportJobResponse(
+        id=job.id,
+        room_id=job.room_id,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        result=result,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+
+@router.post("/import/csv", response_model=LedgerImportResponse)
+async def import_ledger_csv(
+    response: Response,
+    room_id: int = Form(...),
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    columns: Optional[str] = Form(None),
+    date_format: Optional[str] = Form(None),
+    list_separator: str = Form(";"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Import expense history from a CSV export (one row per item)
+    Rows sharing a bill_ref become one bill; payers and sharers are matched
+    to room members by email or name. ``columns`` is a JSON object mapping
+    our field names to the file's headers. With ``dry_run`` nothing is
+    written and the response lists every validation error.
+    """
+    require_membership(db, room_id, current_user)
+    
+    if file.size is not None and file.size > settings.LEDGER_IMPORT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File must be at most {settings.LEDGER_IMPORT_MAX_BYTES} bytes"
+        )
+    
+    try:
+        column_map = json.loads(columns) if columns else None
+        if column_map is not None and not isinstance(column_map, dict):
+            raise ValueError
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="columns must be a JSON object"
+        )
+    
+    # COPY and the set-based inserts block, so run them off the event loop
+    result = await asyncio.to_thread(
+        ledger_import_service.import_csv,
+        db,
+        room_id,
+        file.file,
+        columns=column_map,
+        date_format=date_format,
+        list_separator=list_separator,
+        dry_run=dry_run
+    )
+    body = LedgerImportResponse(**dataclasses.asdict(result))
+    
+    if result.error_count and not dry_run:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=body.model_dump()
         )
+    if not dry_run:
+        response.status_code = status.HTTP_201_CREATED
+    
+    return body
+
+
+async def _upload_with_derivatives(content: bytes, filename: str, user_id: int) -> ImageUploadResponse:
+    """Upload an in-memory image to S3, reserve it for the user and generate its derivatives"""
+    image_url = await storage_service.upload_bill_image(content, filename)
+    _reserve_upload(user_id, image_url)
+    return await _attach_derivatives(image_url, content)
+
+
+def _reserve_upload(user_id: int, image_url: str) -> None:
+    """
+    Keep a fresh upload for its uploader until /bills/items takes it up
+    Uses its own session, so it also works from streamed responses
+    """
+    db = SessionLocal()
+    try:
+        image_ref_service.reserve(db, image_url, user_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _attach_derivatives(image_url: str, content: Union[bytes, str]) -> ImageUploadResponse:
+    """Generate display/thumbnail versions; the original stays usable if this fails"""
+    try:
+        derived = await image_service.create_derivatives(image_url, content)
+    except Exception as e:
+        logger.warning("Failed to create image derivatives: %s", e)
+        return ImageUploadResponse(image_url=image_url)
+    
+    return ImageUploadResponse(
+        image_url=image_url,
+        display_url=derived["display_url"],
+        thumbnail_url=derived["thumbnail_url"],
+        derivatives=derived["stats"]
+    )
+
+
+async def _parse_content(content: bytes, filename: str) -> ParsedBillResponse:
+    """Run OCR + LLM parsing on an in-memory image"""
+    # Extract text using OCR
+    ocr_text = await ocr_service.extract_text_from_bytes(content, filename)
+    
+    if not ocr_text.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not extract text from image"
+        )
+    
+    # Parse with LLM
+    parsed_data = await llm_service.parse_bill_text(ocr_text)
+    
+    return _build_parsed_response(parsed_data)
+
+
+def _build_parsed_item(item: Dict[str, Any]) -> ParsedBillItem:
+    """Convert a validated LLM line item into a ParsedBillItem"""
+    return ParsedBillItem(
+        description=item['description'],
+        quantity=item['quantity'],
+        unit_price=item['unit_price'],
+        total=item['total']
+    )
+
+
+def _build_parsed_response(parsed_data: Dict[str, Any]) -> ParsedBillResponse:
+    """Convert validated LLM output into a ParsedBillResponse"""
+    return ParsedBillResponse(
+        items=[_build_parsed_item(item) for item in parsed_data.get('items', [])],
+        total_amount=parsed_data.get('total_amount', 0.0),
+        merchant_name=parsed_data.get('merchant_name'),
+        date=parsed_data.get('date')
+    )
 
 
 @router.post("/items", response_model=BillResponse, status_code=status.HTTP_201_CREATED)
@@ -139,20 +613,29 @@ async def save_bill_items(
     room_id: int,
     image_url: str,
     items: List[BillItemCreate],
+    display_url: Optional[str] = None,
+    thumbnail_url: Optional[str] = None,
+    merchant_name: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Save parsed bill items to database"""
-    # Verify membership
-    membership = db.query(Membership).filter(
-        Membership.user_id == current_user.id,
-        Membership.room_id == room_id
-    ).first()
+    require_membership(db, room_id, current_user)
     
-    if not membership:
+    try:
+        bill_item_service.validate_members(db, room_id, items)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this room"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Derivatives are deleted with the image, so only accept the image's own
+    derivative_urls = image_service.derivative_urls(image_url) if storage_service.key_from_url(image_url) else ()
+    if (display_url and display_url not in derivative_urls) or (thumbnail_url and thumbnail_url not in derivative_urls):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Display and thumbnail URLs must be derivatives of the bill image"
         )
     
     # Calculate total
@@ -163,22 +646,29 @@ async def save_bill_items(
         room_id=room_id,
         uploaded_by=current_user.id,
         image_url=image_url,
+        display_url=display_url,
+        thumbnail_url=thumbnail_url,
+        merchant_name=merchant_name,
         total_amount=total_amount
     )
     db.add(bill)
     db.flush()
-    
-    # Create bill items
-    for item_data in items:
-        bill_item = BillItem(
-            bill_id=bill.id,
-            description=item_data.description,
-            quantity=item_data.quantity,
-            unit_price=item_data.unit_price,
-            amount=item_data.amount,
-            shared_by=item_data.shared_by
+    try:
+        image_ref_service.acquire(db, image_url, current_user.id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-        db.add(bill_item)
+    
+    # Create bill items and their shares in bulk
+    bill_item_service.insert_items(db, bill.id, items, merchant_name)
+    balance_service.apply_bill(db, bill)
+    rollup_service.apply_bill(db, bill)
+    room_version_service.bump(db, room_id)
+    event_service.publish(db, room_id, "bill_added", bill_id=bill.id)
+    event_service.publish(db, room_id, "balances_changed")
     
     db.commit()
     db.refresh(bill)
@@ -186,6 +676,55 @@ async def save_bill_items(
     return BillResponse.model_validate(bill)
 
 
+@router.get("/mine", response_model=BillFeedPage)
+async def get_my_bills(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.BILL_FEED_PAGE_SIZE, ge=1, le=settings.BILL_FEED_MAX_PAGE_SIZE),
+    room_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get bills from all of the current user's rooms, newest first
+    Pass next_cursor back as cursor for the following page. Optionally
+    limited to one room and to bills dated start..end (inclusive).
+    """
+    try:
+        return bill_feed_service.page(
+            db, current_user.id, limit, cursor=cursor, room_id=room_id, start=start, end=end
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/search", response_model=SearchPage)
+async def search_bills(
+    q: str = Query(..., min_length=1, max_length=settings.SEARCH_MAX_QUERY_LENGTH),
+    limit: int = Query(settings.SEARCH_PAGE_SIZE, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    room_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search item descriptions and merchant names in all of the current
+    user's rooms, best match first
+    Tolerates typos; supports "quoted phrases" and -excluded words. Pass
+    next_offset back as offset for the following page. Optionally limited
+    to one room and to bills dated start..end (inclusive).
+    """
+    return search_service.search(
+        db, current_user.id, q.strip(), limit, offset=offset, room_id=room_id, start=start, end=end
+    )
+
+
 @router.get("/room/{room_id}", response_model=List[BillResponse])
 async def get_room_bills(
     room_id: int,
@@ -193,20 +732,22 @@ async def get_room_bills(
     db: Session = Depends(get_db)
 ):
     """Get all bills for a room"""
-    # Verify membership
-    membership = db.query(Membership).filter(
-        Membership.user_id == current_user.id,
-        Membership.room_id == room_id
-    ).first()
+    require_membership(db, room_id, current_user)
     
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this room"
-        )
+    # Projected rows in three queries, sent as-is; response_model documents the shape
+    return ORJSONResponse(listing_service.room_bills(db, room_id))
+
+
+@router.get("/room/{room_id}/items/mine", response_model=List[UserItemShare])
+async def get_my_room_items(
+    room_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the items in a room that are shared with the current user, with their part of each"""
+    require_membership(db, room_id, current_user)
     
-    bills = db.query(Bill).filter(Bill.room_id == room_id).order_by(Bill.created_at.desc()).all()
-    return [BillResponse.model_validate(bill) for bill in bills]
+    return bill_item_service.items_for_user(db, room_id, current_user.id)
 
 
 @router.get("/{bill_id}", response_model=BillResponse)
@@ -224,29 +765,204 @@ async def get_bill_details(
             detail="Bill not found"
         )
     
-    # Verify membership
-    membership = db.query(Membership).filter(
-        Membership.user_id == current_user.id,
-        Membership.room_id == bill.room_id
-    ).first()
+    require_membership(db, bill.room_id, current_user)
+    
+    return BillResponse.model_validate(bill)
+
+
+@router.post("/{bill_id}/finalize", response_model=BillResponse)
+async def finalize_draft_bill(
+    bill_id: int,
+    items: List[BillItemCreate],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Replace a draft bill's items with reviewed ones and include it in balances"""
+    bill = db.query(Bill).filter(Bill.id == bill_id).with_for_update().first()
+    
+    if not bill:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bill not found"
+        )
     
-    if not membership:
+    if bill.uploaded_by != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this room"
+            detail="Only the uploader can finalize this bill"
+        )
+    
+    if not bill.is_draft:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bill is not a draft"
+        )
+    
+    try:
+        bill_item_service.validate_members(db, bill.room_id, items)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     
+    # Shares go with the old items via ON DELETE CASCADE
+    draft_item_ids = db.scalars(delete(BillItem).where(BillItem.bill_id == bill.id).returning(BillItem.id)).all()
+    sync_service.record_deleted(db, "bill_item", bill.room_id, draft_item_ids)
+    bill_item_service.insert_items(db, bill.id, items, bill.merchant_name)
+    bill.total_amount = sum(item.amount for item in items)
+    bill.is_draft = False
+    balance_service.apply_bill(db, bill)
+    rollup_service.apply_bill(db, bill)
+    room_version_service.bump(db, bill.room_id)
+    _publish_bill_updated(db, bill)
+    
+    db.commit()
+    db.refresh(bill)
+    
     return BillResponse.model_validate(bill)
 
 
+def _get_editable_bill(db: Session, bill_id: int, user: User) -> Bill:
+    """Load and lock a bill for editing by its uploader"""
+    bill = db.query(Bill).filter(Bill.id == bill_id).with_for_update().first()
+    
+    if not bill:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bill not found"
+        )
+    
+    if bill.uploaded_by != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the uploader can edit this bill"
+        )
+    
+    return bill
+
+
+def _get_bill_item(db: Session, bill: Bill, item_id: int) -> BillItem:
+    item = db.query(BillItem).filter(BillItem.id == item_id, BillItem.bill_id == bill.id).first()
+    
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found"
+        )
+    
+    return item
+
+
+def _validate_item_members(db: Session, room_id: int, item: Any) -> None:
+    try:
+        bill_item_service.validate_members(db, room_id, [item])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def _publish_bill_updated(db: Session, bill: Bill) -> None:
+    event_service.publish(db, bill.room_id, "bill_updated", bill_id=bill.id)
+    if not bill.is_draft:
+        event_service.publish(db, bill.room_id, "balances_changed")
+
+
+def _item_change(bill: Bill, item: Optional[BillItem], deltas: Dict[int, float]) -> BillItemChange:
+    return BillItemChange(
+        item=BillItemResponse.model_validate(item) if item is not None else None,
+        total_amount=bill.total_amount,
+        balance_deltas={user_id: round(delta, 2) for user_id, delta in deltas.items()}
+    )
+
+
+@router.post("/{bill_id}/items", response_model=BillItemChange, status_code=status.HTTP_201_CREATED)
+async def add_bill_item(
+    bill_id: int,
+    item_data: BillItemCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a single item to a bill, updating only the affected balances"""
+    bill = _get_editable_bill(db, bill_id, current_user)
+    _validate_item_members(db, bill.room_id, item_data)
+    
+    item, deltas = bill_item_service.add_item(db, bill, item_data)
+    _publish_bill_updated(db, bill)
+    db.commit()
+    
+    return _item_change(bill, item, deltas)
+
+
+@router.patch("/{bill_id}/items/{item_id}", response_model=BillItemChange)
+async def update_bill_item(
+    bill_id: int,
+    item_id: int,
+    changes: BillItemUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Correct a single item; fields left out are unchanged"""
+    bill = _get_editable_bill(db, bill_id, current_user)
+    item = _get_bill_item(db, bill, item_id)
+    _validate_item_members(db, bill.room_id, changes)
+    
+    deltas = bill_item_service.update_item(db, bill, item, changes)
+    _publish_bill_updated(db, bill)
+    db.commit()
+    
+    return _item_change(bill, item, deltas)
+
+
+@router.patch("/{bill_id}/items/{item_id}/shares", response_model=BillItemChange)
+async def update_bill_item_shares(
+    bill_id: int,
+    item_id: int,
+    shares: ItemSharesUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Change who shares a single item"""
+    bill = _get_editable_bill(db, bill_id, current_user)
+    item = _get_bill_item(db, bill, item_id)
+    _validate_item_members(db, bill.room_id, shares)
+    
+    deltas = bill_item_service.set_shares(db, bill, item, bill_item_service.share_weights(shares))
+    _publish_bill_updated(db, bill)
+    db.commit()
+    
+    return _item_change(bill, item, deltas)
+
+
+@router.delete("/{bill_id}/items/{item_id}", response_model=BillItemChange)
+async def remove_bill_item(
+    bill_id: int,
+    item_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a single item from a bill"""
+    bill = _get_editable_bill(db, bill_id, current_user)
+    item = _get_bill_item(db, bill, item_id)
+    
+    deltas = bill_item_service.remove_item(db, bill, item)
+    _publish_bill_updated(db, bill)
+    db.commit()
+    
+    return _item_change(bill, None, deltas)
+
+
 @router.delete("/{bill_id}")
 async def delete_bill(
     bill_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a bill (only uploader can delete)"""
-    bill = db.query(Bill).filter(Bill.id == bill_id).first()
+    bill = db.query(Bill).filter(Bill.id == bill_id).with_for_update().first()
     
     if not bill:
         raise HTTPException(
@@ -260,11 +976,22 @@ async def delete_bill(
             detail="Only the uploader can delete this bill"
         )
     
-    # Delete from S3
-    await storage_service.delete_bill_image(bill.image_url)
-    
-    # Delete from database
-    db.delete(bill)
+    # Items go with the bill via ON DELETE CASCADE; unreferenced images
+    # are queued in the same transaction and removed from S3 afterwards
+    unreferenced = image_ref_service.release_bills(db, Bill.id == bill_id)
+    image_cleanup_service.enqueue_images(db, unreferenced)
+    balance_service.apply_bill(db, bill, sign=-1)
+    rollup_service.apply_bill(db, bill, sign=-1)
+    if not bill.is_draft:
+        room_version_service.bump(db, bill.room_id)
+    sync_service.record_deleted(db, "bill", bill.room_id, [bill_id])
+    event_service.publish(db, bill.room_id, "bill_deleted", bill_id=bill_id)
+    if not bill.is_draft:
+        event_service.publish(db, bill.room_id, "balances_changed")
+    db.execute(delete(Bill).where(Bill.id == bill_id))
     db.commit()
     
+    if unreferenced:
+        background_tasks.add_task(image_cleanup_service.run_in_background)
+    
     return {"message": "Bill deleted successfully"}
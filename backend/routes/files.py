@@ -0,0 +1,117 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from typing import Optional, Tuple
+import asyncio
+import mimetypes
+
+from core.compression import compression
+from core.responses import FileRangeResponse, open_file
+from services.storage_backends import IMMUTABLE_CACHE_CONTROL
+from services.storage_service import storage_service
+
+# Only mounted when STORAGE_BACKEND=local; on S3 images are served by the bucket
+router = APIRouter(prefix="/files", tags=["Files"])
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range into an inclusive (start, end)
+
+    Returns None for headers we don't handle (multiple ranges, other
+    units, malformed values), in which case the whole file is sent.
+    Raises ValueError if the range is well formed but unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            # Suffix range: the final N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+@compression(enabled=False)  # Byte ranges and sendfile need the stored bytes as-is
+async def get_file(key: str, request: Request):
+    """
+    Serve a stored image from local disk
+
+    Supports conditional requests (ETag / If-None-Match) and single byte
+    ranges. Objects never change under a key, so responses are cacheable
+    for a year.
+    """
+    path = storage_service.backend.path(key)
+    try:
+        # Headers come from the descriptor the body is sent from
+        fd, stat = await asyncio.to_thread(open_file, path) if path else (None, None)
+    except (FileNotFoundError, NotADirectoryError):
+        fd, stat = None, None
+
+    if fd is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return FileRangeResponse(fd, 0, 0, status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("range")
+    # A stale If-Range means the client's partial copy is outdated: send it all
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return FileRangeResponse(
+                fd, 0, 0,
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}", "Content-Length": "0"}
+            )
+
+    if byte_range is None:
+        return FileRangeResponse(
+            fd, 0, size,
+            headers={**headers, "Content-Length": str(size)},
+            media_type=media_type
+        )
+
+    start, end = byte_range
+    return FileRangeResponse(
+        fd, start, end - start + 1,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1)
+        },
+        media_type=media_type
+    )
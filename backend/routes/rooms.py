@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from datetime import date
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import re
 
 from database import get_db
 from models.user import User
 from models.room import Room, Membership
+from models.bill import Bill
 from schemas import (
     RoomCreate, RoomJoin, RoomResponse, RoomWithMembers,
-    UserResponse, RoomSummary, DebtTransaction, UserBalance
+    RoomSummary, RoomReport, CategoryExpense,
+    EventStreamMetrics
 )
-from core.security import get_current_user
-from services.simplify_service import simplify_service
+from core.security import get_current_user, require_membership
+from core.responses import FileRangeResponse, SSE_HEADERS, open_file, sse_event
+from services.report_service import report_service
+from services.export_service import export_service, EXPORT_FORMATS
+from services.image_ref_service import image_ref_service
+from services.image_cleanup_service import image_cleanup_service
+from services.rollup_service import rollup_service
+from services.room_version_service import room_version_service
+from services.sync_service import sync_service
+from services.event_service import event_service
+from services.listing_service import listing_service
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
 
@@ -77,6 +92,8 @@ async def join_room(
     # Add membership
     membership = Membership(user_id=current_user.id, room_id=room.id)
     db.add(membership)
+    room_version_service.bump(db, room.id)
+    event_service.publish(db, room.id, "member_joined", user_id=current_user.id, name=current_user.name)
     db.commit()
     
     # Get member count
@@ -87,28 +104,20 @@ async def join_room(
     return response
 
 
+@router.get("/events/metrics", response_model=EventStreamMetrics)
+async def get_event_stream_metrics(current_user: User = Depends(get_current_user)):
+    """Event stream connections and fan-out latency of this API process"""
+    return EventStreamMetrics(**event_service.metrics())
+
+
 @router.get("", response_model=List[RoomResponse])
 async def get_my_rooms(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all rooms the current user is a member of"""
-    memberships = db.query(Membership).filter(
-        Membership.user_id == current_user.id
-    ).all()
-    
-    rooms = []
-    for membership in memberships:
-        room = membership.room
-        member_count = db.query(Membership).filter(
-            Membership.room_id == room.id
-        ).count()
-        
-        room_response = RoomResponse.model_validate(room)
-        room_response.member_count = member_count
-        rooms.append(room_response)
-    
-    return rooms
+    # Projected rows in one query, sent as-is; response_model documents the shape
+    return ORJSONResponse(listing_service.rooms_of(db, current_user.id))
 
 
 @router.get("/{room_id}", response_model=RoomWithMembers)
@@ -118,33 +127,16 @@ async def get_room_details(
     db: Session = Depends(get_db)
 ):
     """Get room details with member list"""
-    # Check if user is member
-    membership = db.query(Membership).filter(
-        Membership.user_id == current_user.id,
-        Membership.room_id == room_id
-    ).first()
-    
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this room"
-        )
+    require_membership(db, room_id, current_user)
     
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = listing_service.room_with_members(db, room_id)
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room not found"
         )
     
-    # Get all members
-    memberships = db.query(Membership).filter(Membership.room_id == room_id).all()
-    members = [UserResponse.model_validate(m.user) for m in memberships]
-    
-    response = RoomWithMembers.model_validate(room)
-    response.members = members
-    response.member_count = len(members)
-    return response
+    return ORJSONResponse(room)
 
 
 @router.get("/{room_id}/summary", response_model=RoomSummary)
@@ -154,79 +146,157 @@ async def get_room_summary(
     db: Session = Depends(get_db)
 ):
     """Get simplified debt summary for a room"""
-    # Verify membership
-    membership = db.query(Membership).filter(
-        Membership.user_id == current_user.id,
-        Membership.room_id == room_id
-    ).first()
+    require_membership(db, room_id, current_user)
+    return report_service.summary(db, room_id)
+
+
+@router.get("/{room_id}/report", response_model=RoomReport)
+async def get_room_report(
+    room_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the debt summary with spending per category
+    Optionally limited to bills dated start..end (inclusive) and to one
+    user's shares
+    """
+    require_membership(db, room_id, current_user)
     
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this room"
-        )
+    summary = report_service.summary(db, room_id)
+    breakdown = rollup_service.category_breakdown(db, room_id, start=start, end=end, user_id=user_id)
     
-    room = db.query(Room).filter(Room.id == room_id).first()
+    return RoomReport(
+        **summary.model_dump(),
+        category_breakdown=[
+            CategoryExpense(category=category, amount=amount)
+            for category, amount in breakdown
+        ]
+    )
+
+
+@router.get("/{room_id}/report.pdf")
+async def get_room_report_pdf(
+    room_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download the settlement report as PDF
+    Served from cache while the room is unchanged; otherwise rendered and
+    streamed to the client page by page
+    """
+    require_membership(db, room_id, current_user)
     
-    # Calculate balances
-    balances = simplify_service.calculate_balances(room_id, db)
+    room = db.query(Room.name, Room.version).filter(Room.id == room_id).first()
+    if not room:
+        # Deleted since the membership check
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+    filename = re.sub(r"[^A-Za-z0-9_-]+", "-", room.name).strip("-") or f"room-{room_id}"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}-report.pdf"',
+        "Cache-Control": "private, no-cache"
+    }
     
-    # Simplify debts
-    transactions = simplify_service.simplify_debts(balances)
+    path = report_service.cached_pdf(room_id, room.version)
+    if path:
+        etag = f'"room-{room_id}-v{room.version}"'
+        headers["ETag"] = etag
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        try:
+            # Open before responding: an eviction after this point can't
+            # pull the file out from under the response
+            fd, stat = open_file(path)
+        except FileNotFoundError:
+            # Evicted by a newer render in the meantime
+            fd = None
+        if fd is not None:
+            return FileRangeResponse(
+                fd, 0, stat.st_size,
+                headers={**headers, "Content-Length": str(stat.st_size)},
+                media_type="application/pdf"
+            )
+        del headers["ETag"]
     
-    # Get user names
-    users = db.query(User).filter(User.id.in_(balances.keys())).all()
-    user_map = {u.id: u.name for u in users}
+    return StreamingResponse(
+        report_service.stream_pdf(room_id),
+        media_type="application/pdf",
+        headers=headers
+    )
+
+
+@router.get("/{room_id}/export")
+async def export_room_ledger(
+    room_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Export every finalized bill item of a room as CSV or NDJSON
+    Streamed from a server-side cursor; the CSV can be re-imported with
+    POST /bills/import/csv
+    """
+    require_membership(db, room_id, current_user)
     
-    # Format transactions
-    debt_transactions = [
-        DebtTransaction(
-            from_user_id=from_id,
-            from_user_name=user_map.get(from_id, "Unknown"),
-            to_user_id=to_id,
-            to_user_name=user_map.get(to_id, "Unknown"),
-            amount=amount
+    room = db.query(Room.name).filter(Room.id == room_id).first()
+    if not room:
+        # Deleted since the membership check
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
         )
-        for from_id, to_id, amount in transactions
-    ]
-    
-    # Calculate total expenses
-    from models.bill import Bill
-    bills = db.query(Bill).filter(Bill.room_id == room_id).all()
-    total_expenses = sum(bill.total_amount for bill in bills)
-    
-    # Format balances
-    user_balances = []
-    for user_id, net_balance in balances.items():
-        # Calculate total paid and owed
-        total_paid = sum(bill.total_amount for bill in bills if bill.uploaded_by == user_id)
-        total_owed = total_paid - net_balance
-        
-        user_balances.append(UserBalance(
-            user_id=user_id,
-            user_name=user_map.get(user_id, "Unknown"),
-            total_paid=total_paid,
-            total_owed=total_owed,
-            net_balance=net_balance
-        ))
-    
-    return RoomSummary(
-        room_id=room.id,
-        room_name=room.name,
-        total_expenses=total_expenses,
-        transactions=debt_transactions,
-        balances=user_balances
+    filename = re.sub(r"[^A-Za-z0-9_-]+", "-", room.name).strip("-") or f"room-{room_id}"
+    
+    return StreamingResponse(
+        export_service.stream(room_id, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}-ledger.{format}"'}
     )
 
 
+@router.get("/{room_id}/events")
+async def stream_room_events(
+    room_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Subscribe to a room's events as Server-Sent Events
+    Events: bill_added, bill_updated, bill_deleted, bills_imported,
+    member_joined, balances_changed and room_deleted, each carrying ids
+    only; refetch (or /sync) what changed. resync means events were missed.
+    Membership is checked once, when subscribing.
+    """
+    require_membership(db, room_id, current_user)
+    
+    async def event_stream():
+        async for event in event_service.stream(room_id):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield sse_event(event["type"], event)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.delete("/{room_id}")
 async def delete_room(
     room_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a room (only creator can delete)"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = db.query(Room.id, Room.created_by).filter(Room.id == room_id).first()
     
     if not room:
         raise HTTPException(
@@ -240,7 +310,18 @@ async def delete_room(
             detail="Only room creator can delete the room"
         )
     
-    db.delete(room)
+    # Memberships, bills and items go with the room via ON DELETE CASCADE,
+    # so nothing is loaded into the session. Image references are released
+    # for the whole room at once and unreferenced objects deleted in batches
+    unreferenced = image_ref_service.release_bills(db, Bill.room_id == room_id)
+    image_cleanup_service.enqueue_images(db, unreferenced)
+    sync_service.record_room_deleted(db, room_id)
+    event_service.publish(db, room_id, "room_deleted")
+    db.execute(delete(Room).where(Room.id == room_id))
     db.commit()
     
+    background_tasks.add_task(report_service.evict_room, room_id)
+    if unreferenced:
+        background_tasks.add_task(image_cleanup_service.run_in_background)
+    
     return {"message": "Room deleted successfully"}
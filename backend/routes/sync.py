@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query
+
+from models.user import User
+from schemas import SyncResponse
+from core.security import get_current_user
+from services.sync_service import sync_service
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get rooms, members, bills and items changed since the last sync
+    Start with since=0 for everything, then pass back the returned cursor.
+    Items may repeat across syncs; apply them as upserts. Deleted rooms,
+    bills and items are listed in ``deleted``.
+    """
+    return sync_service.changes(current_user.id, since)
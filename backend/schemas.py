@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -49,42 +49,192 @@ class RoomWithMembers(RoomResponse):
 
 
 # Bill Schemas
+class ItemShare(BaseModel):
+    user_id: int
+    weight: float = Field(1.0, gt=0)  # Relative to the item's other shares, e.g. 2:1 or percentages
+    
+    class Config:
+        from_attributes = True
+
+
 class BillItemCreate(BaseModel):
     description: str
     quantity: int = 1
     unit_price: float
     amount: float
-    shared_by: List[int]  # List of user IDs
+    shared_by: List[int] = []  # List of user IDs, split equally
+    shares: Optional[List[ItemShare]] = None  # Weighted split; takes precedence over shared_by
+    category: Optional[str] = None  # Assigned from merchant and description if omitted
 
 
 class BillItemResponse(BillItemCreate):
     id: int
     bill_id: int
+    shares: List[ItemShare] = []
+    category: str
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class BillItemUpdate(BaseModel):
+    description: Optional[str] = None
+    quantity: Optional[int] = None
+    unit_price: Optional[float] = None
+    amount: Optional[float] = None
+    shared_by: Optional[List[int]] = None
+    shares: Optional[List[ItemShare]] = None
+    category: Optional[str] = None  # Recategorized when only the description changes
+
+
+class ItemSharesUpdate(BaseModel):
+    shared_by: List[int] = []  # Equal split
+    shares: Optional[List[ItemShare]] = None  # Weighted split; takes precedence over shared_by
+
+
+class BillItemChange(BaseModel):
+    item: Optional[BillItemResponse] = None  # None when the item was removed
+    total_amount: float
+    balance_deltas: Dict[int, float]  # Net balance change per affected user
+
+
+class UserItemShare(BaseModel):
+    item_id: int
+    bill_id: int
+    description: str
+    amount: float
+    weight: float
+    share_amount: float  # This user's part of amount
+
+
 class BillCreate(BaseModel):
     room_id: int
     image_url: str
     total_amount: float
 
 
-class BillResponse(BaseModel):
+class BillBase(BaseModel):
     id: int
     room_id: int
     uploaded_by: int
     image_url: str
+    display_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    merchant_name: Optional[str] = None
     total_amount: float
+    is_draft: bool = False
     created_at: datetime
-    items: List[BillItemResponse] = []
     
     class Config:
         from_attributes = True
 
 
+class BillResponse(BillBase):
+    items: List[BillItemResponse] = []
+
+
+class FeedBill(BillResponse):
+    room_name: str
+
+
+class BillFeedPage(BaseModel):
+    bills: List[FeedBill]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; None on the last page
+
+
+class SearchResult(BaseModel):
+    item_id: int
+    bill_id: int
+    room_id: int
+    room_name: str
+    description: str
+    amount: float
+    category: str
+    merchant_name: Optional[str] = None
+    created_at: datetime
+    score: float  # Relevance; higher is better
+
+
+class SearchPage(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int] = None  # Pass as ?offset= for the next page; None on the last page
+
+
+class PresignedUploadRequest(BaseModel):
+    room_id: int
+    filename: str
+    content_type: str
+    size: int
+
+
+class PresignedUploadResponse(BaseModel):
+    url: str
+    fields: Dict[str, str]
+    key: str
+    expires_in: int
+
+
+class UploadConfirmRequest(BaseModel):
+    room_id: int
+    key: str
+
+
+class BulkImportFailure(BaseModel):
+    filename: str
+    stage: str
+    error: str
+
+
+class StageThroughput(BaseModel):
+    stage: str
+    concurrency: int
+    processed: int
+    failed: int
+    busy_seconds: float
+    wall_seconds: float
+    items_per_second: float
+
+
+class BulkImportResponse(BaseModel):
+    bills: List[BillResponse]  # Draft bills still in the room
+    failures: List[BulkImportFailure]
+    stages: List[StageThroughput]
+    total_seconds: float
+
+
+class ImportJobCreated(BaseModel):
+    job_id: int
+    status: str
+
+
+class ImportJobResponse(BaseModel):
+    id: int
+    room_id: Optional[int] = None
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    result: Optional[BulkImportResponse] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class LedgerImportError(BaseModel):
+    line: int  # CSV line number, 1 = header
+    error: str
+
+
+class LedgerImportResponse(BaseModel):
+    dry_run: bool
+    rows: int
+    bills: int
+    items: int
+    shares: int
+    errors: List[LedgerImportError]
+    error_count: int
+    seconds: float
+
+
 # Auth Schemas
 class GoogleAuthRequest(BaseModel):
     token: str
@@ -111,6 +261,82 @@ class ParsedBillResponse(BaseModel):
     date: Optional[str] = None
 
 
+class DerivativeStats(BaseModel):
+    original_bytes: int
+    display_bytes: int
+    thumbnail_bytes: int
+    display_savings: float
+    render_seconds: float
+    total_seconds: float
+    deduplicated: bool = False
+
+
+class ImageUploadResponse(BaseModel):
+    image_url: str
+    display_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    derivatives: Optional[DerivativeStats] = None
+    message: str = "Image uploaded successfully"
+
+
+class UploadAndParseResponse(ImageUploadResponse):
+    parsed: ParsedBillResponse
+
+
+class ParseJobCreated(BaseModel):
+    job_id: int
+    status: str
+
+
+class ParseJobResponse(BaseModel):
+    id: int
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    result: Optional[ParsedBillResponse] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ParseQueueMetrics(BaseModel):
+    pending: int
+    running: int
+    succeeded: int
+    failed: int
+    oldest_pending_age_seconds: float
+
+
+class EventStreamMetrics(BaseModel):
+    backend: str
+    connections: int
+    rooms: int  # Rooms with at least one subscriber
+    events_delivered: int
+    subscribers_dropped: int  # Told to resync after falling behind
+    fanout_latency_p50_ms: float
+    fanout_latency_p95_ms: float
+    fanout_latency_max_ms: float
+
+
+class EncodingMetrics(BaseModel):
+    encoding: str  # br or gzip
+    responses: int
+    bytes_in: int
+    bytes_out: int
+    bytes_saved: int
+    ratio: float  # bytes_out / bytes_in
+    cpu_seconds: float
+    cpu_ms_per_mb: float  # Compression CPU per MB of uncompressed body
+    offloaded_chunks: int  # Compressed in a worker thread
+
+
+class CompressionMetrics(BaseModel):
+    encodings: List[EncodingMetrics]
+    below_minimum: int  # Responses sent uncompressed for being under the size threshold
+
+
 # Report Schemas
 class DebtTransaction(BaseModel):
     from_user_id: int
@@ -143,3 +369,41 @@ class CategoryExpense(BaseModel):
 
 class RoomReport(RoomSummary):
     category_breakdown: List[CategoryExpense]
+
+
+# Delta sync Schemas
+class SyncRoom(BaseModel):
+    id: int
+    name: str
+    secret: str
+    created_by: int
+    created_at: datetime
+    version: int  # Changes with balances; refetch the summary when it does
+    
+    class Config:
+        from_attributes = True
+
+
+class SyncMember(BaseModel):
+    id: int  # Membership id
+    room_id: int
+    user_id: int
+    name: str
+    email: str
+    avatar: Optional[str] = None
+    joined_at: datetime
+
+
+class SyncTombstoneResponse(BaseModel):
+    entity: str  # room, bill or bill_item
+    entity_id: int
+    room_id: int
+
+
+class SyncResponse(BaseModel):
+    cursor: int  # Pass as ?since= on the next sync
+    rooms: List[SyncRoom]
+    members: List[SyncMember]
+    bills: List[BillBase]
+    items: List[BillItemResponse]
+    deleted: List[SyncTombstoneResponse]
@@ -0,0 +1,155 @@
+"""
+Balance Service
+Keeps per-room running totals of what each user paid and owes, updated
+by deltas so a bill or item change touches only the users it affects
+"""
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.bill import Bill, BillItem, BillItemShare
+from models.room import Membership
+from models.room_balance import RoomBalance
+
+
+class BalanceService:
+    @staticmethod
+    def split(amount: float, weights: Dict[int, float]) -> Dict[int, float]:
+        """Each user's part of ``amount`` in proportion to their weight"""
+        total_weight = sum(weights.values())
+        if total_weight <= 0:
+            return {}
+        return {user_id: amount * weight / total_weight for user_id, weight in weights.items()}
+
+    @staticmethod
+    def apply(
+        db: Session,
+        room_id: int,
+        paid: Optional[Dict[int, float]] = None,
+        owed: Optional[Dict[int, float]] = None
+    ) -> Dict[int, float]:
+        """
+        Add paid/owed deltas to a room's running totals
+
+        One upsert covers every affected user; rows are incremented in
+        place, so concurrent deltas for the same user don't overwrite
+        each other.
+
+        Args:
+            db: Database session (the caller commits)
+            room_id: Room the deltas belong to
+            paid: Change in amount paid per user
+            owed: Change in amount owed per user
+
+        Returns:
+            Net balance change per affected user (paid minus owed)
+        """
+        paid = paid or {}
+        owed = owed or {}
+        rows = [
+            {
+                "room_id": room_id,
+                "user_id": user_id,
+                "paid": paid.get(user_id, 0.0),
+                "owed": owed.get(user_id, 0.0)
+            }
+            for user_id in sorted(paid.keys() | owed.keys())
+            if paid.get(user_id, 0.0) or owed.get(user_id, 0.0)
+        ]
+        if not rows:
+            return {}
+
+        statement = insert(RoomBalance)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[RoomBalance.room_id, RoomBalance.user_id],
+                set_={
+                    "paid": RoomBalance.paid + statement.excluded.paid,
+                    "owed": RoomBalance.owed + statement.excluded.owed
+                }
+            ),
+            rows
+        )
+        return {row["user_id"]: row["paid"] - row["owed"] for row in rows}
+
+    @staticmethod
+    def bill_owed(db: Session, *criteria) -> Dict[int, float]:
+        """Amount owed per user across the items of bills matching ``criteria``"""
+        item_weights = (
+            select(BillItemShare.item_id, func.sum(BillItemShare.weight).label("total_weight"))
+            .join(BillItem, BillItem.id == BillItemShare.item_id)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(*criteria)
+            .group_by(BillItemShare.item_id)
+            .subquery()
+        )
+        return dict(db.execute(
+            select(
+                BillItemShare.user_id,
+                func.sum(BillItem.amount * BillItemShare.weight / item_weights.c.total_weight)
+            )
+            .join(item_weights, item_weights.c.item_id == BillItemShare.item_id)
+            .join(BillItem, BillItem.id == BillItemShare.item_id)
+            .group_by(BillItemShare.user_id)
+        ).all())
+
+    def apply_bill(self, db: Session, bill: Bill, sign: int = 1) -> Dict[int, float]:
+        """
+        Add (sign=1) or remove (sign=-1) a finalized bill's contribution
+
+        Call after the bill's items are written, or before they are deleted.
+        """
+        if bill.is_draft:
+            return {}
+        owed = self.bill_owed(db, Bill.id == bill.id)
+        return self.apply(
+            db,
+            bill.room_id,
+            paid={bill.uploaded_by: sign * (bill.total_amount or 0.0)},
+            owed={user_id: sign * amount for user_id, amount in owed.items()}
+        )
+
+    def totals(self, db: Session, room_id: int) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """
+        Paid and owed totals for a room
+
+        Current members always appear; shares of users who have left the
+        room are not charged, but what they paid still counts.
+        """
+        member_ids = db.scalars(
+            select(Membership.user_id).where(Membership.room_id == room_id)
+        ).all()
+        paid = {user_id: 0.0 for user_id in member_ids}
+        owed = {user_id: 0.0 for user_id in member_ids}
+
+        for row in db.execute(
+            select(RoomBalance.user_id, RoomBalance.paid, RoomBalance.owed)
+            .where(RoomBalance.room_id == room_id)
+        ):
+            if row.paid or row.user_id in paid:
+                paid[row.user_id] = row.paid
+            if row.user_id in owed:
+                owed[row.user_id] = row.owed
+
+        return paid, owed
+
+    def rebuild(self, db: Session, room_ids: Iterable[int]) -> None:
+        """Recompute running totals from bills and shares (backfill and repair)"""
+        for room_id in room_ids:
+            room_bills = (Bill.room_id == room_id, Bill.is_draft == False)
+            paid = {
+                user_id: amount or 0.0
+                for user_id, amount in db.execute(
+                    select(Bill.uploaded_by, func.sum(Bill.total_amount))
+                    .where(*room_bills)
+                    .group_by(Bill.uploaded_by)
+                )
+            }
+            owed = self.bill_owed(db, *room_bills)
+
+            db.execute(delete(RoomBalance).where(RoomBalance.room_id == room_id))
+            self.apply(db, room_id, paid=paid, owed=owed)
+
+
+# Singleton instance
+balance_service = BalanceService()
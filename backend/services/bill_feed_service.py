@@ -0,0 +1,90 @@
+"""
+Bill Feed Service
+The current user's bills across every room they belong to, newest first,
+in keyset-paginated pages: one query for the page and one batch load for
+its items, however many rooms the user is in.
+"""
+import base64
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from models.bill import Bill
+from models.room import Membership
+from schemas import BillFeedPage, FeedBill
+
+# bills.id is a 32-bit integer column
+MAX_BILL_ID = 2 ** 31 - 1
+
+
+class BillFeedService:
+    @staticmethod
+    def encode_cursor(created_at: datetime, bill_id: int) -> str:
+        """Opaque cursor pointing just past the given bill"""
+        raw = f"{created_at.isoformat()}|{bill_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Raises ValueError for a cursor not made by encode_cursor"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, bill_id = raw.split("|")
+            created_at, bill_id = datetime.fromisoformat(created_at), int(bill_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Invalid cursor") from e
+        # Anything else would fail in the database rather than here
+        if created_at.tzinfo is not None or not 0 < bill_id <= MAX_BILL_ID:
+            raise ValueError("Invalid cursor")
+        return created_at, bill_id
+
+    def page(
+        self,
+        db: Session,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        room_id: Optional[int] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> BillFeedPage:
+        """
+        One page of the user's bills, ordered by (created_at, id) descending
+
+        Args:
+            db: Database session
+            user_id: Whose rooms to read; rooms they are not in are never matched
+            limit: Bills per page
+            cursor: next_cursor of the previous page
+            room_id: Only this room
+            start: Only bills created on or after this day
+            end: Only bills created on or before this day
+        """
+        query = (
+            select(Bill)
+            .join(Membership, (Membership.room_id == Bill.room_id) & (Membership.user_id == user_id))
+            .join(Bill.room)
+            .where(Bill.is_draft == False)  # Imported bills join the feed once their shares are assigned
+            .options(contains_eager(Bill.room), selectinload(Bill.items))
+            .order_by(Bill.created_at.desc(), Bill.id.desc())
+            .limit(limit + 1)  # One extra row tells whether there is a next page
+        )
+        if cursor:
+            query = query.where(tuple_(Bill.created_at, Bill.id) < tuple_(*self.decode_cursor(cursor)))
+        if room_id is not None:
+            query = query.where(Bill.room_id == room_id)
+        if start:
+            query = query.where(Bill.created_at >= datetime.combine(start, datetime.min.time()))
+        if end:
+            query = query.where(Bill.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+        bills = db.scalars(query).all()
+        next_cursor = None
+        if len(bills) > limit:
+            bills = bills[:limit]
+            next_cursor = self.encode_cursor(bills[-1].created_at, bills[-1].id)
+        return BillFeedPage(bills=[FeedBill.model_validate(bill) for bill in bills], next_cursor=next_cursor)
+
+
+# Singleton instance
+bill_feed_service = BillFeedService()
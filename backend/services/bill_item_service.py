@@ -0,0 +1,280 @@
+"""
+Bill Item Service
+Writes bill items with their shares in bulk, edits single items with
+incremental balance deltas, and answers per-user share queries through
+the bill_item_shares indexes
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from models.bill import Bill, BillItem, BillItemShare
+from models.room import Membership
+from schemas import BillItemCreate, BillItemUpdate
+from services.balance_service import balance_service
+from services.categorizer_service import categorizer_service
+from services.rollup_service import rollup_service
+from services.room_version_service import room_version_service
+from services.sync_service import sync_service
+
+
+class BillItemService:
+    @staticmethod
+    def share_weights(item: Any) -> Optional[Dict[int, float]]:
+        """
+        Weight per user: explicit shares, else an equal split over shared_by
+
+        Returns None if the item (e.g. a partial update) sets neither.
+        """
+        if item.shares is not None:
+            weights: Dict[int, float] = {}
+            for share in item.shares:
+                weights[share.user_id] = weights.get(share.user_id, 0.0) + share.weight
+            return weights
+        if item.shared_by is not None:
+            return {user_id: 1.0 for user_id in item.shared_by}
+        return None
+
+    def validate_members(self, db: Session, room_id: int, items: Iterable[Any]) -> None:
+        """
+        Check that every user an item is shared with belongs to the room
+
+        Raises:
+            ValueError: if a share names a non-member
+        """
+        user_ids = {user_id for item in items for user_id in (self.share_weights(item) or {})}
+        if not user_ids:
+            return
+
+        members = set(db.scalars(
+            select(Membership.user_id).where(
+                Membership.room_id == room_id,
+                Membership.user_id.in_(user_ids)
+            )
+        ))
+        missing = user_ids - members
+        if missing:
+            raise ValueError(f"Users {sorted(missing)} are not members of this room")
+
+    def insert_items(
+        self,
+        db: Session,
+        bill_id: int,
+        items: List[BillItemCreate],
+        merchant_name: Optional[str] = None
+    ) -> List[int]:
+        """
+        Insert a bill's items and their shares with one statement each
+
+        Args:
+            db: Database session (the caller commits)
+            bill_id: Bill the items belong to
+            items: Items to insert
+            merchant_name: Bill's merchant, used to categorize the items
+
+        Returns:
+            IDs of the inserted items, in the order given
+        """
+        if not items:
+            return []
+
+        item_ids = list(db.scalars(
+            insert(BillItem).returning(BillItem.id, sort_by_parameter_order=True),
+            [
+                {
+                    "bill_id": bill_id,
+                    "description": item.description,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "amount": item.amount,
+                    "category": categorizer_service.resolve(item.category, item.description, merchant_name)
+                }
+                for item in items
+            ]
+        ))
+
+        share_rows = [
+            {"item_id": item_id, "user_id": user_id, "weight": weight}
+            for item_id, item in zip(item_ids, items)
+            for user_id, weight in (self.share_weights(item) or {}).items()
+        ]
+        if share_rows:
+            db.execute(insert(BillItemShare), share_rows)
+
+        return item_ids
+
+    def add_item(self, db: Session, bill: Bill, item: BillItemCreate) -> Tuple[BillItem, Dict[int, float]]:
+        """
+        Add one item to a bill
+
+        Args:
+            db: Database session (the caller commits)
+            bill: Bill, locked by the caller
+            item: Item to add
+
+        Returns:
+            The new item and the net balance change per affected user
+        """
+        item_id, = self.insert_items(db, bill.id, [item], bill.merchant_name)
+        new_item = db.get(BillItem, item_id)
+        bill.total_amount = (bill.total_amount or 0.0) + item.amount
+        deltas = self._apply_change(
+            db, bill, (new_item.category, 0.0, {}), (new_item.category, item.amount, self.share_weights(item) or {})
+        )
+        return new_item, deltas
+
+    def update_item(self, db: Session, bill: Bill, item: BillItem, changes: BillItemUpdate) -> Dict[int, float]:
+        """
+        Apply a partial update to one item
+
+        Changing quantity or unit price without an amount recomputes the
+        amount, and changing the description without a category
+        recategorizes the item. Only the item's old and new sharers are
+        touched.
+
+        Returns:
+            Net balance change per affected user
+        """
+        old = (item.category, item.amount, self.current_weights(item))
+
+        for field in ("description", "quantity", "unit_price", "amount"):
+            value = getattr(changes, field)
+            if value is not None:
+                setattr(item, field, value)
+        if changes.amount is None and (changes.quantity is not None or changes.unit_price is not None):
+            item.amount = round(item.quantity * item.unit_price, 2)
+        if changes.category is not None or changes.description is not None:
+            item.category = categorizer_service.resolve(changes.category, item.description, bill.merchant_name)
+
+        weights = self.share_weights(changes)
+        if weights is not None:
+            self._replace_shares(db, item, weights)
+
+        bill.total_amount = (bill.total_amount or 0.0) + item.amount - old[1]
+        return self._apply_change(
+            db, bill, old, (item.category, item.amount, weights if weights is not None else old[2])
+        )
+
+    def set_shares(self, db: Session, bill: Bill, item: BillItem, weights: Dict[int, float]) -> Dict[int, float]:
+        """
+        Replace who shares one item
+
+        Returns:
+            Net balance change per affected user
+        """
+        old_weights = self.current_weights(item)
+        self._replace_shares(db, item, weights)
+        return self._apply_change(
+            db, bill, (item.category, item.amount, old_weights), (item.category, item.amount, weights)
+        )
+
+    def remove_item(self, db: Session, bill: Bill, item: BillItem) -> Dict[int, float]:
+        """
+        Remove one item from a bill
+
+        Returns:
+            Net balance change per affected user
+        """
+        old = (item.category, item.amount, self.current_weights(item))
+        # Shares go with the item via ON DELETE CASCADE
+        db.execute(delete(BillItem).where(BillItem.id == item.id))
+        sync_service.record_deleted(db, "bill_item", bill.room_id, [item.id])
+        db.expunge(item)
+        bill.total_amount = (bill.total_amount or 0.0) - old[1]
+        return self._apply_change(db, bill, old, (item.category, 0.0, {}))
+
+    @staticmethod
+    def current_weights(item: BillItem) -> Dict[int, float]:
+        return {share.user_id: share.weight for share in item.shares}
+
+    @staticmethod
+    def _replace_shares(db: Session, item: BillItem, weights: Dict[int, float]) -> None:
+        db.execute(delete(BillItemShare).where(BillItemShare.item_id == item.id))
+        if weights:
+            db.execute(insert(BillItemShare), [
+                {"item_id": item.id, "user_id": user_id, "weight": weight}
+                for user_id, weight in weights.items()
+            ])
+        sync_service.touch_item(db, item.id)
+        db.expire(item, ["shares"])
+
+    @staticmethod
+    def _apply_change(
+        db: Session,
+        bill: Bill,
+        old: Tuple[str, float, Dict[int, float]],
+        new: Tuple[str, float, Dict[int, float]]
+    ) -> Dict[int, float]:
+        """Apply the difference between an item's old and new (category, amount, weights)"""
+        if bill.is_draft:
+            # Drafts are not part of balances until finalized
+            return {}
+
+        room_version_service.bump(db, bill.room_id)
+
+        old_category, old_amount, old_weights = old
+        new_category, new_amount, new_weights = new
+        rollup_service.apply_items(db, bill, [
+            (old_category, -old_amount, old_weights),
+            (new_category, new_amount, new_weights)
+        ])
+
+        old_owed = balance_service.split(old_amount, old_weights)
+        new_owed = balance_service.split(new_amount, new_weights)
+        return balance_service.apply(
+            db,
+            bill.room_id,
+            paid={bill.uploaded_by: new_amount - old_amount},
+            owed={
+                user_id: new_owed.get(user_id, 0.0) - old_owed.get(user_id, 0.0)
+                for user_id in old_owed.keys() | new_owed.keys()
+            }
+        )
+
+    @staticmethod
+    def items_for_user(db: Session, room_id: int, user_id: int) -> List[Dict]:
+        """
+        Items in a room's finalized bills that include ``user_id``
+
+        Starts from the user's shares (ix_bill_item_shares_user_id_item_id)
+        rather than scanning the room's items.
+        """
+        total_weight = (
+            select(func.sum(BillItemShare.weight))
+            .where(BillItemShare.item_id == BillItem.id)
+            .correlate(BillItem)
+            .scalar_subquery()
+        )
+        rows = db.execute(
+            select(
+                BillItem.id,
+                BillItem.bill_id,
+                BillItem.description,
+                BillItem.amount,
+                BillItemShare.weight,
+                (BillItem.amount * BillItemShare.weight / total_weight).label("share_amount")
+            )
+            .join(BillItem, BillItem.id == BillItemShare.item_id)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(
+                BillItemShare.user_id == user_id,
+                Bill.room_id == room_id,
+                Bill.is_draft == False
+            )
+            .order_by(Bill.created_at.desc(), BillItem.id)
+        ).all()
+
+        return [
+            {
+                "item_id": row.id,
+                "bill_id": row.bill_id,
+                "description": row.description,
+                "amount": row.amount,
+                "weight": row.weight,
+                "share_amount": round(row.share_amount, 2)
+            }
+            for row in rows
+        ]
+
+
+# Singleton instance
+bill_item_service = BillItemService()
@@ -0,0 +1,117 @@
+"""
+Incremental JSON parser for streamed LLM bill completions
+Emits top-level fields and individual line items as soon as they are complete
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalBillParser:
+    """
+    Consumes a bill JSON document in arbitrary text chunks.
+
+    The parser only tracks enough structure to know when a top-level
+    scalar value or an object inside the top-level "items" array has been
+    closed; the completed slice is then decoded with ``json.loads``.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Feed a chunk of the completion
+
+        Args:
+            chunk: Next piece of streamed text
+
+        Returns:
+            List of ("field", (key, value)) and ("item", dict) events
+        """
+        self.buffer += chunk
+        events: List[Tuple[str, Any]] = []
+
+        while self._pos < len(self.buffer):
+            i = self._pos
+            ch = self.buffer[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = json.loads(self.buffer[self._string_start:i + 1])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._mark_value_start(i)
+            elif ch in "{[":
+                self._mark_value_start(i)
+                if ch == "{" and self._in_items_array():
+                    self._item_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if ch == "}" and len(self._stack) == 3 and self._item_start is not None:
+                    item = json.loads(self.buffer[self._item_start:i + 1])
+                    if isinstance(item, dict):
+                        events.append(("item", item))
+                    self._item_start = None
+                if len(self._stack) == 1:
+                    self._close_field(i, events)
+                if self._stack:
+                    self._stack.pop()
+            elif len(self._stack) == 1:
+                if ch == ":":
+                    self._current_key = self._last_string
+                    self._value_start = None
+                elif ch == ",":
+                    self._close_field(i, events)
+                elif not ch.isspace():
+                    self._mark_value_start(i)
+
+        return events
+
+    def result(self) -> Dict[str, Any]:
+        """Decode the complete document once the stream has finished"""
+        return json.loads(self.buffer)
+
+    def _in_items_array(self) -> bool:
+        return (
+            len(self._stack) == 2
+            and self._stack[-1] == "["
+            and self._current_key == "items"
+        )
+
+    def _mark_value_start(self, index: int) -> None:
+        if len(self._stack) == 1 and self._current_key is not None and self._value_start is None:
+            self._value_start = index
+
+    def _close_field(self, end: int, events: List[Tuple[str, Any]]) -> None:
+        """Emit the pending top-level field ending just before ``end``"""
+        if self._current_key is None or self._value_start is None:
+            return
+        raw = self.buffer[self._value_start:end].strip()
+        key = self._current_key
+        self._current_key = None
+        self._value_start = None
+        if key == "items" or not raw or raw[0] in "{[":
+            return
+        try:
+            events.append(("field", (key, json.loads(raw))))
+        except ValueError:
+            pass
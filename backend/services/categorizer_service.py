@@ -0,0 +1,144 @@
+"""
+Categorizer Service
+Assigns spending categories to bill items from merchant and description
+keywords. Rules are compiled once into a phrase index and lookups are
+cached, so categorizing a bill costs a few dict probes per item.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+from core.config import settings
+
+DEFAULT_CATEGORY = "Other"
+
+# Maximum length of a user-supplied category
+MAX_CATEGORY_LENGTH = 50
+
+# A merchant match classifies every item on the bill
+MERCHANT_RULES: Dict[str, Tuple[str, ...]] = {
+    "Groceries": (
+        "supermarket", "grocery", "groceries", "hypermarket", "walmart", "costco", "aldi",
+        "lidl", "tesco", "kroger", "safeway", "whole foods", "trader joe's", "bigbasket",
+        "dmart", "reliance fresh", "more retail", "sainsbury's", "carrefour"
+    ),
+    "Dining": (
+        "restaurant", "cafe", "café", "coffee", "starbucks", "mcdonald's", "burger king",
+        "kfc", "subway", "domino's", "pizza hut", "pub", "bistro", "diner", "bakery",
+        "brewery", "swiggy", "zomato", "doordash", "uber eats", "deliveroo"
+    ),
+    "Transport": (
+        "uber", "lyft", "ola", "taxi", "metro", "railway", "railways", "shell", "chevron",
+        "petrol pump", "fuel station", "gas station", "parking"
+    ),
+    "Utilities": (
+        "electricity", "power", "water board", "comcast", "verizon", "at&t", "airtel",
+        "jio", "vodafone", "broadband"
+    ),
+    "Entertainment": (
+        "cinema", "cinemas", "theatre", "theater", "multiplex", "pvr", "inox", "amc",
+        "netflix", "spotify", "bowling"
+    ),
+    "Health": ("pharmacy", "chemist", "cvs", "walgreens", "clinic", "hospital", "medical"),
+    "Travel": ("hotel", "airbnb", "airlines", "airways", "expedia", "booking.com", "hostel", "resort"),
+    "Shopping": ("amazon", "ikea", "target", "mall", "decathlon", "h&m", "zara", "flipkart", "uniqlo"),
+}
+
+# Used when the merchant doesn't decide; longer phrases win over their words
+DESCRIPTION_RULES: Dict[str, Tuple[str, ...]] = {
+    "Groceries": (
+        "milk", "bread", "egg", "eggs", "rice", "flour", "atta", "sugar", "salt", "butter",
+        "cheese", "paneer", "yogurt", "curd", "vegetables", "veg", "fruit", "fruits",
+        "apple", "apples", "banana", "bananas", "onion", "onions", "potato", "potatoes",
+        "tomato", "tomatoes", "oil", "cereal", "oats", "dal", "lentils", "cooking gas"
+    ),
+    "Dining": (
+        "pizza", "burger", "fries", "sandwich", "coffee", "latte", "cappuccino", "espresso",
+        "tea", "chai", "beer", "wine", "cocktail", "dessert", "starter", "starters",
+        "entree", "main course", "meal", "lunch", "dinner", "breakfast", "brunch",
+        "biryani", "noodles", "pasta", "sushi", "tip", "service charge", "cover charge"
+    ),
+    "Transport": (
+        "fuel", "petrol", "diesel", "gas", "taxi", "cab", "ride", "fare", "toll", "parking",
+        "bus", "train", "metro", "metro card", "auto"
+    ),
+    "Utilities": (
+        "electricity", "water bill", "internet", "wifi", "wi-fi", "broadband", "phone bill",
+        "mobile recharge", "recharge", "gas bill", "cylinder"
+    ),
+    "Rent": ("rent", "lease", "security deposit", "maintenance charge", "society maintenance"),
+    "Entertainment": (
+        "movie", "movies", "cinema", "ticket", "tickets", "concert", "netflix", "spotify",
+        "subscription", "game", "games", "popcorn"
+    ),
+    "Health": ("medicine", "medicines", "tablets", "syrup", "doctor", "consultation", "vitamins"),
+    "Travel": ("hotel", "flight", "airfare", "room night", "luggage", "visa", "train ticket", "bus ticket"),
+    "Household": (
+        "soap", "shampoo", "detergent", "toilet paper", "tissues", "cleaner", "broom",
+        "bulb", "batteries", "kitchen roll", "trash bags", "garbage bags", "dishwash"
+    ),
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['.&-][a-z0-9]+)*")
+
+PhraseIndex = Dict[Tuple[str, ...], str]
+
+
+def _tokens(text: str) -> Tuple[str, ...]:
+    return tuple(_TOKEN.findall(text.lower()))
+
+
+def _build_index(rules: Dict[str, Iterable[str]]) -> Tuple[PhraseIndex, int]:
+    """Phrase (as a token tuple) -> category, plus the longest phrase length"""
+    index: PhraseIndex = {}
+    for category, phrases in rules.items():
+        for phrase in phrases:
+            # First rule listed wins if two categories claim a phrase
+            index.setdefault(_tokens(phrase), category)
+    return index, max((len(phrase) for phrase in index), default=0)
+
+
+def _match(tokens: Tuple[str, ...], index: PhraseIndex, longest: int) -> Optional[str]:
+    """Category of the longest phrase in ``tokens``, leftmost first"""
+    for length in range(min(longest, len(tokens)), 0, -1):
+        for start in range(len(tokens) - length + 1):
+            category = index.get(tokens[start:start + length])
+            if category:
+                return category
+    return None
+
+
+class CategorizerService:
+    def __init__(
+        self,
+        merchant_rules: Dict[str, Iterable[str]] = MERCHANT_RULES,
+        description_rules: Dict[str, Iterable[str]] = DESCRIPTION_RULES
+    ):
+        self.merchant_index, self.merchant_longest = _build_index(merchant_rules)
+        self.description_index, self.description_longest = _build_index(description_rules)
+        self.categories = sorted(set(merchant_rules) | set(description_rules) | {DEFAULT_CATEGORY})
+        # Receipts repeat the same merchants and line items over and over
+        self._lookup = lru_cache(maxsize=settings.CATEGORIZER_CACHE_SIZE)(self._categorize)
+
+    def categorize(self, description: str, merchant_name: Optional[str] = None) -> str:
+        """Category for an item, from its bill's merchant or else its description"""
+        return self._lookup(description.strip().lower(), (merchant_name or "").strip().lower())
+
+    def resolve(self, category: Optional[str], description: str, merchant_name: Optional[str] = None) -> str:
+        """A user-chosen category if given, otherwise the categorized one"""
+        if category and category.strip():
+            return category.strip()[:MAX_CATEGORY_LENGTH]
+        return self.categorize(description, merchant_name)
+
+    def _categorize(self, description: str, merchant_name: str) -> str:
+        if merchant_name:
+            category = _match(_tokens(merchant_name), self.merchant_index, self.merchant_longest)
+            if category:
+                return category
+        return (
+            _match(_tokens(description), self.description_index, self.description_longest)
+            or DEFAULT_CATEGORY
+        )
+
+
+# Singleton instance
+categorizer_service = CategorizerService()
@@ -0,0 +1,176 @@
+"""
+Event backends for room event streams
+EventService keeps the subscribers; a backend only carries published events
+to every API process. In-process delivery suits a single worker; PostgreSQL
+LISTEN/NOTIFY fans out across workers and hosts without another service.
+"""
+import asyncio
+import logging
+from typing import Callable, List, Optional
+import psycopg2.extensions
+from sqlalchemy import func, select
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from core.config import settings
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# pg_notify payloads are limited to 8000 bytes
+MAX_NOTIFY_PAYLOAD_BYTES = 8000
+
+# Events published in a session but not committed yet
+_PENDING_KEY = "pending_room_events"
+
+# Delivered after the listener reconnects: events may have been missed
+RESYNC_PAYLOAD = '{"type": "resync"}'
+
+
+class EventBackend:
+    """Base class for event transports"""
+
+    name = "base"
+
+    def __init__(self):
+        self.deliver: Optional[Callable[[str], None]] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        """Begin delivering every published payload to ``deliver`` on this loop"""
+        self.deliver = deliver
+        self.loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self.deliver = None
+
+    def publish(self, db: Session, payload: str) -> None:
+        """Send ``payload`` if and when ``db``'s transaction commits"""
+        raise NotImplementedError
+
+    def _deliver_threadsafe(self, payloads: List[str]) -> None:
+        if self.deliver is None or self.loop is None or self.loop.is_closed():
+            return
+        for payload in payloads:
+            self.loop.call_soon_threadsafe(self.deliver, payload)
+
+
+class InProcessEventBackend(EventBackend):
+    """Delivers to subscribers of this process only; for single-worker deployments"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        sa_event.listen(Session, "after_commit", self._after_commit)
+        sa_event.listen(Session, "after_rollback", self._after_rollback)
+
+    def publish(self, db: Session, payload: str) -> None:
+        db.info.setdefault(_PENDING_KEY, []).append(payload)
+
+    def _after_commit(self, session: Session) -> None:
+        payloads = session.info.pop(_PENDING_KEY, None)
+        if payloads:
+            self._deliver_threadsafe(payloads)
+
+    @staticmethod
+    def _after_rollback(session: Session) -> None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+class PostgresEventBackend(EventBackend):
+    """
+    PostgreSQL LISTEN/NOTIFY
+
+    Publishing is a pg_notify() in the caller's transaction, which the
+    server delivers on commit and drops on rollback. Each process listens
+    on one dedicated connection, read from the event loop without a thread,
+    and reconnects with backoff if it drops.
+    """
+
+    name = "postgres"
+
+    def __init__(self, engine: Engine, channel: str):
+        super().__init__()
+        self.engine = engine
+        self.channel = channel
+        self.connection = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, db: Session, payload: str) -> None:
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD_BYTES:
+            raise ValueError("Event payload too large for NOTIFY")
+        db.execute(select(func.pg_notify(self.channel, payload)))
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        await super().start(deliver)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._close()
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        reconnecting = False
+        while True:
+            try:
+                await asyncio.to_thread(self._connect)
+                delay = 1.0
+                if reconnecting and self.deliver:
+                    self.deliver(RESYNC_PAYLOAD)
+                reconnecting = True
+                readable = asyncio.Event()
+                self.loop.add_reader(self.connection.fileno(), readable.set)
+                try:
+                    while True:
+                        await readable.wait()
+                        readable.clear()
+                        self.connection.poll()
+                        while self.connection.notifies:
+                            notify = self.connection.notifies.pop(0)
+                            if self.deliver:
+                                self.deliver(notify.payload)
+                finally:
+                    self.loop.remove_reader(self.connection.fileno())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event listener connection lost (%s); reconnecting in %.0fs", e, delay)
+                self._close()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _connect(self) -> None:
+        self._close()
+        # Same connect arguments as the pool, but owned by the listener
+        pooled = self.engine.raw_connection()
+        pooled.detach()
+        connection = pooled.dbapi_connection
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        self.connection = connection
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+
+def build_event_backend() -> EventBackend:
+    """Event backend selected by EVENT_BACKEND"""
+    if settings.EVENT_BACKEND == "memory":
+        return InProcessEventBackend()
+    if settings.EVENT_BACKEND == "postgres":
+        return PostgresEventBackend(engine, settings.EVENT_CHANNEL)
+    raise ValueError(f"Unknown EVENT_BACKEND: {settings.EVENT_BACKEND}")
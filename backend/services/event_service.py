@@ -0,0 +1,139 @@
+"""
+Event Service
+Per-room event streams. Writers publish small events (what changed, not
+the data) inside the transaction that makes the change; the backend from
+EVENT_BACKEND carries them to every API process, and each process fans
+them out to its own subscribers. A subscriber that falls too far behind is
+told to resync and disconnected instead of being buffered without bound.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from sqlalchemy.orm import Session
+from core.config import settings
+from services.event_backends import build_event_backend
+
+# Fan-out latencies kept for the metrics percentiles
+LATENCY_SAMPLES = 1000
+
+
+class _Subscription:
+    def __init__(self, room_id: int):
+        self.room_id = room_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENT_SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class EventService:
+    def __init__(self):
+        self.backend = build_event_backend()
+        self.subscriptions: Dict[int, Set[_Subscription]] = defaultdict(set)
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self.events_delivered = 0
+        self.subscribers_dropped = 0
+
+    async def start(self) -> None:
+        await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    def publish(self, db: Session, room_id: int, event_type: str, **data: Any) -> None:
+        """
+        Publish a room event when ``db``'s transaction commits
+
+        Args:
+            db: Session making the change; nothing is sent if it rolls back
+            room_id: Room whose subscribers receive the event
+            event_type: e.g. bill_added, bill_deleted, member_joined, balances_changed
+            data: Small JSON-serializable details, such as ids
+        """
+        payload = {"type": event_type, "room_id": room_id, **data, "sent_at": time.time()}
+        self.backend.publish(db, json.dumps(payload, separators=(",", ":")))
+
+    def _deliver(self, payload: str) -> None:
+        """Hand one published event to this process's subscribers (on the event loop)"""
+        event = json.loads(payload)
+        sent_at = event.pop("sent_at", None)
+        if sent_at is not None:
+            self.latencies.append(max(time.time() - sent_at, 0.0))
+
+        room_id = event.get("room_id")
+        if room_id is None:
+            targets = [subscription for room in self.subscriptions.values() for subscription in room]
+        else:
+            targets = list(self.subscriptions.get(room_id, ()))
+
+        for subscription in targets:
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                self.events_delivered += 1
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+    async def stream(self, room_id: int) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Events of one room until the room is deleted or the caller stops
+
+        Yields None every EVENT_KEEPALIVE_SECONDS without events so the
+        caller can keep the connection alive. Membership is the caller's
+        job, checked once before subscribing.
+        """
+        subscription = _Subscription(room_id)
+        self.subscriptions[room_id].add(subscription)
+        try:
+            while True:
+                if subscription.overflowed and subscription.queue.empty():
+                    self.subscribers_dropped += 1
+                    yield {"type": "resync", "room_id": room_id}
+                    return
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.EVENT_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event["type"] == "room_deleted":
+                    return
+        finally:
+            room = self.subscriptions.get(room_id)
+            if room is not None:
+                room.discard(subscription)
+                if not room:
+                    del self.subscriptions[room_id]
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Connection counts and fan-out latency of this process
+
+        Latency runs from publish (before commit) to delivery into a
+        subscriber queue, so it includes the commit and, with the postgres
+        backend, the NOTIFY round trip.
+        """
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000
+
+        return {
+            "backend": self.backend.name,
+            "connections": sum(len(room) for room in self.subscriptions.values()),
+            "rooms": len(self.subscriptions),
+            "events_delivered": self.events_delivered,
+            "subscribers_dropped": self.subscribers_dropped,
+            "fanout_latency_p50_ms": percentile(0.5),
+            "fanout_latency_p95_ms": percentile(0.95),
+            "fanout_latency_max_ms": latencies[-1] * 1000 if latencies else 0.0
+        }
+
+
+# Singleton instance
+event_service = EventService()
@@ -0,0 +1,142 @@
+"""
+Export Service
+Streams a room's ledger as CSV or NDJSON, one row per bill item, straight
+from a server-side cursor. Rows are encoded a batch at a time, so memory
+stays flat however many items the room has.
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased
+from core.config import settings
+from database import SessionLocal
+from models.bill import Bill, BillItem, BillItemShare
+from models.user import User
+from services.ledger_import_service import NO_SHARERS
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",  # Starlette adds the utf-8 charset
+    "ndjson": "application/x-ndjson",
+}
+
+# Same headers the ledger importer expects, so an export can be imported elsewhere
+CSV_COLUMNS = [
+    "bill_ref", "date", "paid_by", "description", "quantity",
+    "unit_price", "amount", "shared_by", "weights", "merchant", "category"
+]
+
+
+class ExportService:
+    @staticmethod
+    def _ledger_query(room_id: int):
+        """Finalized items with their bill, payer and shares, oldest bill first"""
+        sharer = aliased(User)
+        shares = (
+            select(
+                func.array_agg(aggregate_order_by(BillItemShare.user_id, BillItemShare.user_id)).label("user_ids"),
+                func.array_agg(aggregate_order_by(sharer.email, BillItemShare.user_id)).label("emails"),
+                func.array_agg(aggregate_order_by(BillItemShare.weight, BillItemShare.user_id)).label("weights")
+            )
+            .join(sharer, sharer.id == BillItemShare.user_id)
+            .where(BillItemShare.item_id == BillItem.id)
+            .lateral("shares")
+        )
+        payer = aliased(User)
+        return (
+            select(
+                Bill.id.label("bill_id"),
+                Bill.created_at,
+                Bill.merchant_name,
+                Bill.uploaded_by,
+                payer.email.label("paid_by"),
+                BillItem.id.label("item_id"),
+                BillItem.description,
+                BillItem.quantity,
+                BillItem.unit_price,
+                BillItem.amount,
+                BillItem.category,
+                shares.c.user_ids,
+                shares.c.emails,
+                shares.c.weights
+            )
+            .select_from(BillItem)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .join(payer, payer.id == Bill.uploaded_by)
+            .join(shares, true())
+            .where(Bill.room_id == room_id, Bill.is_draft == False)
+            .order_by(Bill.created_at, Bill.id, BillItem.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+    def stream(self, room_id: int, export_format: str) -> Iterator[bytes]:
+        """
+        Encoded export, one chunk per batch of rows
+
+        Uses its own session: the response outlives the request's session,
+        and the single query reads one consistent snapshot.
+        """
+        encode = self._encode_csv if export_format == "csv" else self._encode_ndjson
+        db = SessionLocal()
+        try:
+            result = db.execute(self._ledger_query(room_id))
+            if export_format == "csv":
+                yield ",".join(CSV_COLUMNS).encode() + b"\r\n"
+            for batch in result.partitions():
+                yield encode(batch)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _encode_csv(rows: List[Any]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                row.bill_id,
+                row.created_at.isoformat() if row.created_at else "",
+                row.paid_by,
+                row.description,
+                row.quantity,
+                row.unit_price,
+                row.amount,
+                # Empty would import as shared by every member
+                ";".join(row.emails) if row.emails else NO_SHARERS,
+                ";".join(f"{weight:g}" for weight in row.weights or []),
+                row.merchant_name or "",
+                row.category
+            ])
+        return buffer.getvalue().encode()
+
+    @staticmethod
+    def _encode_ndjson(rows: List[Any]) -> bytes:
+        return "".join(
+            json.dumps(ExportService._ndjson_record(row), separators=(",", ":")) + "\n"
+            for row in rows
+        ).encode()
+
+    @staticmethod
+    def _ndjson_record(row: Any) -> Dict[str, Any]:
+        return {
+            "bill_id": row.bill_id,
+            "date": row.created_at.isoformat() if row.created_at else None,
+            "merchant": row.merchant_name,
+            "paid_by_id": row.uploaded_by,
+            "paid_by": row.paid_by,
+            "item_id": row.item_id,
+            "description": row.description,
+            "quantity": row.quantity,
+            "unit_price": row.unit_price,
+            "amount": row.amount,
+            "category": row.category,
+            "shares": [
+                {"user_id": user_id, "email": email, "weight": weight}
+                for user_id, email, weight in zip(row.user_ids or [], row.emails or [], row.weights or [])
+            ]
+        }
+
+
+# Singleton instance
+export_service = ExportService()
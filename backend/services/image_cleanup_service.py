@@ -0,0 +1,168 @@
+"""
+Image Cleanup Service
+Queues S3 objects of deleted bills and removes them with batched
+DeleteObjects calls outside the request, along with uploads whose
+reservation expired without a bill taking them up
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from core.config import settings
+from database import SessionLocal
+from models.image_cleanup import ImageCleanupTask
+from models.stored_image import StoredImage
+from services.storage_service import storage_service
+from services.image_ref_service import image_ref_service
+from services.image_service import image_service
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCleanupService:
+    def enqueue(self, db: Session, urls: Iterable[str]) -> int:
+        """
+        Queue stored images for deletion
+
+        Runs in the caller's transaction, so the objects are only queued if
+        the rows referencing them are actually deleted.
+
+        Args:
+            db: Database session
+            urls: Public URLs of the objects to delete
+
+        Returns:
+            Number of queued objects
+        """
+        # URLs outside this service's storage are not ours to delete
+        keys = {storage_service.key_from_url(url) for url in urls}
+        keys.discard(None)
+        if not keys:
+            return 0
+
+        now = datetime.utcnow()
+        db.execute(
+            insert(ImageCleanupTask),
+            [{"key": key, "attempts": 0, "available_at": now} for key in sorted(keys)]
+        )
+        return len(keys)
+
+    def enqueue_images(self, db: Session, image_urls: Iterable[str]) -> int:
+        """
+        Queue released bill images for deletion along with their derivatives
+
+        Each derivative task records its original's key, so the derivative
+        survives if the original is uploaded again before the queue drains.
+
+        Args:
+            db: Database session
+            image_urls: Public URLs of the originals to delete
+
+        Returns:
+            Number of queued objects
+        """
+        rows: List[Dict[str, str]] = []
+        for image_url in image_urls:
+            original_key = storage_service.key_from_url(image_url)
+            if original_key is None:
+                continue
+            rows.append({"key": original_key, "original_key": None})
+            for url in image_service.derivative_urls(image_url):
+                rows.append({"key": storage_service.key_from_url(url), "original_key": original_key})
+        if not rows:
+            return 0
+
+        now = datetime.utcnow()
+        db.execute(
+            insert(ImageCleanupTask),
+            [{**row, "attempts": 0, "available_at": now} for row in rows]
+        )
+        return len(rows)
+
+    async def drain(self) -> Dict[str, int]:
+        """
+        Delete queued objects in batches until no runnable task is left
+
+        Uploads whose reservation expired unused are queued first. Opens its
+        own session so it can run as a background task after the request
+        session is closed.
+
+        Returns:
+            Counts of deleted objects, retried objects and abandoned objects
+        """
+        totals = {"deleted": 0, "retried": 0, "abandoned": 0}
+
+        db = SessionLocal()
+        try:
+            self.enqueue_images(db, image_ref_service.sweep(db))
+            db.commit()
+
+            while True:
+                now = datetime.utcnow()
+                tasks = (
+                    db.query(ImageCleanupTask)
+                    .filter(
+                        ImageCleanupTask.available_at <= now,
+                        ImageCleanupTask.attempts < settings.IMAGE_CLEANUP_MAX_ATTEMPTS
+                    )
+                    .order_by(ImageCleanupTask.available_at)
+                    .limit(settings.IMAGE_CLEANUP_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                    .all()
+                )
+                if not tasks:
+                    db.commit()
+                    return totals
+
+                # Uploaded again and reserved since it was queued. Derivatives
+                # go with their original, whose re-upload reuses them; the
+                # rows stay share-locked until the deletes are committed
+                originals = {task.original_key or task.key for task in tasks}
+                revived = set(db.scalars(
+                    select(StoredImage.key)
+                    .where(StoredImage.key.in_(originals))
+                    .with_for_update(read=True)
+                ))
+                failed = await storage_service.delete_objects(
+                    [task.key for task in tasks if (task.original_key or task.key) not in revived]
+                )
+
+                done_ids = [task.id for task in tasks if task.key not in failed]
+                if done_ids:
+                    db.execute(delete(ImageCleanupTask).where(ImageCleanupTask.id.in_(done_ids)))
+                    totals["deleted"] += len(done_ids)
+
+                retry_at = now + timedelta(seconds=settings.IMAGE_CLEANUP_RETRY_BACKOFF_SECONDS)
+                for task in tasks:
+                    if task.key not in failed:
+                        continue
+                    task.attempts += 1
+                    task.last_error = failed[task.key]
+                    task.available_at = retry_at
+                    if task.attempts >= settings.IMAGE_CLEANUP_MAX_ATTEMPTS:
+                        # Kept with its error for inspection instead of retried forever
+                        totals["abandoned"] += 1
+                    else:
+                        totals["retried"] += 1
+
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run_in_background(self) -> None:
+        """Drain the queue, logging instead of raising (for BackgroundTasks)"""
+        try:
+            totals = await self.drain()
+        except Exception as e:
+            logger.warning("Image cleanup failed: %s", e)
+            return
+        if totals["retried"] or totals["abandoned"]:
+            logger.warning("Image cleanup: %s", totals)
+
+
+# Singleton instance
+image_cleanup_service = ImageCleanupService()
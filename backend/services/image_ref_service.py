@@ -0,0 +1,188 @@
+"""
+Image Reference Service
+Reference counts stored bill images so a content-addressed object shared
+by several bills is deleted only when the last of them is gone. Every
+upload is reserved for its uploader until a bill takes it up, so an image
+uploaded but not yet saved survives the deletion of other bills sharing
+its content, and a bill can only reference an image its creator uploaded.
+Only images this service tracks are ever deleted.
+"""
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import update, delete, select, func, exists
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.bill import Bill
+from models.stored_image import StoredImage, ImageReservation
+from services.storage_service import storage_service
+
+
+class ImageRefService:
+    @staticmethod
+    def track(db: Session, image_url: str) -> None:
+        """
+        Record an image uploaded by this service, with no bill referencing it yet
+
+        Unreserved images nothing references are deleted by sweep().
+
+        Args:
+            db: Database session (the caller commits)
+            image_url: URL returned by the storage service
+        """
+        key = storage_service.key_from_url(image_url)
+        if key is None:
+            raise ValueError("Image is not stored by this service")
+
+        db.execute(
+            insert(StoredImage)
+            .values(key=key, url=image_url, ref_count=0)
+            .on_conflict_do_nothing(index_elements=[StoredImage.key])
+        )
+
+    def reserve(self, db: Session, image_url: str, user_id: int) -> None:
+        """
+        Keep an upload for ``user_id`` until a bill takes it up
+
+        The reservation lasts IMAGE_UPLOAD_RESERVATION_SECONDS; until then
+        the object is not deleted even if every bill sharing it is.
+
+        Args:
+            db: Database session (the caller commits)
+            image_url: URL returned by the storage service
+            user_id: Uploading user, the only one acquire() accepts it from
+        """
+        self.track(db, image_url)
+        db.add(ImageReservation(
+            key=storage_service.key_from_url(image_url),
+            user_id=user_id,
+            expires_at=datetime.utcnow() + timedelta(seconds=settings.IMAGE_UPLOAD_RESERVATION_SECONDS)
+        ))
+
+    @staticmethod
+    def acquire(db: Session, image_url: str, user_id: int) -> None:
+        """
+        Record that a bill created by ``user_id`` references ``image_url``
+
+        Raises ValueError unless the user uploaded the image and the
+        reservation is still active.
+
+        Args:
+            db: Database session (the caller commits)
+            image_url: URL returned by the storage service
+            user_id: User creating the bill
+        """
+        if not image_url:
+            return
+
+        key = storage_service.key_from_url(image_url)
+        if key is None:
+            raise ValueError("Image is not stored by this service")
+
+        reserved = db.execute(
+            select(ImageReservation.id).where(
+                ImageReservation.key == key,
+                ImageReservation.user_id == user_id,
+                ImageReservation.expires_at > datetime.utcnow()
+            ).limit(1)
+        ).first()
+        if reserved is None:
+            raise ValueError("Image upload not found or expired; upload the image again")
+
+        statement = insert(StoredImage).values(key=key, url=image_url, ref_count=1)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[StoredImage.key],
+            set_={"ref_count": StoredImage.ref_count + 1}
+        ))
+
+    def release(self, db: Session, image_url: str) -> bool:
+        """
+        Drop one bill reference to ``image_url``
+
+        Args:
+            db: Database session (the caller commits)
+            image_url: URL of the image the deleted bill referenced
+
+        Returns:
+            True if no bill references the image any more and the object
+            should be deleted once the transaction commits
+        """
+        if not image_url:
+            return False
+
+        remaining = db.execute(
+            update(StoredImage)
+            .where(StoredImage.url == image_url)
+            .values(ref_count=StoredImage.ref_count - 1)
+            .returning(StoredImage.ref_count)
+        ).scalar()
+
+        # Images without a row are stored elsewhere and are never deleted
+        if remaining is None or remaining > 0:
+            return False
+
+        return bool(self._delete_unreferenced(db, StoredImage.url == image_url))
+
+    def release_bills(self, db: Session, *criteria) -> List[str]:
+        """
+        Drop the image references of every bill matching ``criteria``
+
+        Reference counts are decremented in one set-based UPDATE, so this
+        costs the same whether it covers one bill or a whole room.
+
+        Args:
+            db: Database session (the caller commits and deletes the bills)
+            criteria: SQLAlchemy filter expressions on Bill
+
+        Returns:
+            URLs of images that are no longer referenced
+        """
+        refs = (
+            select(Bill.image_url, func.count().label("n"))
+            .where(*criteria, Bill.image_url != "")
+            .group_by(Bill.image_url)
+            .subquery()
+        )
+        remaining = db.execute(
+            update(StoredImage)
+            .where(StoredImage.url == refs.c.image_url)
+            .values(ref_count=StoredImage.ref_count - refs.c.n)
+            .returning(StoredImage.url, StoredImage.ref_count)
+        ).all()
+
+        # Images without a row are stored elsewhere and are never deleted
+        released = [url for url, count in remaining if count <= 0]
+        if not released:
+            return []
+        return self._delete_unreferenced(db, StoredImage.url.in_(released))
+
+    def sweep(self, db: Session) -> List[str]:
+        """
+        Forget expired reservations and the uploads no bill took up
+
+        Args:
+            db: Database session (the caller commits)
+
+        Returns:
+            URLs of images to delete
+        """
+        db.execute(delete(ImageReservation).where(ImageReservation.expires_at <= datetime.utcnow()))
+        return self._delete_unreferenced(db)
+
+    @staticmethod
+    def _delete_unreferenced(db: Session, *criteria) -> List[str]:
+        """Delete rows of unreferenced, unreserved images and return their URLs"""
+        reserved = exists().where(
+            ImageReservation.key == StoredImage.key,
+            ImageReservation.expires_at > datetime.utcnow()
+        )
+        # A concurrent acquire may have revived a row since it was released
+        return db.execute(
+            delete(StoredImage)
+            .where(*criteria, StoredImage.ref_count <= 0, ~reserved)
+            .returning(StoredImage.url)
+        ).scalars().all()
+
+
+# Singleton instance
+image_ref_service = ImageRefService()
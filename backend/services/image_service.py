@@ -0,0 +1,140 @@
+"""
+Image Service for generating bill image derivatives
+Produces a compressed WebP display version and a small thumbnail in a
+process pool, then stores them next to the original
+"""
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple, Union
+from PIL import Image, ImageOps
+from core.config import settings
+from services.storage_service import storage_service
+
+DERIVATIVE_CONTENT_TYPE = "image/webp"
+
+
+def _encode_webp(image: Image.Image, max_size: int, quality: int) -> bytes:
+    resized = image.copy()
+    resized.thumbnail((max_size, max_size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def render_derivatives(
+    source: Union[bytes, str], display_size: int, thumbnail_size: int, quality: int
+) -> Tuple[bytes, bytes]:
+    """
+    Render display and thumbnail WebP versions of an image
+
+    Runs in a worker process, so it only takes plain bytes or the path of
+    a file holding the image (read here, never copied to the worker) and
+    returns plain bytes.
+    """
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as original:
+        # Phone photos are often stored sideways with an EXIF orientation tag
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    return (
+        _encode_webp(image, display_size, quality),
+        _encode_webp(image, thumbnail_size, quality)
+    )
+
+
+class ImageService:
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the service doesn't fork worker processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+        return self._executor
+
+    async def create_derivatives(self, image_url: str, content: Union[bytes, str]) -> Dict[str, Any]:
+        """
+        Generate and store display and thumbnail versions of a bill image
+
+        Args:
+            image_url: URL of the stored original
+            content: Original image content as bytes, or the path of a file holding it
+
+        Returns:
+            Dict with display_url, thumbnail_url and size/time statistics
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        original_bytes = os.path.getsize(content) if isinstance(content, str) else len(content)
+
+        # Content-addressed originals share derivatives; reuse them if present
+        display_key = storage_service.derivative_key(image_url, "display", DERIVATIVE_CONTENT_TYPE)
+        thumbnail_key = storage_service.derivative_key(image_url, "thumb", DERIVATIVE_CONTENT_TYPE)
+        display_size, thumbnail_size = await asyncio.gather(
+            storage_service.object_size(display_key),
+            storage_service.object_size(thumbnail_key)
+        )
+        if display_size is not None and thumbnail_size is not None:
+            return {
+                "display_url": storage_service.public_url(display_key),
+                "thumbnail_url": storage_service.public_url(thumbnail_key),
+                "stats": self._stats(original_bytes, display_size, thumbnail_size, 0.0, started, deduplicated=True)
+            }
+
+        try:
+            display, thumbnail = await loop.run_in_executor(
+                self.executor,
+                render_derivatives,
+                content,
+                settings.IMAGE_DISPLAY_MAX_SIZE,
+                settings.IMAGE_THUMBNAIL_MAX_SIZE,
+                settings.IMAGE_WEBP_QUALITY
+            )
+        except Exception as e:
+            raise Exception(f"Failed to generate image derivatives: {str(e)}")
+
+        render_seconds = time.perf_counter() - started
+
+        display_url, thumbnail_url = await asyncio.gather(
+            storage_service.upload_derivative(image_url, "display", display, DERIVATIVE_CONTENT_TYPE),
+            storage_service.upload_derivative(image_url, "thumb", thumbnail, DERIVATIVE_CONTENT_TYPE)
+        )
+
+        return {
+            "display_url": display_url,
+            "thumbnail_url": thumbnail_url,
+            "stats": self._stats(original_bytes, len(display), len(thumbnail), render_seconds, started)
+        }
+
+    @staticmethod
+    def derivative_urls(image_url: str) -> Tuple[str, str]:
+        """Display and thumbnail URLs of a stored original, whether or not they exist yet"""
+        return (
+            storage_service.public_url(storage_service.derivative_key(image_url, "display", DERIVATIVE_CONTENT_TYPE)),
+            storage_service.public_url(storage_service.derivative_key(image_url, "thumb", DERIVATIVE_CONTENT_TYPE))
+        )
+
+    @staticmethod
+    def _stats(
+        original_bytes: int,
+        display_bytes: int,
+        thumbnail_bytes: int,
+        render_seconds: float,
+        started: float,
+        deduplicated: bool = False
+    ) -> Dict[str, Any]:
+        return {
+            "original_bytes": original_bytes,
+            "display_bytes": display_bytes,
+            "thumbnail_bytes": thumbnail_bytes,
+            "display_savings": round(1 - display_bytes / original_bytes, 3) if original_bytes else 0.0,
+            "render_seconds": round(render_seconds, 3),
+            "total_seconds": round(time.perf_counter() - started, 3),
+            "deduplicated": deduplicated
+        }
+
+
+# Singleton instance
+image_service = ImageService()
@@ -0,0 +1,148 @@
+"""
+Import Job Service
+Durable queue of bulk ZIP imports. The API stores the archive and queues
+a job; a worker runs the import pipeline and saves the parsed receipts
+as draft bills.
+"""
+import tempfile
+from datetime import datetime
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.bill import Bill, BillItem
+from models.import_job import ImportJob
+from models.room import Membership
+from services.parse_job_service import JobQueue
+from services.import_service import ImportEntry, import_service
+from services.storage_service import storage_service
+from services.image_ref_service import image_ref_service
+from services.image_cleanup_service import image_cleanup_service
+from services.categorizer_service import categorizer_service
+from services.event_service import event_service
+
+
+class ImportJobService(JobQueue):
+    model = ImportJob
+
+    @property
+    def visibility_timeout(self) -> int:
+        return settings.BULK_IMPORT_VISIBILITY_TIMEOUT_SECONDS
+
+    def enqueue(self, db: Session, user_id: int, room_id: int, archive_key: str, filename: str) -> ImportJob:
+        """
+        Create a pending import job
+
+        Args:
+            db: Database session
+            user_id: ID of the importing user, who will own the drafts
+            room_id: Room the drafts are created in
+            archive_key: Object key of the stored ZIP archive
+            filename: Original filename
+
+        Returns:
+            The persisted job
+        """
+        job = ImportJob(
+            user_id=user_id,
+            room_id=room_id,
+            filename=filename,
+            archive_key=archive_key,
+            status=ImportJob.PENDING,
+            max_attempts=settings.PARSE_JOB_MAX_ATTEMPTS,
+            available_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    async def process(self, db: Session, job: ImportJob, worker_id: str) -> bool:
+        """
+        Import a claimed job's archive as draft bills
+
+        Uploads of entries that failed are tracked unreserved, so the image
+        cleanup sweep deletes them. The drafts are committed together with
+        the job's completion.
+
+        Returns:
+            False if the job failed or was reclaimed by another worker
+        """
+        is_member = job.room_id is not None and db.query(Membership).filter(
+            Membership.user_id == job.user_id,
+            Membership.room_id == job.room_id
+        ).first() is not None
+        if not is_member:
+            self.fail(db, job, worker_id, "The room was deleted or the user left it", retry=False)
+            return False
+
+        try:
+            with tempfile.TemporaryFile() as archive:
+                await storage_service.download_to_file(job.archive_key, archive)
+                archive.seek(0)
+                result = await import_service.import_zip(archive)
+        except Exception as e:
+            self.fail(db, job, worker_id, str(e))
+            return False
+
+        # Commit the images' reference rows first: if saving the drafts fails,
+        # the reservations expire and the sweep still deletes the uploads
+        for image_url in result.unused_image_urls:
+            image_ref_service.track(db, image_url)
+        for entry in result.entries:
+            image_ref_service.reserve(db, entry.image_url, job.user_id)
+        db.commit()
+
+        try:
+            bills = [self._draft_bill(job, entry) for entry in result.entries]
+            db.add_all(bills)
+            for bill in bills:
+                image_ref_service.acquire(db, bill.image_url, job.user_id)
+            db.flush()
+            if bills:
+                event_service.publish(db, job.room_id, "bills_imported", count=len(bills))
+        except Exception as e:
+            db.rollback()
+            self.fail(db, job, worker_id, f"Failed to save draft bills: {str(e)}")
+            return False
+
+        return self.complete(db, job, worker_id, {
+            "bill_ids": [bill.id for bill in bills],
+            "failures": result.failures,
+            "stages": [stats.summary() for stats in result.stages],
+            "total_seconds": round(result.total_seconds, 3)
+        })
+
+    @staticmethod
+    def _draft_bill(job: ImportJob, entry: ImportEntry) -> Bill:
+        """A draft bill for a parsed receipt; shares are assigned on finalize"""
+        parsed = entry.parsed
+        bill = Bill(
+            room_id=job.room_id,
+            uploaded_by=job.user_id,
+            image_url=entry.image_url,
+            display_url=entry.display_url,
+            thumbnail_url=entry.thumbnail_url,
+            merchant_name=parsed.get('merchant_name'),
+            total_amount=parsed.get('total_amount', 0.0),
+            is_draft=True
+        )
+        bill.items = [
+            BillItem(
+                description=item['description'],
+                quantity=item['quantity'],
+                unit_price=item['unit_price'],
+                amount=item['total'],
+                category=categorizer_service.categorize(item['description'], parsed.get('merchant_name'))
+            )
+            for item in parsed.get('items', [])
+        ]
+        return bill
+
+    def _release(self, db: Session, job: ImportJob) -> None:
+        # The archive is deleted with the image cleanup queue's retries
+        if job.archive_key:
+            image_cleanup_service.enqueue(db, [storage_service.public_url(job.archive_key)])
+            job.archive_key = None
+
+
+# Singleton instance
+import_job_service = ImportJobService()
@@ -0,0 +1,225 @@
+"""
+Bulk Import Service
+Streams receipt images out of a ZIP archive through overlapping
+storage upload, OCR and LLM parsing stages
+"""
+import asyncio
+import logging
+import os
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional
+from core.config import settings
+from services.storage_service import storage_service
+from services.ocr_service import ocr_service
+from services.llm_service import llm_service
+from services.image_service import image_service
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+_DONE = object()
+
+
+@dataclass
+class ImportEntry:
+    filename: str
+    content: Optional[bytes]
+    image_url: Optional[str] = None
+    display_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    ocr_text: Optional[str] = None
+    parsed: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class StageStats:
+    name: str
+    concurrency: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    first_started: Optional[float] = None
+    last_finished: Optional[float] = None
+
+    def summary(self) -> Dict[str, Any]:
+        wall = (
+            self.last_finished - self.first_started
+            if self.first_started is not None and self.last_finished is not None
+            else 0.0
+        )
+        return {
+            "stage": self.name,
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "items_per_second": round(self.processed / wall, 3) if wall > 0 else 0.0
+        }
+
+
+@dataclass
+class ImportResult:
+    entries: List[ImportEntry] = field(default_factory=list)
+    failures: List[Dict[str, str]] = field(default_factory=list)
+    unused_image_urls: List[str] = field(default_factory=list)  # Uploaded for entries that failed later
+    stages: List[StageStats] = field(default_factory=list)
+    total_seconds: float = 0.0
+
+
+class ImportService:
+    async def import_zip(self, archive: BinaryIO) -> ImportResult:
+        """
+        Parse every receipt image in a ZIP archive
+
+        Entries are decompressed one at a time straight from the uploaded
+        file; bounded queues between stages keep at most a few images in
+        memory while upload, OCR and LLM work overlap across images.
+
+        Args:
+            archive: Seekable file object holding the ZIP archive
+
+        Returns:
+            Parsed entries, per-entry failures and per-stage throughput
+        """
+        result = ImportResult()
+        started = time.perf_counter()
+
+        stages = [
+            ("upload", settings.BULK_IMPORT_UPLOAD_CONCURRENCY, self._upload),
+            ("ocr", settings.BULK_IMPORT_OCR_CONCURRENCY, self._ocr),
+            ("llm", settings.BULK_IMPORT_LLM_CONCURRENCY, self._parse),
+        ]
+
+        queues = [asyncio.Queue(maxsize=concurrency * 2) for _, concurrency, _ in stages]
+        queues.append(asyncio.Queue())
+
+        tasks = [asyncio.create_task(self._read_entries(archive, queues[0], result))]
+        for index, (name, concurrency, func) in enumerate(stages):
+            stats = StageStats(name=name, concurrency=concurrency)
+            result.stages.append(stats)
+            tasks.append(asyncio.create_task(
+                self._run_stage(func, stats, queues[index], queues[index + 1], result)
+            ))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        output = queues[-1]
+        while not output.empty():
+            entry = output.get_nowait()
+            if entry is not _DONE:
+                result.entries.append(entry)
+
+        result.total_seconds = time.perf_counter() - started
+        return result
+
+    async def _read_entries(self, archive: BinaryIO, out: asyncio.Queue, result: ImportResult) -> None:
+        """Decompress image entries one by one into the first stage queue"""
+        try:
+            zf = await asyncio.to_thread(zipfile.ZipFile, archive)
+        except zipfile.BadZipFile:
+            await out.put(_DONE)
+            raise Exception("File is not a valid ZIP archive")
+
+        try:
+            count = 0
+            for info in zf.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                    continue
+                if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+
+                if count >= settings.BULK_IMPORT_MAX_FILES:
+                    result.failures.append({
+                        "filename": name, "stage": "read",
+                        "error": f"Archive exceeds {settings.BULK_IMPORT_MAX_FILES} images"
+                    })
+                    continue
+                if info.file_size > settings.BULK_IMPORT_MAX_IMAGE_BYTES:
+                    result.failures.append({
+                        "filename": name, "stage": "read", "error": "Image is too large"
+                    })
+                    continue
+
+                count += 1
+                content = await asyncio.to_thread(zf.read, info)
+                await out.put(ImportEntry(filename=name, content=content))
+        finally:
+            zf.close()
+            await out.put(_DONE)
+
+    async def _run_stage(
+        self,
+        func: Callable[[ImportEntry], Awaitable[None]],
+        stats: StageStats,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        result: ImportResult
+    ) -> None:
+        """Run ``concurrency`` workers over a stage and forward completed entries"""
+        async def worker():
+            while True:
+                entry = await inbox.get()
+                if entry is _DONE:
+                    # Let sibling workers see the end of input too
+                    await inbox.put(_DONE)
+                    return
+
+                began = time.perf_counter()
+                if stats.first_started is None:
+                    stats.first_started = began
+                try:
+                    await func(entry)
+                except Exception as e:
+                    stats.failed += 1
+                    result.failures.append({
+                        "filename": entry.filename, "stage": stats.name, "error": str(e)
+                    })
+                    if entry.image_url:
+                        result.unused_image_urls.append(entry.image_url)
+                    continue
+                finally:
+                    finished = time.perf_counter()
+                    stats.busy_seconds += finished - began
+                    stats.last_finished = finished
+
+                stats.processed += 1
+                await outbox.put(entry)
+
+        await asyncio.gather(*(worker() for _ in range(stats.concurrency)))
+        await outbox.put(_DONE)
+
+    async def _upload(self, entry: ImportEntry) -> None:
+        entry.image_url = await storage_service.upload_bill_image(
+            entry.content, os.path.basename(entry.filename)
+        )
+        try:
+            derived = await image_service.create_derivatives(entry.image_url, entry.content)
+        except Exception as e:
+            logger.warning("Failed to create image derivatives for %s: %s", entry.filename, e)
+        else:
+            entry.display_url = derived["display_url"]
+            entry.thumbnail_url = derived["thumbnail_url"]
+
+    async def _ocr(self, entry: ImportEntry) -> None:
+        entry.ocr_text = await ocr_service.extract_text_from_bytes(entry.content, entry.filename)
+        # The image bytes are not needed past OCR
+        entry.content = None
+        if not entry.ocr_text.strip():
+            raise Exception("Could not extract text from image")
+
+    async def _parse(self, entry: ImportEntry) -> None:
+        entry.parsed = await llm_service.parse_bill_text(entry.ocr_text)
+
+
+# Singleton instance
+import_service = ImportService()
@@ -0,0 +1,413 @@
+"""
+Ledger Import Service
+Bulk-loads expense history exported from other apps as CSV. Rows are
+normalized in one streaming pass, COPY'd into temporary staging tables,
+validated against the room's members in SQL and inserted set-based.
+"""
+import csv
+import io
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from core.config import settings
+from services.balance_service import balance_service
+from services.categorizer_service import categorizer_service
+from services.rollup_service import rollup_service
+from services.room_version_service import room_version_service
+from services.event_service import event_service
+
+# Our field -> default CSV header; callers can remap any of them
+DEFAULT_COLUMNS = {
+    "bill_ref": "bill_ref",        # Rows sharing a ref become items of one bill
+    "date": "date",
+    "paid_by": "paid_by",          # Member email or name
+    "description": "description",
+    "quantity": "quantity",
+    "unit_price": "unit_price",
+    "amount": "amount",
+    "shared_by": "shared_by",      # Emails or names, empty = every member, NO_SHARERS = nobody
+    "weights": "weights",          # Optional weights matching shared_by
+    "merchant": "merchant",        # Optional, helps categorize the bill's items
+    "category": "category",        # Optional, categorized automatically if empty
+}
+
+STAGING_COLUMNS = [
+    "line_no", "bill_ref", "bill_date", "paid_by", "description",
+    "quantity", "unit_price", "amount", "shared_by", "weights",
+    "unshared", "merchant", "category"
+]
+
+# shared_by value of an item nobody shares (an empty one means every member)
+NO_SHARERS = "-"
+
+# Separates list values inside a staged column; cannot appear in CSV text
+LIST_SEPARATOR = "\x1f"
+
+CURRENCY_SYMBOLS = "$€£¥₹"
+
+
+@dataclass
+class LedgerImportResult:
+    dry_run: bool
+    rows: int = 0
+    bills: int = 0
+    items: int = 0
+    shares: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    error_count: int = 0
+    seconds: float = 0.0
+
+    def add_error(self, line: int, error: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < settings.LEDGER_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+class LedgerImportService:
+    def import_csv(
+        self,
+        db: Session,
+        room_id: int,
+        source: BinaryIO,
+        columns: Optional[Dict[str, str]] = None,
+        date_format: Optional[str] = None,
+        list_separator: str = ";",
+        dry_run: bool = False
+    ) -> LedgerImportResult:
+        """
+        Import a CSV ledger into a room
+
+        Nothing is written unless every row is valid and ``dry_run`` is
+        false. A dry run performs the inserts and rolls them back, so its
+        counts and errors match a real import.
+
+        Args:
+            db: Database session (committed on success)
+            room_id: Room the bills belong to
+            source: Binary CSV file object (UTF-8, optional BOM)
+            columns: Overrides of DEFAULT_COLUMNS, our field -> CSV header
+            date_format: strptime format for the date column (ISO 8601 if omitted)
+            list_separator: Separator inside shared_by and weights
+            dry_run: Validate only
+
+        Returns:
+            Row/bill/item/share counts and validation errors
+        """
+        started = time.perf_counter()
+        result = LedgerImportResult(dry_run=dry_run)
+
+        staged = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+", newline="")
+        try:
+            self._normalize(source, staged, result, columns or {}, date_format, list_separator)
+            staged.seek(0)
+
+            if not result.rows and not result.error_count:
+                result.add_error(1, "File has no rows")
+
+            if not result.error_count:
+                self._stage(db, room_id, staged)
+                self._validate(db, result)
+
+            if result.error_count:
+                db.rollback()
+            else:
+                self._insert(db, room_id, result)
+                if dry_run:
+                    db.rollback()
+                else:
+                    balance_service.rebuild(db, [room_id])
+                    rollup_service.rebuild(db, [room_id])
+                    room_version_service.bump(db, room_id)
+                    event_service.publish(db, room_id, "bills_imported", count=result.bills)
+                    event_service.publish(db, room_id, "balances_changed")
+                    db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            staged.close()
+
+        result.seconds = round(time.perf_counter() - started, 3)
+        return result
+
+    def _normalize(
+        self,
+        source: BinaryIO,
+        out,
+        result: LedgerImportResult,
+        columns: Dict[str, str],
+        date_format: Optional[str],
+        list_separator: str
+    ) -> None:
+        """Map CSV columns to the staging layout and check value formats"""
+        wrapper = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+        try:
+            self._normalize_rows(csv.reader(wrapper), csv.writer(out), result, columns, date_format, list_separator)
+        except UnicodeDecodeError:
+            result.add_error(0, "File is not UTF-8 encoded CSV")
+        finally:
+            # Leave the caller's file open
+            wrapper.detach()
+
+    def _normalize_rows(
+        self,
+        reader,
+        writer,
+        result: LedgerImportResult,
+        columns: Dict[str, str],
+        date_format: Optional[str],
+        list_separator: str
+    ) -> None:
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = {name.strip().lower(): index for index, name in enumerate(header)}
+
+        unknown = set(columns) - set(DEFAULT_COLUMNS)
+        if unknown:
+            result.add_error(1, f"Unknown fields in column mapping: {', '.join(sorted(unknown))}")
+            return
+
+        mapping = {**DEFAULT_COLUMNS, **columns}
+        index = {
+            name: positions.get(header_name.strip().lower())
+            for name, header_name in mapping.items()
+        }
+        missing = [
+            mapping[name] for name in ("paid_by", "description")
+            if index[name] is None
+        ]
+        if index["amount"] is None and index["unit_price"] is None:
+            missing.append(mapping["amount"])
+        if missing:
+            result.add_error(1, f"Missing columns: {', '.join(missing)}")
+            return
+
+        now = datetime.utcnow().isoformat()
+        for line_no, row in enumerate(reader, start=2):
+            if not any(value.strip() for value in row):
+                continue
+            result.rows += 1
+
+            def value(name: str) -> str:
+                position = index[name]
+                return row[position].strip() if position is not None and position < len(row) else ""
+
+            try:
+                quantity = self._parse_quantity(value("quantity"))
+                unit_price = self._parse_number(value("unit_price")) if value("unit_price") else None
+                amount = self._parse_number(value("amount")) if value("amount") else None
+                if amount is None and unit_price is None:
+                    raise ValueError("amount or unit_price is required")
+                if amount is None:
+                    amount = round(quantity * unit_price, 2)
+                if unit_price is None:
+                    unit_price = round(amount / quantity, 2) if quantity else amount
+
+                bill_date = self._parse_date(value("date"), date_format) if value("date") else now
+
+                unshared = value("shared_by") == NO_SHARERS
+                shared_by = [] if unshared else [
+                    name.strip() for name in value("shared_by").split(list_separator) if name.strip()
+                ]
+                weights = [
+                    self._parse_number(weight)
+                    for weight in value("weights").split(list_separator) if weight.strip()
+                ]
+                if unshared and weights:
+                    raise ValueError(f"weights must be empty when shared_by is {NO_SHARERS}")
+                if weights:
+                    if len(weights) != len(shared_by):
+                        raise ValueError("weights must have one entry per shared_by entry")
+                    if any(weight <= 0 for weight in weights):
+                        raise ValueError("weights must be positive")
+            except ValueError as e:
+                result.add_error(line_no, str(e))
+                continue
+
+            if not value("paid_by"):
+                result.add_error(line_no, "paid_by is required")
+                continue
+            if not value("description"):
+                result.add_error(line_no, "description is required")
+                continue
+
+            category = categorizer_service.resolve(value("category"), value("description"), value("merchant"))
+
+            writer.writerow([
+                line_no,
+                value("bill_ref") or f"line:{line_no}",
+                bill_date,
+                value("paid_by"),
+                value("description"),
+                quantity,
+                unit_price,
+                amount,
+                LIST_SEPARATOR.join(shared_by) or None,
+                LIST_SEPARATOR.join(str(weight) for weight in weights) or None,
+                unshared,
+                value("merchant") or None,
+                category
+            ])
+
+    @staticmethod
+    def _parse_quantity(raw: str) -> int:
+        if not raw:
+            return 1
+        try:
+            quantity = int(float(raw))
+        except ValueError:
+            raise ValueError(f"'{raw}' is not a quantity")
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+        return quantity
+
+    @staticmethod
+    def _parse_number(raw: str) -> float:
+        cleaned = raw.strip().strip(CURRENCY_SYMBOLS).strip()
+        try:
+            return float(cleaned)
+        except ValueError:
+            raise ValueError(f"'{raw}' is not a number")
+
+    @staticmethod
+    def _parse_date(raw: str, date_format: Optional[str]) -> str:
+        try:
+            parsed = datetime.strptime(raw, date_format) if date_format else datetime.fromisoformat(raw)
+        except ValueError:
+            raise ValueError(f"'{raw}' is not a valid date")
+        return parsed.isoformat()
+
+    @staticmethod
+    def _stage(db: Session, room_id: int, staged) -> None:
+        """COPY normalized rows into temporary tables dropped at commit/rollback"""
+        # Enough for the import's sorts and hash aggregates to stay in memory
+        db.execute(text("SET LOCAL work_mem = '64MB'"))
+        db.execute(text("""
+            CREATE TEMP TABLE ledger_import_rows (
+                line_no integer PRIMARY KEY,
+                bill_ref text NOT NULL,
+                bill_date timestamp NOT NULL,
+                paid_by text NOT NULL,
+                description text NOT NULL,
+                quantity integer NOT NULL,
+                unit_price double precision NOT NULL,
+                amount double precision NOT NULL,
+                shared_by text,
+                weights text,
+                unshared boolean NOT NULL,
+                merchant text,
+                category text NOT NULL
+            ) ON COMMIT DROP
+        """))
+
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY ledger_import_rows ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                staged
+            )
+        finally:
+            cursor.close()
+
+        # Members are matched by email, or by name where the name is unambiguous
+        db.execute(text("""
+            CREATE TEMP TABLE ledger_import_aliases ON COMMIT DROP AS
+            SELECT lower(users.email) AS alias, users.id AS user_id
+            FROM users JOIN memberships ON memberships.user_id = users.id
+            WHERE memberships.room_id = :room_id
+            UNION
+            SELECT lower(users.name), min(users.id)
+            FROM users JOIN memberships ON memberships.user_id = users.id
+            WHERE memberships.room_id = :room_id
+            GROUP BY lower(users.name)
+            HAVING count(*) = 1
+        """), {"room_id": room_id})
+        db.execute(text("ANALYZE ledger_import_rows, ledger_import_aliases"))
+
+    @staticmethod
+    def _validate(db: Session, result: LedgerImportResult) -> None:
+        """Report unknown members and bills whose rows disagree"""
+        problems = db.execute(text("""
+            SELECT line_no, 'Unknown payer: ' || paid_by AS error
+            FROM ledger_import_rows
+            WHERE lower(paid_by) NOT IN (SELECT alias FROM ledger_import_aliases)
+            UNION ALL
+            SELECT line_no, 'Unknown member in shared_by: ' || shared.name
+            FROM ledger_import_rows,
+                 unnest(string_to_array(shared_by, chr(31))) AS shared(name)
+            WHERE lower(shared.name) NOT IN (SELECT alias FROM ledger_import_aliases)
+            UNION ALL
+            SELECT min(line_no), 'Rows of bill ' || bill_ref || ' have different payers or dates'
+            FROM ledger_import_rows
+            GROUP BY bill_ref
+            HAVING count(DISTINCT lower(paid_by)) > 1 OR count(DISTINCT bill_date) > 1
+            ORDER BY 1
+        """)).all()
+
+        for line_no, error in problems:
+            result.add_error(line_no, error)
+
+    @staticmethod
+    def _insert(db: Session, room_id: int, result: LedgerImportResult) -> None:
+        """Insert bills, items and shares from the staging tables"""
+        # Ids are drawn from the tables' own sequences up front so items
+        # and shares can refer to them without a round trip per bill
+        result.bills = db.execute(text("""
+            CREATE TEMP TABLE ledger_import_bills ON COMMIT DROP AS
+            SELECT nextval(pg_get_serial_sequence('bills', 'id')) AS id, grouped.*
+            FROM (
+                SELECT bill_ref, min(bill_date) AS bill_date, min(aliases.user_id) AS payer_id,
+                       sum(amount) AS total_amount, min(merchant) AS merchant
+                FROM ledger_import_rows
+                JOIN ledger_import_aliases AS aliases ON aliases.alias = lower(paid_by)
+                GROUP BY bill_ref
+            ) AS grouped
+        """)).rowcount
+
+        db.execute(text("""
+            INSERT INTO bills (id, room_id, uploaded_by, image_url, merchant_name, total_amount, is_draft, created_at)
+            SELECT id, :room_id, payer_id, '', merchant, total_amount, false, bill_date
+            FROM ledger_import_bills
+        """), {"room_id": room_id})
+
+        result.items = db.execute(text("""
+            CREATE TEMP TABLE ledger_import_items ON COMMIT DROP AS
+            SELECT nextval(pg_get_serial_sequence('bill_items', 'id')) AS id,
+                   bills.id AS bill_id, rows.*
+            FROM ledger_import_rows AS rows
+            JOIN ledger_import_bills AS bills USING (bill_ref)
+            ORDER BY rows.line_no
+        """)).rowcount
+        db.execute(text("ANALYZE ledger_import_items"))
+
+        db.execute(text("""
+            INSERT INTO bill_items (id, bill_id, description, quantity, unit_price, amount, category, created_at)
+            SELECT id, bill_id, description, quantity, unit_price, amount, category, bill_date
+            FROM ledger_import_items
+        """))
+
+        result.shares = db.execute(text("""
+            INSERT INTO bill_item_shares (item_id, user_id, weight)
+            SELECT items.id, aliases.user_id, sum(coalesce(shared.weight, 1.0))
+            FROM ledger_import_items AS items
+            CROSS JOIN LATERAL unnest(
+                string_to_array(items.shared_by, chr(31)),
+                string_to_array(items.weights, chr(31))::double precision[]
+            ) AS shared(name, weight)
+            JOIN ledger_import_aliases AS aliases ON aliases.alias = lower(shared.name)
+            GROUP BY items.id, aliases.user_id
+            UNION ALL
+            SELECT items.id, memberships.user_id, 1.0
+            FROM ledger_import_items AS items
+            JOIN memberships ON memberships.room_id = :room_id
+            WHERE items.shared_by IS NULL AND NOT items.unshared
+        """), {"room_id": room_id}).rowcount
+
+
+# Singleton instance
+ledger_import_service = LedgerImportService()
@@ -0,0 +1,105 @@
+"""
+Listing Service
+Read paths of the list endpoints (rooms, room members, room bills) as
+Core projections: only the columns the response carries, fetched as rows
+and shaped into plain dicts with the response schema's field names. No
+ORM objects are built and nothing is validated again; the routes send the
+dicts with ORJSONResponse.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.bill import Bill, BillItem, BillItemShare
+from models.room import Membership, Room
+from models.user import User
+
+ROOM_COLUMNS = (Room.id, Room.name, Room.secret, Room.created_by, Room.created_at)
+
+MEMBER_COLUMNS = (User.id, User.name, User.email, User.avatar, User.created_at)
+
+# BillBase fields
+BILL_COLUMNS = (
+    Bill.id, Bill.room_id, Bill.uploaded_by, Bill.image_url, Bill.display_url, Bill.thumbnail_url,
+    Bill.merchant_name, Bill.total_amount, Bill.is_draft, Bill.created_at
+)
+
+# BillItemResponse fields except shares and shared_by
+ITEM_COLUMNS = (
+    BillItem.id, BillItem.bill_id, BillItem.description, BillItem.quantity, BillItem.unit_price,
+    BillItem.amount, BillItem.category, BillItem.created_at
+)
+
+
+class ListingService:
+    @staticmethod
+    def rooms_of(db: Session, user_id: int) -> List[Dict[str, Any]]:
+        """RoomResponse dicts of every room the user belongs to, in joining order"""
+        member_count = (
+            select(func.count())
+            .where(Membership.room_id == Room.id)
+            .correlate(Room)
+            .scalar_subquery()
+        )
+        rows = db.execute(
+            select(*ROOM_COLUMNS, member_count.label("member_count"))
+            .join(Membership, (Membership.room_id == Room.id) & (Membership.user_id == user_id))
+            .order_by(Membership.id)
+        )
+        return [dict(row._mapping) for row in rows]
+
+    @staticmethod
+    def room_with_members(db: Session, room_id: int) -> Optional[Dict[str, Any]]:
+        """RoomWithMembers dict, or None if the room does not exist"""
+        room = db.execute(select(*ROOM_COLUMNS).where(Room.id == room_id)).first()
+        if room is None:
+            return None
+
+        members = [
+            dict(row._mapping)
+            for row in db.execute(
+                select(*MEMBER_COLUMNS)
+                .join(Membership, Membership.user_id == User.id)
+                .where(Membership.room_id == room_id)
+                .order_by(Membership.id)
+            )
+        ]
+        return {**room._mapping, "member_count": len(members), "members": members}
+
+    @staticmethod
+    def room_bills(db: Session, room_id: int) -> List[Dict[str, Any]]:
+        """BillResponse dicts of a room, newest first: three queries however many bills"""
+        shares = defaultdict(list)
+        for row in db.execute(
+            select(BillItemShare.item_id, BillItemShare.user_id, BillItemShare.weight)
+            .join(BillItem, BillItem.id == BillItemShare.item_id)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(Bill.room_id == room_id)
+            .order_by(BillItemShare.item_id, BillItemShare.user_id)
+        ):
+            shares[row.item_id].append({"user_id": row.user_id, "weight": row.weight})
+
+        items = defaultdict(list)
+        for row in db.execute(
+            select(*ITEM_COLUMNS)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(Bill.room_id == room_id)
+            .order_by(BillItem.id)
+        ):
+            item_shares = shares.get(row.id, [])
+            items[row.bill_id].append({
+                **row._mapping,
+                "shares": item_shares,
+                "shared_by": [share["user_id"] for share in item_shares]
+            })
+
+        return [
+            {**row._mapping, "items": items.get(row.id, [])}
+            for row in db.execute(
+                select(*BILL_COLUMNS).where(Bill.room_id == room_id).order_by(Bill.created_at.desc())
+            )
+        ]
+
+
+# Singleton instance
+listing_service = ListingService()
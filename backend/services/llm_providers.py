@@ -0,0 +1,288 @@
+"""
+LLM provider abstraction with hedged requests
+Any OpenAI-compatible endpoint (OpenAI, vLLM, Ollama, llama.cpp server)
+can be used as a provider
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+from openai import AsyncOpenAI
+
+
+class LatencyHistogram:
+    """
+    Sliding window of recent request latencies
+
+    A request cancelled before it answered (a hedged primary that lost)
+    is recorded as a censored sample: its true latency is unknown but at
+    least the time it ran, so that time stands in for it. Leaving such
+    requests out would keep only the fast answers and pull the percentile,
+    and with it the hedge delay, ever lower.
+    """
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.censored: Deque[bool] = deque(maxlen=window)
+
+    def record(self, seconds: float, censored: bool = False) -> None:
+        self.samples.append(seconds)
+        self.censored.append(censored)
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None when empty"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    @property
+    def censored_count(self) -> int:
+        return sum(self.censored)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "censored": self.censored_count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+class LLMProvider:
+    """Base class for chat completion providers"""
+
+    def __init__(self, name: str, model: str, latency_window: int = 200):
+        self.name = name
+        self.model = model
+        self.latency_window = latency_window
+        self.latencies: Dict[str, LatencyHistogram] = {}
+
+    def latency(self, model: Optional[str] = None) -> LatencyHistogram:
+        """Latencies of requests to ``model``, the default model if None"""
+        model = model or self.model
+        if model not in self.latencies:
+            self.latencies[model] = LatencyHistogram(self.latency_window)
+        return self.latencies[model]
+
+    async def complete(self, messages: List[Dict[str, str]], model: Optional[str] = None, **options) -> str:
+        """Return the completion text for ``messages``"""
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        """Yield completion text deltas for ``messages``"""
+        raise NotImplementedError
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    def __init__(
+        self,
+        name: str,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        supports_json_mode: bool = True,
+        latency_window: int = 200
+    ):
+        super().__init__(name, model, latency_window)
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.supports_json_mode = supports_json_mode
+
+    def _request_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        json_mode = options.pop("json_mode", False)
+        if json_mode and self.supports_json_mode:
+            options["response_format"] = {"type": "json_object"}
+        return options
+
+    async def complete(self, messages: List[Dict[str, str]], model: Optional[str] = None, **options) -> str:
+        response = await self.client.chat.completions.create(
+            model=model or self.model,
+            messages=messages,
+            **self._request_options(options)
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, messages: List[Dict[str, str]], model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=model or self.model,
+            messages=messages,
+            stream=True,
+            **self._request_options(options)
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class HedgedLLMClient:
+    """
+    Sends each request to the primary provider and, if it has not answered
+    within the recent latency percentile of the requested model, hedges
+    with the next provider.
+    The first response that passes validation wins; the others are cancelled.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge_percentile: float = 95.0,
+        min_samples: int = 20,
+        default_hedge_delay: float = 5.0
+    ):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.requests = 0
+        self.hedges = 0
+        self.wins: Dict[str, int] = {provider.name: 0 for provider in providers}
+        self.cancelled: Dict[str, int] = {provider.name: 0 for provider in providers}
+
+    @property
+    def primary(self) -> LLMProvider:
+        return self.providers[0]
+
+    def hedge_delay(self, model: Optional[str] = None) -> float:
+        """
+        Seconds to wait on the primary before sending a hedged request
+
+        Each model has its own latency, so a slow model is not hedged
+        against the percentile of a fast one.
+
+        Args:
+            model: Model requested from the primary, its default if None
+        """
+        latency = self.primary.latency(model)
+        if latency.count < self.min_samples:
+            return self.default_hedge_delay
+        return latency.percentile(self.hedge_percentile)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        validate: Callable[[str], Any],
+        models: Optional[Dict[str, str]] = None,
+        **options
+    ) -> Any:
+        """
+        Run a hedged completion
+
+        Args:
+            messages: Chat messages
+            validate: Converts completion text into the result; raising
+                      marks the response as invalid
+            models: Optional per-provider model overrides keyed by provider name
+
+        Returns:
+            The validated result of the first valid response
+        """
+        self.requests += 1
+        models = models or {}
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+
+        def launch(provider: LLMProvider) -> None:
+            task = asyncio.create_task(self._attempt(
+                provider, messages, validate, models.get(provider.name), dict(options)
+            ))
+            pending[task] = provider
+
+        launch(self.primary)
+        backups = iter(self.providers[1:])
+        last_error: Optional[Exception] = None
+        timeout: Optional[float] = (
+            self.hedge_delay(models.get(self.primary.name)) if len(self.providers) > 1 else None
+        )
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Primary is slower than its usual tail: hedge
+                    backup = next(backups, None)
+                    timeout = None
+                    if backup is not None:
+                        self.hedges += 1
+                        launch(backup)
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    self.wins[provider.name] += 1
+                    return result
+
+                # Every finished attempt failed: hedge immediately if we still can
+                backup = next(backups, None)
+                if backup is not None:
+                    self.hedges += 1
+                    launch(backup)
+                    timeout = None
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let the losers record their censored latency before returning
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        raise last_error or Exception("All LLM providers failed")
+
+    def stream(self, messages: List[Dict[str, str]], model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        """Stream from the primary provider (streams are not hedged)"""
+        return self.primary.stream(messages, model=model, **options)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_delay_seconds": {
+                model: self.hedge_delay(model) for model in {self.primary.model, *self.primary.latencies}
+            },
+            "providers": {
+                provider.name: {
+                    "model": provider.model,
+                    "wins": self.wins[provider.name],
+                    "cancelled": self.cancelled[provider.name],
+                    "latency": {
+                        model: histogram.snapshot() for model, histogram in provider.latencies.items()
+                    }
+                }
+                for provider in self.providers
+            }
+        }
+
+    async def _attempt(
+        self,
+        provider: LLMProvider,
+        messages: List[Dict[str, str]],
+        validate: Callable[[str], Any],
+        model: Optional[str],
+        options: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            text = await provider.complete(messages, model=model, **options)
+        except asyncio.CancelledError:
+            # Lost to a hedge: it would have taken at least this long
+            provider.latency(model).record(time.perf_counter() - started, censored=True)
+            self.cancelled[provider.name] += 1
+            raise
+        provider.latency(model).record(time.perf_counter() - started)
+        try:
+            return validate(text)
+        except Exception as e:
+            raise Exception(f"{provider.name} returned an invalid response: {str(e)}")
@@ -0,0 +1,106 @@
+"""
+Complexity-based model routing for bill parsing
+Short, clean receipts go to a fast model; long or messy ones go to a
+stronger model, and fast-model results that don't add up are re-parsed
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict
+from core.config import settings
+from services.llm_providers import LatencyHistogram
+
+FAST = "fast"
+STRONG = "strong"
+
+# A line ending in something that looks like a price, e.g. "Latte 2 x 3.50" or "TOTAL $12,40"
+PRICE_LINE_PATTERN = re.compile(r"\d+[.,]\d{2}\s*[A-Za-z€$£¥₹]{0,3}\s*$")
+
+
+@dataclass
+class ReceiptComplexity:
+    line_count: int
+    price_line_count: int
+    non_latin_ratio: float
+
+    @property
+    def language(self) -> str:
+        return "latin" if self.non_latin_ratio < settings.LLM_ROUTER_MAX_NON_LATIN_RATIO else "other"
+
+
+class RouteStats:
+    def __init__(self, latency_window: int):
+        self.requests = 0
+        self.escalations = 0
+        self.latency = LatencyHistogram(latency_window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+            "latency": self.latency.snapshot()
+        }
+
+
+class BillParseRouter:
+    def __init__(self):
+        self.models = {
+            FAST: settings.LLM_FAST_MODEL or settings.LLM_MODEL,
+            STRONG: settings.LLM_STRONG_MODEL
+        }
+        self.stats = {
+            FAST: RouteStats(settings.LLM_LATENCY_WINDOW),
+            STRONG: RouteStats(settings.LLM_LATENCY_WINDOW)
+        }
+
+    def classify(self, ocr_text: str) -> ReceiptComplexity:
+        """Measure OCR text features that predict parsing difficulty"""
+        lines = [line.strip() for line in ocr_text.splitlines() if line.strip()]
+        letters = [ch for ch in ocr_text if ch.isalpha()]
+        non_latin = sum(1 for ch in letters if ord(ch) > 0x24F)
+
+        return ReceiptComplexity(
+            line_count=len(lines),
+            price_line_count=sum(1 for line in lines if PRICE_LINE_PATTERN.search(line)),
+            non_latin_ratio=non_latin / len(letters) if letters else 0.0
+        )
+
+    def choose_route(self, complexity: ReceiptComplexity) -> str:
+        """Pick the fast route for short receipts in a Latin script"""
+        if (
+            complexity.line_count <= settings.LLM_ROUTER_MAX_SIMPLE_LINES
+            and complexity.price_line_count <= settings.LLM_ROUTER_MAX_SIMPLE_PRICE_LINES
+            and complexity.language == "latin"
+        ):
+            return FAST
+        return STRONG
+
+    @staticmethod
+    def reconciles(result: Dict[str, Any]) -> bool:
+        """
+        Check that the parsed item totals add up
+
+        Item totals must match total_amount, the subtotal, or total_amount
+        less tax, within a cent-level tolerance.
+        """
+        items_total = sum(float(item.get("total") or 0) for item in result.get("items", []))
+        total = float(result.get("total_amount") or 0)
+        tolerance = max(0.05, abs(total) * settings.LLM_RECONCILE_TOLERANCE)
+
+        candidates = [total]
+        if result.get("subtotal"):
+            candidates.append(float(result["subtotal"]))
+        if result.get("tax"):
+            candidates.append(total - float(result["tax"]))
+
+        return any(abs(items_total - candidate) <= tolerance for candidate in candidates)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            route: {"model": self.models[route], **stats.snapshot()}
+            for route, stats in self.stats.items()
+        }
+
+
+# Singleton instance
+bill_parse_router = BillParseRouter()
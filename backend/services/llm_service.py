@@ -1,17 +1,59 @@
 """
 LLM Service for parsing OCR text into structured bill data
-Supports OpenAI GPT-4o-mini (can be extended for Gemini)
+Uses OpenAI GPT-4o-mini by default, optionally hedged with a second
+OpenAI-compatible provider (e.g. a local model server)
 """
 import json
-from typing import Dict, Any
-from openai import OpenAI
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from core.config import settings
+from core.instrumentation import traced
+from services.bill_stream_parser import IncrementalBillParser
+from services.llm_providers import HedgedLLMClient, LLMProvider, OpenAICompatibleProvider
+from services.llm_router import BillParseRouter, bill_parse_router, FAST, STRONG
+
+
+def build_providers() -> List[LLMProvider]:
+    """Create the configured providers, primary first"""
+    providers: List[LLMProvider] = [
+        OpenAICompatibleProvider(
+            name="primary",
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.LLM_MODEL,
+            base_url=settings.LLM_BASE_URL,
+            latency_window=settings.LLM_LATENCY_WINDOW
+        )
+    ]
+    
+    if settings.LLM_HEDGE_BASE_URL:
+        providers.append(OpenAICompatibleProvider(
+            name="hedge",
+            # Local model servers usually accept any key
+            api_key=settings.LLM_HEDGE_API_KEY or "not-needed",
+            model=settings.LLM_HEDGE_MODEL or settings.LLM_MODEL,
+            base_url=settings.LLM_HEDGE_BASE_URL,
+            supports_json_mode=settings.LLM_HEDGE_SUPPORTS_JSON_MODE,
+            latency_window=settings.LLM_LATENCY_WINDOW
+        ))
+    
+    return providers
 
 
 class LLMService:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(
+        self,
+        client: Optional[HedgedLLMClient] = None,
+        router: Optional[BillParseRouter] = None
+    ):
+        self.client = client or HedgedLLMClient(
+            build_providers(),
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            default_hedge_delay=settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        )
+        self.router = router or bill_parse_router
         
+    @traced("llm")
     async def parse_bill_text(self, ocr_text: str) -> Dict[str, Any]:
         """
         Parse OCR extracted text into structured bill data
@@ -22,31 +64,101 @@ class LLMService:
         Returns:
             Structured bill data with items, amounts, etc.
         """
-        prompt = self._create_parsing_prompt(ocr_text)
+        route = self.router.choose_route(self.router.classify(ocr_text))
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a bill parsing assistant. Extract line items from receipts and return valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
+            result = await self._parse_with_route(ocr_text, route)
+            
+            # Re-parse with the stronger model when the fast one doesn't add up
+            if route == FAST and not self.router.reconciles(result):
+                self.router.stats[FAST].escalations += 1
+                result = await self._parse_with_route(ocr_text, STRONG)
+            
+            return result
+            
+        except Exception as e:
+            raise Exception(f"LLM parsing failed: {str(e)}")
+    
+    async def _parse_with_route(self, ocr_text: str, route: str) -> Dict[str, Any]:
+        """Run a parse on the route's model and record its latency"""
+        stats = self.router.stats[route]
+        stats.requests += 1
+        started = time.perf_counter()
+        
+        result = await self.client.complete(
+            self._create_messages(ocr_text),
+            validate=lambda text: self._validate_and_format(json.loads(text)),
+            models={self.client.primary.name: self.router.models[route]},
+            json_mode=True,
+            temperature=0.1
+        )
+        
+        stats.latency.record(time.perf_counter() - started)
+        return result
+    
+    @traced("llm")
+    async def stream_bill_text(self, ocr_text: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Parse OCR text with a streamed completion
+        
+        Args:
+            ocr_text: Raw text extracted from bill image
+            
+        Yields:
+            ("field", (key, value)) for top-level fields such as merchant_name,
+            ("item", item) for each validated line item as soon as it is decoded,
+            ("reparsing", model) if the fast model's items don't add up and the
+            bill is parsed again on the strong model, and finally
+            ("result", data) with the complete validated bill data, which
+            supersedes the streamed items
+        """
+        parser = IncrementalBillParser()
+        route = self.router.choose_route(self.router.classify(ocr_text))
+        stats = self.router.stats[route]
+        stats.requests += 1
+        started = time.perf_counter()
+        
+        try:
+            stream = self.client.stream(
+                self._create_messages(ocr_text),
+                model=self.router.models[route],
+                json_mode=True,
                 temperature=0.1
             )
             
-            result = json.loads(response.choices[0].message.content)
-            return self._validate_and_format(result)
+            async for delta in stream:
+                for kind, payload in parser.feed(delta):
+                    if kind == "item":
+                        payload = self._validate_item(payload)
+                    yield kind, payload
+            
+            result = self._validate_and_format(parser.result())
+            stats.latency.record(time.perf_counter() - started)
+            
+            # Same escalation as parse_bill_text, without streaming the re-parse
+            if route == FAST and not self.router.reconciles(result):
+                stats.escalations += 1
+                yield "reparsing", self.router.models[STRONG]
+                result = await self._parse_with_route(ocr_text, STRONG)
+            
+            yield "result", result
             
         except Exception as e:
             raise Exception(f"LLM parsing failed: {str(e)}")
     
+    def _create_messages(self, ocr_text: str) -> List[Dict[str, str]]:
+        """Create chat messages for bill parsing"""
+        return [
+            {
+                "role": "system",
+                "content": "You are a bill parsing assistant. Extract line items from receipts and return valid JSON."
+            },
+            {
+                "role": "user",
+                "content": self._create_parsing_prompt(ocr_text)
+            }
+        ]
+    
     def _create_parsing_prompt(self, ocr_text: str) -> str:
         """Create prompt for LLM to parse bill"""
         return f"""
@@ -91,16 +203,21 @@ Rules:
         
         # Validate each item
         for item in result["items"]:
-            if "description" not in item:
-                item["description"] = "Unknown Item"
-            if "quantity" not in item:
-                item["quantity"] = 1
-            if "unit_price" not in item:
-                item["unit_price"] = 0.0
-            if "total" not in item:
-                item["total"] = item["quantity"] * item["unit_price"]
+            self._validate_item(item)
         
         return result
+    
+    def _validate_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in missing fields of a single line item"""
+        if "description" not in item:
+            item["description"] = "Unknown Item"
+        if "quantity" not in item:
+            item["quantity"] = 1
+        if "unit_price" not in item:
+            item["unit_price"] = 0.0
+        if "total" not in item:
+            item["total"] = item["quantity"] * item["unit_price"]
+        return item
 
 
 # Singleton instance
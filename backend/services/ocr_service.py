@@ -2,17 +2,20 @@
 OCR Service for extracting text from bill images
 Supports both Tesseract (local) and Google Cloud Vision API
 """
-import os
+import asyncio
+import io
 from typing import Optional
 from PIL import Image
 import pytesseract
 from core.config import settings
+from core.instrumentation import traced
 
 
 class OCRService:
     def __init__(self):
         self.use_google_vision = bool(settings.GOOGLE_APPLICATION_CREDENTIALS)
         
+    @traced("ocr")
     async def extract_text_from_image(self, image_path: str) -> str:
         """
         Extract text from an image using OCR
@@ -20,33 +23,50 @@ class OCRService:
         Args:
             image_path: Path to the image file
             
+        Returns:
+            Extracted text as string
+        """
+        with open(image_path, 'rb') as image_file:
+            content = image_file.read()
+        
+        return await self.extract_text_from_bytes(content, image_path)
+    
+    @traced("ocr")
+    async def extract_text_from_bytes(self, content: bytes, filename: str) -> str:
+        """
+        Extract text from in-memory image content
+        
+        OCR is blocking (a Tesseract subprocess or a synchronous Vision
+        API call), so it runs in a worker thread to keep the event loop free.
+        
+        Args:
+            content: Image file content as bytes
+            filename: Original filename
+            
         Returns:
             Extracted text as string
         """
         if self.use_google_vision:
-            return await self._extract_with_google_vision(image_path)
+            return await asyncio.to_thread(self._extract_with_google_vision, content)
         else:
-            return await self._extract_with_tesseract(image_path)
+            return await asyncio.to_thread(self._extract_with_tesseract, content)
     
-    async def _extract_with_tesseract(self, image_path: str) -> str:
+    def _extract_with_tesseract(self, content: bytes) -> str:
         """Extract text using Tesseract OCR"""
         try:
-            image = Image.open(image_path)
+            image = Image.open(io.BytesIO(content))
             text = pytesseract.image_to_string(image)
             return text
         except Exception as e:
             raise Exception(f"Tesseract OCR failed: {str(e)}")
     
-    async def _extract_with_google_vision(self, image_path: str) -> str:
+    def _extract_with_google_vision(self, content: bytes) -> str:
         """Extract text using Google Cloud Vision API"""
         try:
             from google.cloud import vision
             
             client = vision.ImageAnnotatorClient()
             
-            with open(image_path, 'rb') as image_file:
-                content = image_file.read()
-            
             image = vision.Image(content=content)
             response = client.text_detection(image=image)
             texts = response.text_annotations
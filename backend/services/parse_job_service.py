@@ -0,0 +1,208 @@
+"""
+Parse Job Service
+Durable Postgres-backed queue for OCR + LLM bill parsing jobs
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.parse_job import ParseJob
+
+
+class JobQueue(ABC):
+    """
+    Claim, retry and completion of rows in a job table
+
+    ``model`` has ParseJob's status, attempt and locking columns;
+    subclasses add enqueue() and drop the job's payload in _release().
+    """
+
+    model: Any = None
+
+    @property
+    def visibility_timeout(self) -> int:
+        return settings.PARSE_JOB_VISIBILITY_TIMEOUT_SECONDS
+
+    def claim(self, db: Session, worker_id: str) -> Optional[Any]:
+        """
+        Claim the next runnable job
+
+        Pending jobs whose backoff has elapsed and running jobs whose
+        visibility timeout has expired are both eligible. Rows are locked
+        with FOR UPDATE SKIP LOCKED so concurrent workers never claim the
+        same job.
+
+        Args:
+            db: Database session
+            worker_id: Identifier recorded on the claimed job
+
+        Returns:
+            The claimed job, or None if the queue is empty
+        """
+        Job = self.model
+        while True:
+            now = datetime.utcnow()
+            job = (
+                db.query(Job)
+                .filter(or_(
+                    and_(Job.status == Job.PENDING, Job.available_at <= now),
+                    and_(Job.status == Job.RUNNING, Job.locked_until < now)
+                ))
+                .order_by(Job.available_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+
+            if job is None:
+                db.commit()
+                return None
+
+            if job.attempts >= job.max_attempts:
+                # A worker died holding the job on its final attempt
+                self._mark_failed(db, job, job.error or "Visibility timeout expired", now)
+                db.commit()
+                continue
+
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=self.visibility_timeout)
+            job.started_at = now
+            db.commit()
+            db.refresh(job)
+            return job
+
+    def complete(self, db: Session, job: Any, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store the result and release the job
+
+        Anything else the caller added to the session commits with it.
+
+        Returns:
+            False if the job was reclaimed by another worker in the meantime
+        """
+        if not self._still_owned(db, job, worker_id):
+            return False
+        job.status = self.model.SUCCEEDED
+        job.result = result
+        job.error = None
+        job.locked_by = None
+        job.locked_until = None
+        job.finished_at = datetime.utcnow()
+        self._release(db, job)
+        db.commit()
+        return True
+
+    def fail(self, db: Session, job: Any, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Schedule a retry with linear backoff, or fail the job permanently
+
+        Args:
+            retry: False fails the job permanently whatever its attempts
+
+        Returns:
+            False if the job was reclaimed by another worker in the meantime
+        """
+        if not self._still_owned(db, job, worker_id):
+            return False
+        now = datetime.utcnow()
+        if not retry or job.attempts >= job.max_attempts:
+            self._mark_failed(db, job, error, now)
+        else:
+            job.status = self.model.PENDING
+            job.error = error
+            job.locked_by = None
+            job.locked_until = None
+            job.available_at = now + timedelta(
+                seconds=settings.PARSE_JOB_RETRY_BACKOFF_SECONDS * job.attempts
+            )
+        db.commit()
+        return True
+
+    def metrics(self, db: Session) -> Dict[str, Any]:
+        """
+        Queue depth and age metrics
+
+        Returns:
+            Job counts per status and the age of the oldest pending job
+        """
+        Job = self.model
+        counts = dict(
+            db.query(Job.status, func.count(Job.id))
+            .group_by(Job.status)
+            .all()
+        )
+        oldest_pending = db.query(func.min(Job.created_at)).filter(
+            Job.status == Job.PENDING
+        ).scalar()
+
+        return {
+            "pending": counts.get(Job.PENDING, 0),
+            "running": counts.get(Job.RUNNING, 0),
+            "succeeded": counts.get(Job.SUCCEEDED, 0),
+            "failed": counts.get(Job.FAILED, 0),
+            "oldest_pending_age_seconds": (
+                (datetime.utcnow() - oldest_pending).total_seconds() if oldest_pending else 0.0
+            )
+        }
+
+    @staticmethod
+    def _still_owned(db: Session, job: Any, worker_id: str) -> bool:
+        """Lock the job row and check this worker still holds it"""
+        db.refresh(job, with_for_update=True)
+        if job.status != job.RUNNING or job.locked_by != worker_id:
+            db.rollback()
+            return False
+        return True
+
+    def _mark_failed(self, db: Session, job: Any, error: str, now: datetime) -> None:
+        job.status = self.model.FAILED
+        job.error = error
+        job.locked_by = None
+        job.locked_until = None
+        job.finished_at = now
+        self._release(db, job)
+
+    @abstractmethod
+    def _release(self, db: Session, job: Any) -> None:
+        """Drop the payload of a job that will not run again"""
+
+
+class ParseJobService(JobQueue):
+    model = ParseJob
+
+    def enqueue(self, db: Session, user_id: int, content: bytes, filename: str) -> ParseJob:
+        """
+        Create a pending parse job
+
+        Args:
+            db: Database session
+            user_id: ID of the user who submitted the image
+            content: Image file content as bytes
+            filename: Original filename
+
+        Returns:
+            The persisted job
+        """
+        job = ParseJob(
+            user_id=user_id,
+            filename=filename,
+            image_data=content,
+            status=ParseJob.PENDING,
+            max_attempts=settings.PARSE_JOB_MAX_ATTEMPTS,
+            available_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def _release(self, db: Session, job: ParseJob) -> None:
+        job.image_data = None
+
+
+# Singleton instance
+parse_job_service = ParseJobService()
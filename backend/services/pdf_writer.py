@@ -0,0 +1,201 @@
+"""
+Incremental PDF writer
+Emits each page as soon as it is laid out, so a long document can be
+streamed without holding it in memory. Only what settlement reports need:
+text in the standard Helvetica fonts, horizontal rules, A4 pages.
+"""
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PAGE_WIDTH = 595   # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+# Object numbers fixed up front; pages start after them
+CATALOG_ID = 1
+PAGES_ID = 2
+FONT_IDS = {"regular": 3, "bold": 4}
+FONT_NAMES = {"regular": "Helvetica", "bold": "Helvetica-Bold"}
+FIRST_PAGE_ID = 5
+
+# Helvetica advance widths (1/1000 em) for characters common in amounts;
+# everything else is approximated, which is only used for right alignment
+_WIDTHS = {**{digit: 556 for digit in "0123456789"}, ".": 278, ",": 278, "-": 333, " ": 278, "$": 556}
+_DEFAULT_WIDTH = 556
+
+
+def text_width(text: str, size: float) -> float:
+    return sum(_WIDTHS.get(char, _DEFAULT_WIDTH) for char in text) * size / 1000
+
+
+def _escape(text: str) -> bytes:
+    # Standard fonts use WinAnsiEncoding; anything outside it becomes '?'
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfWriter:
+    """
+    Writes a PDF one page at a time
+
+    ``start()``, then ``page()`` per page, then ``finish()``; each returns
+    the bytes to append to the output. Page objects point at the page
+    tree before it exists, which is written last together with the
+    cross-reference table.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.offsets: Dict[int, int] = {}
+        self.page_ids: List[int] = []
+        self.next_id = FIRST_PAGE_ID
+
+    def _object(self, object_id: int, body: bytes) -> bytes:
+        data = b"%d 0 obj\n%s\nendobj\n" % (object_id, body)
+        self.offsets[object_id] = self.position
+        self.position += len(data)
+        return data
+
+    def start(self) -> bytes:
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self.position = len(header)
+        fonts = b"".join(
+            self._object(
+                object_id,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                % FONT_NAMES[style].encode()
+            )
+            for style, object_id in FONT_IDS.items()
+        )
+        return header + fonts
+
+    def page(self, content: bytes) -> bytes:
+        """Write a page with the given content stream"""
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self.page_ids.append(page_id)
+
+        compressed = zlib.compress(content, 6)
+        resources = b" ".join(b"/F%d %d 0 R" % (object_id, object_id) for object_id in FONT_IDS.values())
+        return (
+            self._object(
+                content_id,
+                b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(compressed), compressed)
+            )
+            + self._object(
+                page_id,
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+                % (PAGES_ID, PAGE_WIDTH, PAGE_HEIGHT, resources, content_id)
+            )
+        )
+
+    def finish(self, title: str = "") -> bytes:
+        """Write the page tree, catalog, info and cross-reference table"""
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        info_id = self.next_id
+        body = (
+            self._object(PAGES_ID, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+            + self._object(CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_ID)
+            + self._object(info_id, b"<< /Title (%s) /Producer (SplitPerfect) >>" % _escape(title))
+        )
+
+        xref_offset = self.position
+        size = info_id + 1
+        entries = [b"0000000000 65535 f \n"] + [
+            b"%010d 00000 n \n" % self.offsets[object_id] if object_id in self.offsets
+            else b"0000000000 65535 f \n"
+            for object_id in range(1, size)
+        ]
+        return (
+            body
+            + b"xref\n0 %d\n%s" % (size, b"".join(entries))
+            + b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, CATALOG_ID, info_id, xref_offset)
+        )
+
+
+class PdfDocument:
+    """
+    Flowing text layout on top of PdfWriter
+
+    Each call returns the bytes of any page it completed (usually b""),
+    so callers can stream them as they go.
+    """
+
+    def __init__(self, title: str = "", footer: str = ""):
+        self.writer = PdfWriter()
+        self.title = title
+        self.footer = footer
+        self.ops: List[bytes] = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def start(self) -> bytes:
+        return self.writer.start()
+
+    def _ensure_space(self, height: float) -> bytes:
+        if self.y - height >= MARGIN or not self.ops:
+            return b""
+        return self.new_page()
+
+    def new_page(self) -> bytes:
+        """Finish the current page (if any) and start a fresh one"""
+        if not self.ops:
+            return b""
+        page_number = len(self.writer.page_ids) + 1
+        footer = f"{self.footer}  -  page {page_number}" if self.footer else f"Page {page_number}"
+        self._text(MARGIN, MARGIN / 2, footer, 8, "regular")
+        data = self.writer.page(b"\n".join(self.ops))
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+        return data
+
+    def _text(self, x: float, y: float, text: str, size: float, style: str) -> None:
+        self.ops.append(
+            b"BT /F%d %g Tf %.2f %.2f Td (%s) Tj ET" % (FONT_IDS[style], size, x, y, _escape(text))
+        )
+
+    def line(
+        self,
+        cells: Sequence[Tuple[float, str]],
+        size: float = 9,
+        style: str = "regular",
+        right: Optional[Tuple[float, str]] = None,
+        spacing: float = 1.45
+    ) -> bytes:
+        """
+        One line of text
+
+        Args:
+            cells: (x, text) pairs, left aligned at x
+            right: Optional (x, text) right aligned to end at x
+            spacing: Line height as a multiple of the font size
+        """
+        height = size * spacing
+        data = self._ensure_space(height)
+        self.y -= height
+        for x, text in cells:
+            if text:
+                self._text(x, self.y, text, size, style)
+        if right and right[1]:
+            self._text(right[0] - text_width(right[1], size), self.y, right[1], size, style)
+        return data
+
+    def rule(self, gap: float = 4) -> bytes:
+        """Horizontal line across the text area"""
+        data = self._ensure_space(gap * 2)
+        self.y -= gap
+        self.ops.append(b"0.6 w %d %.2f m %d %.2f l S" % (MARGIN, self.y, PAGE_WIDTH - MARGIN, self.y))
+        self.y -= gap
+        return data
+
+    def space(self, height: float) -> bytes:
+        data = self._ensure_space(height)
+        self.y -= height
+        return data
+
+    def finish(self) -> bytes:
+        if not self.ops and not self.writer.page_ids:
+            # A PDF needs at least one page
+            self.ops.append(b"")
+        return self.new_page() + self.writer.finish(self.title)
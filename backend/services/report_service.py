@@ -0,0 +1,293 @@
+"""
+Report Service
+Builds room summaries and renders settlement reports as PDF. Rendering
+runs in a bounded worker pool and streams each page to the client as soon
+as it is laid out; the finished file is cached per room version, so
+repeat downloads are plain file sends until the room changes.
+"""
+import asyncio
+import glob
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from core.config import settings
+from database import SessionLocal
+from models.bill import Bill, BillItem
+from models.room import Room
+from models.user import User
+from schemas import DebtTransaction, RoomSummary, UserBalance
+from services.pdf_writer import MARGIN, PAGE_WIDTH, PdfDocument
+from services.rollup_service import rollup_service
+from services.simplify_service import simplify_service
+
+# Bills are read from a server-side cursor in batches of this many item rows
+BILL_ROWS_BATCH_SIZE = 1000
+
+_DONE = object()
+
+
+class _Cancelled(Exception):
+    """The client went away; stop rendering"""
+
+
+def _money(amount: float) -> str:
+    sign = "-" if amount < -0.005 else ""
+    return f"{sign}${abs(amount):,.2f}"
+
+
+def _clip(text: str, length: int) -> str:
+    return text if len(text) <= length else text[:length - 3] + "..."
+
+
+class ReportService:
+    def __init__(self):
+        self.cache_dir = settings.REPORT_CACHE_PATH
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.REPORT_RENDER_WORKERS,
+            thread_name_prefix="report-render"
+        )
+
+    def summary(self, db: Session, room_id: int) -> RoomSummary:
+        """Balances and simplified debts of a room"""
+        room = db.query(Room).filter(Room.id == room_id).first()
+
+        # Calculate balances
+        paid, owed = simplify_service.calculate_totals(room_id, db)
+        balances = simplify_service.net_balances(paid, owed)
+
+        # Simplify debts
+        transactions = simplify_service.simplify_debts(balances)
+
+        # Get user names
+        users = db.query(User).filter(User.id.in_(balances.keys())).all()
+        user_map = {u.id: u.name for u in users}
+
+        # Format transactions
+        debt_transactions = [
+            DebtTransaction(
+                from_user_id=from_id,
+                from_user_name=user_map.get(from_id, "Unknown"),
+                to_user_id=to_id,
+                to_user_name=user_map.get(to_id, "Unknown"),
+                amount=amount
+            )
+            for from_id, to_id, amount in transactions
+        ]
+
+        # Calculate total expenses
+        total_expenses = sum(paid.values())
+
+        # Format balances
+        user_balances = []
+        for user_id, net_balance in balances.items():
+            total_paid = paid.get(user_id, 0.0)
+            total_owed = total_paid - net_balance
+
+            user_balances.append(UserBalance(
+                user_id=user_id,
+                user_name=user_map.get(user_id, "Unknown"),
+                total_paid=total_paid,
+                total_owed=total_owed,
+                net_balance=net_balance
+            ))
+
+        return RoomSummary(
+            room_id=room.id,
+            room_name=room.name,
+            total_expenses=total_expenses,
+            transactions=debt_transactions,
+            balances=user_balances
+        )
+
+    def cached_pdf(self, room_id: int, version: int) -> Optional[str]:
+        """Path of the cached PDF for this room version, if rendered already"""
+        path = self._cache_path(room_id, version)
+        return path if os.path.isfile(path) else None
+
+    def _cache_path(self, room_id: int, version: int) -> str:
+        return os.path.join(self.cache_dir, f"room-{room_id}-v{version}.pdf")
+
+    async def stream_pdf(self, room_id: int) -> AsyncIterator[bytes]:
+        """
+        Render a room's PDF report in the worker pool, yielding pages as they are produced
+
+        At most REPORT_STREAM_BUFFER_CHUNKS chunks wait for a slow client
+        before the renderer blocks. If the client disconnects, rendering
+        stops and nothing is cached.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.REPORT_STREAM_BUFFER_CHUNKS)
+        cancelled = threading.Event()
+
+        def emit(item) -> None:
+            if cancelled.is_set():
+                raise _Cancelled()
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce() -> None:
+            try:
+                self._render_to_cache(room_id, emit)
+                emit(_DONE)
+            except _Cancelled:
+                pass
+            except Exception as e:
+                if not cancelled.is_set():
+                    emit(e)
+
+        render = loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            # Unblock a renderer waiting on a full queue so it sees the cancel
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.shield(render)
+
+    def _render_to_cache(self, room_id: int, emit: Callable[[bytes], None]) -> None:
+        """Render from one consistent snapshot, teeing the output into the cache"""
+        db = SessionLocal()
+        tmp_path = None
+        try:
+            # Every query below sees the same snapshot as the version read first
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            version = db.scalar(select(Room.version).where(Room.id == room_id))
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".render-")
+            with os.fdopen(fd, "wb") as cache:
+                for chunk in self._render(db, room_id):
+                    if chunk:
+                        cache.write(chunk)
+                        emit(chunk)
+
+            path = self._cache_path(room_id, version)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            self._evict(room_id, keep=path)
+        finally:
+            db.close()
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _evict(self, room_id: int, keep: str) -> None:
+        """Remove cached reports of older versions of a room"""
+        for path in glob.glob(os.path.join(self.cache_dir, f"room-{room_id}-v*.pdf")):
+            if path != keep:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    def evict_room(self, room_id: int) -> None:
+        """Remove every cached report of a deleted room"""
+        self._evict(room_id, keep="")
+
+    def _render(self, db: Session, room_id: int) -> Iterator[bytes]:
+        summary = self.summary(db, room_id)
+        breakdown = rollup_service.category_breakdown(db, room_id)
+        generated = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+
+        doc = PdfDocument(title=f"{summary.room_name} - settlement report", footer=summary.room_name)
+        right = PAGE_WIDTH - MARGIN
+        yield doc.start()
+
+        yield doc.line([(MARGIN, summary.room_name)], size=18, style="bold")
+        yield doc.line([(MARGIN, f"Settlement report, generated {generated}")], size=9)
+        yield doc.space(8)
+        yield doc.line([(MARGIN, "Total expenses")], size=12, style="bold", right=(right, _money(summary.total_expenses)))
+
+        yield doc.space(10)
+        yield doc.line([(MARGIN, "Settlement")], size=13, style="bold")
+        yield doc.rule()
+        if summary.transactions:
+            for txn in summary.transactions:
+                yield doc.line(
+                    [(MARGIN, _clip(f"{txn.from_user_name} pays {txn.to_user_name}", 80))],
+                    right=(right, _money(txn.amount))
+                )
+        else:
+            yield doc.line([(MARGIN, "Everyone is settled up.")])
+
+        yield doc.space(10)
+        yield doc.line([(MARGIN, "Balances")], size=13, style="bold")
+        yield doc.rule()
+        yield doc.line([(MARGIN, "Member")], style="bold", right=(right, "Net"))
+        for balance in summary.balances:
+            yield doc.line(
+                [(MARGIN, _clip(balance.user_name, 40)), (300, f"paid {_money(balance.total_paid)}"),
+                 (400, f"owes {_money(balance.total_owed)}")],
+                right=(right, _money(balance.net_balance))
+            )
+
+        if breakdown:
+            yield doc.space(10)
+            yield doc.line([(MARGIN, "Spending by category")], size=13, style="bold")
+            yield doc.rule()
+            for category, amount in breakdown:
+                yield doc.line([(MARGIN, _clip(category, 60))], right=(right, _money(amount)))
+
+        yield doc.space(10)
+        yield doc.line([(MARGIN, "Bills")], size=13, style="bold")
+        yield doc.rule()
+        yield from self._render_bills(db, room_id, doc, right)
+
+        yield doc.finish()
+
+    @staticmethod
+    def _render_bills(db: Session, room_id: int, doc: PdfDocument, right: float) -> Iterator[bytes]:
+        """Every finalized bill with its items, oldest first, read in batches"""
+        rows = db.execute(
+            select(
+                Bill.id,
+                Bill.created_at,
+                Bill.merchant_name,
+                Bill.total_amount,
+                User.name.label("paid_by"),
+                BillItem.description,
+                BillItem.category,
+                BillItem.amount
+            )
+            .join(User, User.id == Bill.uploaded_by)
+            .outerjoin(BillItem, BillItem.bill_id == Bill.id)
+            .where(Bill.room_id == room_id, Bill.is_draft == False)
+            .order_by(Bill.created_at, Bill.id, BillItem.id)
+            .execution_options(yield_per=BILL_ROWS_BATCH_SIZE)
+        )
+
+        current_bill = None
+        for row in rows:
+            if row.id != current_bill:
+                current_bill = row.id
+                title = row.merchant_name or f"Bill #{row.id}"
+                yield doc.space(4)
+                yield doc.line(
+                    [(MARGIN, row.created_at.strftime("%Y-%m-%d") if row.created_at else ""),
+                     (120, _clip(f"{title} - paid by {row.paid_by}", 70))],
+                    style="bold",
+                    right=(right, _money(row.total_amount or 0.0))
+                )
+            if row.description is not None:
+                yield doc.line(
+                    [(120, _clip(row.description, 55)), (400, _clip(row.category, 18))],
+                    size=8,
+                    right=(right, _money(row.amount))
+                )
+
+        if current_bill is None:
+            yield doc.line([(MARGIN, "No bills yet.")])
+
+
+# Singleton instance
+report_service = ReportService()
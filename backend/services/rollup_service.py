@@ -0,0 +1,239 @@
+"""
+Rollup Service
+Keeps per-room category totals, per-room/category/day totals and
+per-user/category/day spending rollups up to date from bill writes, so
+reports never scan a room's items
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.bill import Bill, BillItem, BillItemShare
+from models.spending_rollup import RoomCategoryTotal, RoomCategoryDaily, UserCategoryDaily
+from services.balance_service import balance_service
+
+# Rollups of deleted spending end up as float dust rather than exact zeros
+MIN_REPORTED_AMOUNT = 0.005
+
+
+class RollupService:
+    @staticmethod
+    def bill_day(bill: Bill) -> date:
+        return (bill.created_at or datetime.utcnow()).date()
+
+    @staticmethod
+    def apply(
+        db: Session,
+        room_id: int,
+        day: date,
+        totals: Dict[str, float],
+        shares: Dict[Tuple[int, str], float]
+    ) -> None:
+        """
+        Add deltas to a room's rollups with one upsert per table
+
+        Args:
+            db: Database session (the caller commits)
+            room_id: Room the deltas belong to
+            day: Day of the bill the deltas come from
+            totals: Change in item amounts per category
+            shares: Change in spending per (user_id, category)
+        """
+        total_rows = [
+            {"room_id": room_id, "category": category, "amount": amount}
+            for category, amount in sorted(totals.items())
+            if amount
+        ]
+        if total_rows:
+            statement = insert(RoomCategoryTotal)
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[RoomCategoryTotal.room_id, RoomCategoryTotal.category],
+                    set_={"amount": RoomCategoryTotal.amount + statement.excluded.amount}
+                ),
+                total_rows
+            )
+            statement = insert(RoomCategoryDaily)
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[RoomCategoryDaily.room_id, RoomCategoryDaily.day, RoomCategoryDaily.category],
+                    set_={"amount": RoomCategoryDaily.amount + statement.excluded.amount}
+                ),
+                [{**row, "day": day} for row in total_rows]
+            )
+
+        share_rows = [
+            {"room_id": room_id, "day": day, "user_id": user_id, "category": category, "amount": amount}
+            for (user_id, category), amount in sorted(shares.items())
+            if amount
+        ]
+        if share_rows:
+            statement = insert(UserCategoryDaily)
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[
+                        UserCategoryDaily.room_id,
+                        UserCategoryDaily.day,
+                        UserCategoryDaily.user_id,
+                        UserCategoryDaily.category
+                    ],
+                    set_={"amount": UserCategoryDaily.amount + statement.excluded.amount}
+                ),
+                share_rows
+            )
+
+    def apply_items(
+        self,
+        db: Session,
+        bill: Bill,
+        items: Iterable[Tuple[str, float, Dict[int, float]]]
+    ) -> None:
+        """
+        Add (category, signed amount, weights) contributions of a bill's items
+
+        Item edits pass the old values negated and the new ones as is.
+        """
+        if bill.is_draft:
+            # Drafts are not part of reports until finalized
+            return
+
+        totals: Dict[str, float] = defaultdict(float)
+        shares: Dict[Tuple[int, str], float] = defaultdict(float)
+        for category, amount, weights in items:
+            totals[category] += amount
+            for user_id, owed in balance_service.split(amount, weights).items():
+                shares[(user_id, category)] += owed
+
+        self.apply(db, bill.room_id, self.bill_day(bill), totals, shares)
+
+    def apply_bill(self, db: Session, bill: Bill, sign: int = 1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) a finalized bill's contribution
+
+        Call after the bill's items are written, or before they are deleted.
+        """
+        if bill.is_draft:
+            return
+
+        weights: Dict[int, Dict[int, float]] = defaultdict(dict)
+        for item_id, user_id, weight in db.execute(
+            select(BillItemShare.item_id, BillItemShare.user_id, BillItemShare.weight)
+            .join(BillItem, BillItem.id == BillItemShare.item_id)
+            .where(BillItem.bill_id == bill.id)
+        ):
+            weights[item_id][user_id] = weight
+
+        items = db.execute(
+            select(BillItem.id, BillItem.category, BillItem.amount).where(BillItem.bill_id == bill.id)
+        ).all()
+        self.apply_items(db, bill, [
+            (row.category, sign * row.amount, weights.get(row.id, {}))
+            for row in items
+        ])
+
+    @staticmethod
+    def rebuild(db: Session, room_ids: List[int]) -> None:
+        """Recompute rollups from bills, items and shares (backfill and repair)"""
+        finalized = (Bill.room_id.in_(room_ids), Bill.is_draft == False)
+
+        db.execute(delete(RoomCategoryTotal).where(RoomCategoryTotal.room_id.in_(room_ids)))
+        db.execute(delete(RoomCategoryDaily).where(RoomCategoryDaily.room_id.in_(room_ids)))
+        db.execute(delete(UserCategoryDaily).where(UserCategoryDaily.room_id.in_(room_ids)))
+
+        db.execute(insert(RoomCategoryTotal).from_select(
+            ["room_id", "category", "amount"],
+            select(Bill.room_id, BillItem.category, func.sum(BillItem.amount))
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(*finalized)
+            .group_by(Bill.room_id, BillItem.category)
+        ))
+        day = func.date(Bill.created_at)
+        db.execute(insert(RoomCategoryDaily).from_select(
+            ["room_id", "day", "category", "amount"],
+            select(Bill.room_id, day, BillItem.category, func.sum(BillItem.amount))
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(*finalized)
+            .group_by(Bill.room_id, day, BillItem.category)
+        ))
+
+        share_amounts = (
+            select(
+                Bill.room_id,
+                func.date(Bill.created_at).label("day"),
+                BillItemShare.user_id,
+                BillItem.category,
+                (
+                    BillItem.amount * BillItemShare.weight
+                    / func.sum(BillItemShare.weight).over(partition_by=BillItemShare.item_id)
+                ).label("amount")
+            )
+            .join(BillItem, BillItem.id == BillItemShare.item_id)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .where(*finalized)
+            .subquery()
+        )
+        db.execute(insert(UserCategoryDaily).from_select(
+            ["room_id", "day", "user_id", "category", "amount"],
+            select(
+                share_amounts.c.room_id,
+                share_amounts.c.day,
+                share_amounts.c.user_id,
+                share_amounts.c.category,
+                func.sum(share_amounts.c.amount)
+            )
+            .group_by(
+                share_amounts.c.room_id,
+                share_amounts.c.day,
+                share_amounts.c.user_id,
+                share_amounts.c.category
+            )
+        ))
+
+    @staticmethod
+    def category_breakdown(
+        db: Session,
+        room_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        user_id: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Spending per category, largest first
+
+        Room-wide figures are item amounts, so they include items nobody
+        shares; a user's figures are that user's weighted shares. Without
+        filters this reads the room's category totals, a handful of rows
+        however long the room's history; a date range sums the room's (or
+        the user's) daily rollups over just those days.
+        """
+        if start is None and end is None and user_id is None:
+            query = (
+                select(RoomCategoryTotal.category, RoomCategoryTotal.amount.label("amount"))
+                .where(RoomCategoryTotal.room_id == room_id)
+            )
+        else:
+            rollup = RoomCategoryDaily if user_id is None else UserCategoryDaily
+            criteria = [rollup.room_id == room_id]
+            if start is not None:
+                criteria.append(rollup.day >= start)
+            if end is not None:
+                criteria.append(rollup.day <= end)
+            if user_id is not None:
+                criteria.append(UserCategoryDaily.user_id == user_id)
+            query = (
+                select(rollup.category, func.sum(rollup.amount).label("amount"))
+                .where(*criteria)
+                .group_by(rollup.category)
+            )
+
+        rows = db.execute(query).all()
+        return sorted(
+            ((row.category, round(row.amount, 2)) for row in rows if row.amount >= MIN_REPORTED_AMOUNT),
+            key=lambda row: (-row[1], row[0])
+        )
+
+
+# Singleton instance
+rollup_service = RollupService()
@@ -0,0 +1,35 @@
+"""
+Room Version Service
+A room's version changes whenever its balances, bills or members do, so
+anything derived from the room (e.g. cached PDF reports) can be keyed by it
+"""
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models.room import Room
+
+
+class RoomVersionService:
+    @staticmethod
+    def bump(db: Session, room_id: int) -> None:
+        """
+        Mark a room as changed (the caller commits)
+
+        Takes the room row's lock until commit, so versions are assigned
+        in commit order.
+        """
+        db.execute(
+            update(Room)
+            .where(Room.id == room_id)
+            .values(version=Room.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def current(db: Session, room_id: int) -> Optional[int]:
+        """Current version of a room, or None if it doesn't exist"""
+        return db.scalar(select(Room.version).where(Room.id == room_id))
+
+
+# Singleton instance
+room_version_service = RoomVersionService()
@@ -0,0 +1,124 @@
+"""
+Search Service
+Ranked search over bill item descriptions and merchant names in the rooms
+a user belongs to. Words are matched with the generated search_vector
+columns (stemmed, so "pizzas" finds "Pizza"), and typos with pg_trgm word
+similarity; both are served by GIN indexes. Items and merchants are
+matched in separate branches so each can use its own index. Without the
+pg_trgm extension, which only the migration creates, typos don't match.
+Draft bills are left out until their shares are assigned.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, literal, or_, select, text, union
+from sqlalchemy.orm import Session
+from models.bill import Bill, BillItem, SEARCH_CONFIG
+from models.room import Membership, Room
+from schemas import SearchPage, SearchResult
+
+# A merchant match counts for less than the item itself matching
+MERCHANT_WEIGHT = 0.5
+
+# Typo matches rank below word matches of similar quality
+SIMILARITY_WEIGHT = 0.2
+
+
+class SearchService:
+    def __init__(self):
+        self._trigram: Optional[bool] = None  # Whether pg_trgm is installed, checked on first search
+
+    def _has_trigram(self, db: Session) -> bool:
+        if self._trigram is None:
+            self._trigram = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+        return self._trigram
+
+    def search(
+        self,
+        db: Session,
+        user_id: int,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        room_id: Optional[int] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> SearchPage:
+        """
+        One page of the user's bill items matching ``query``, best first
+
+        Args:
+            db: Database session
+            user_id: Whose rooms to search; rooms they are not in are never matched
+            query: Words to find; web-search syntax ("quoted phrase", -word, or)
+            limit: Results per page
+            offset: next_offset of the previous page
+            room_id: Only this room
+            start: Only bills created on or after this day
+            end: Only bills created on or before this day
+        """
+        term = literal(query)
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+        rooms = select(Membership.room_id).where(Membership.user_id == user_id)
+
+        def matching(*conditions):
+            branch = (
+                select(BillItem.id)
+                .join(Bill, Bill.id == BillItem.bill_id)
+                .where(Bill.room_id.in_(rooms), Bill.is_draft.is_(False), or_(*conditions))
+            )
+            if room_id is not None:
+                branch = branch.where(Bill.room_id == room_id)
+            if start:
+                branch = branch.where(Bill.created_at >= datetime.combine(start, datetime.min.time()))
+            if end:
+                branch = branch.where(Bill.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+            return branch
+
+        item_conditions = [BillItem.search_vector.bool_op("@@")(tsquery)]
+        merchant_conditions = [Bill.search_vector.bool_op("@@")(tsquery)]
+        score = (
+            func.ts_rank_cd(BillItem.search_vector, tsquery)
+            + MERCHANT_WEIGHT * func.ts_rank_cd(Bill.search_vector, tsquery)
+        )
+        if self._has_trigram(db):
+            # "description %> term": some word of the description is similar to the term
+            item_conditions.append(BillItem.description.bool_op("%>")(term))
+            merchant_conditions.append(Bill.merchant_name.bool_op("%>")(term))
+            score = score + SIMILARITY_WEIGHT * func.greatest(
+                func.word_similarity(term, BillItem.description),
+                MERCHANT_WEIGHT * func.word_similarity(term, func.coalesce(Bill.merchant_name, ""))
+            )
+        score = score.label("score")
+
+        matched = union(matching(*item_conditions), matching(*merchant_conditions)).subquery()
+
+        rows = db.execute(
+            select(
+                BillItem.id.label("item_id"),
+                BillItem.bill_id,
+                Bill.room_id,
+                Room.name.label("room_name"),
+                BillItem.description,
+                BillItem.amount,
+                BillItem.category,
+                Bill.merchant_name,
+                Bill.created_at,
+                score
+            )
+            .join(matched, matched.c.id == BillItem.id)
+            .join(Bill, Bill.id == BillItem.bill_id)
+            .join(Room, Room.id == Bill.room_id)
+            .order_by(score.desc(), BillItem.id.desc())
+            .offset(offset)
+            .limit(limit + 1)  # One extra row tells whether there is a next page
+        ).all()
+
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+        return SearchPage(results=[SearchResult(**row._mapping) for row in rows], next_offset=next_offset)
+
+
+# Singleton instance
+search_service = SearchService()
@@ -3,7 +3,6 @@ Debt Simplification Service
 Implements algorithm to minimize number of transactions needed to settle debts
 """
 from typing import List, Dict, Tuple
-from collections import defaultdict
 
 
 class SimplifyService:
@@ -58,6 +57,25 @@ class SimplifyService:
         
         return transactions
     
+    @staticmethod
+    def calculate_totals(room_id: int, db) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """
+        Amount paid and amount owed by each member of a room
+        
+        Read from the running totals in room_balances, which bill and item
+        changes keep current (see balance_service).
+        
+        Args:
+            room_id: Room ID
+            db: Database session
+        
+        Returns:
+            (paid, owed) dictionaries mapping user_id to amount
+        """
+        from services.balance_service import balance_service
+        
+        return balance_service.totals(db, room_id)
+    
     @staticmethod
     def calculate_balances(room_id: int, db) -> Dict[int, float]:
         """
@@ -70,35 +88,16 @@ class SimplifyService:
         Returns:
             Dictionary mapping user_id to net balance
         """
-        from models.bill import Bill, BillItem
-        from models.room import Membership
-        
-        # Get all members in the room
-        memberships = db.query(Membership).filter(Membership.room_id == room_id).all()
-        member_ids = [m.user_id for m in memberships]
-        
-        # Initialize balances
-        balances = defaultdict(float)
-        for user_id in member_ids:
-            balances[user_id] = 0.0
-        
-        # Get all bills in the room
-        bills = db.query(Bill).filter(Bill.room_id == room_id).all()
-        
-        for bill in bills:
-            # Track who paid
-            balances[bill.uploaded_by] += bill.total_amount
-            
-            # Track who owes what
-            for item in bill.items:
-                if item.shared_by:
-                    # Split item cost among people who shared it
-                    split_amount = item.amount / len(item.shared_by)
-                    for user_id in item.shared_by:
-                        if user_id in balances:
-                            balances[user_id] -= split_amount
-        
-        return dict(balances)
+        paid, owed = SimplifyService.calculate_totals(room_id, db)
+        return SimplifyService.net_balances(paid, owed)
+    
+    @staticmethod
+    def net_balances(paid: Dict[int, float], owed: Dict[int, float]) -> Dict[int, float]:
+        """Net balance per user from calculate_totals output"""
+        return {
+            user_id: paid.get(user_id, 0.0) - owed.get(user_id, 0.0)
+            for user_id in paid.keys() | owed.keys()
+        }
 
 
 # Singleton instance
@@ -0,0 +1,386 @@
+"""
+Storage backends for bill images
+StorageService decides keys and URLs; a backend only moves bytes.
+S3 (or any S3-compatible server) and a local directory are supported.
+"""
+import asyncio
+import mimetypes
+import os
+import shutil
+import tempfile
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from typing import Any, BinaryIO, Dict, List, Optional, Protocol
+from core.config import settings
+
+# S3 requires every multipart part except the last to be at least 5 MiB
+MIN_MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024
+
+# Maximum number of keys accepted by a single DeleteObjects request
+DELETE_OBJECTS_BATCH_SIZE = 1000
+
+# Stored objects never change under a key: content-addressed originals,
+# derivatives of them and one-off presigned upload keys
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class _ThreadedReader:
+    """Async ``read`` over a blocking file object"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self.fileobj = fileobj
+
+    async def read(self, size: int = -1) -> bytes:
+        return await asyncio.to_thread(self.fileobj.read, size)
+
+
+class StorageBackend:
+    """Base class for object stores holding bill images"""
+
+    name = "base"
+
+    def __init__(self, base_url: str, chunk_size: int):
+        self.base_url = base_url.rstrip('/')
+        self.chunk_size = chunk_size
+
+    async def put(self, key: str, content: bytes, content_type: str) -> None:
+        """Store ``content`` under ``key``"""
+        raise NotImplementedError
+
+    async def put_stream(self, key: str, file: AsyncReadable, content_type: str) -> None:
+        """Store everything read from ``file`` under ``key``"""
+        raise NotImplementedError
+
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        """Size, content type and metadata of ``key``, or None if it doesn't exist"""
+        raise NotImplementedError
+
+    async def get(self, key: str) -> bytes:
+        """Content stored under ``key``"""
+        raise NotImplementedError
+
+    async def get_into(self, key: str, out: BinaryIO) -> None:
+        """Write the content stored under ``key`` to ``out`` without holding it in memory"""
+        raise NotImplementedError
+
+    async def delete_many(self, keys: List[str]) -> Dict[str, str]:
+        """Delete ``keys``, returning the ones that failed with their error"""
+        raise NotImplementedError
+
+    async def presign_post(
+        self,
+        key: str,
+        fields: Dict[str, str],
+        conditions: List[Any],
+        expires_in: int
+    ) -> Dict[str, Any]:
+        """POST policy letting a client upload ``key`` directly"""
+        raise NotImplementedError(f"Direct uploads are not supported by the {self.name} storage backend")
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    S3 or an S3-compatible server. boto3 is synchronous, so every call
+    runs in a worker thread.
+    """
+
+    name = "s3"
+
+    def __init__(self):
+        super().__init__(
+            settings.S3_PUBLIC_URL
+            or f"https://{settings.S3_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com",
+            max(settings.S3_MULTIPART_CHUNK_SIZE, MIN_MULTIPART_CHUNK_SIZE)
+        )
+        self.s3_client = boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            config=Config(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                retries={"max_attempts": 3, "mode": "adaptive"},
+                tcp_keepalive=True
+            )
+        )
+        self.bucket_name = settings.S3_BUCKET_NAME
+
+    async def put(self, key: str, content: bytes, content_type: str) -> None:
+        try:
+            await asyncio.to_thread(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=content,
+                ContentType=content_type,
+                CacheControl=IMMUTABLE_CACHE_CONTROL
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to upload to S3: {str(e)}")
+
+    async def put_stream(self, key: str, file: AsyncReadable, content_type: str) -> None:
+        """Upload with a single PUT, or a multipart upload if larger than one chunk"""
+        first_chunk = await file.read(self.chunk_size)
+        next_chunk = await file.read(self.chunk_size) if len(first_chunk) == self.chunk_size else b""
+
+        if not next_chunk:
+            await self.put(key, first_chunk, content_type)
+            return
+
+        try:
+            upload = await asyncio.to_thread(
+                self.s3_client.create_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                ContentType=content_type,
+                CacheControl=IMMUTABLE_CACHE_CONTROL
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to upload to S3: {str(e)}")
+        upload_id = upload["UploadId"]
+        parts = []
+
+        try:
+            chunk = first_chunk
+            while chunk:
+                part_number = len(parts) + 1
+                response = await asyncio.to_thread(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=chunk
+                )
+                parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+                chunk, next_chunk = next_chunk, (await file.read(self.chunk_size) if next_chunk else b"")
+
+            await asyncio.to_thread(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts}
+            )
+
+        except Exception as e:
+            await asyncio.to_thread(
+                self.s3_client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id
+            )
+            raise Exception(f"Failed to upload to S3: {str(e)}")
+
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            head = await asyncio.to_thread(
+                self.s3_client.head_object,
+                Bucket=self.bucket_name,
+                Key=key
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {
+            "size": head["ContentLength"],
+            "content_type": head.get("ContentType", ""),
+            "metadata": head.get("Metadata", {})
+        }
+
+    async def get(self, key: str) -> bytes:
+        try:
+            response = await asyncio.to_thread(
+                self.s3_client.get_object,
+                Bucket=self.bucket_name,
+                Key=key
+            )
+            return await asyncio.to_thread(response["Body"].read)
+        except ClientError as e:
+            raise Exception(f"Failed to download from S3: {str(e)}")
+
+    async def get_into(self, key: str, out: BinaryIO) -> None:
+        """Streamed to ``out`` by boto3's transfer manager"""
+        try:
+            await asyncio.to_thread(
+                self.s3_client.download_fileobj,
+                Bucket=self.bucket_name,
+                Key=key,
+                Fileobj=out
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to download from S3: {str(e)}")
+
+    async def delete_many(self, keys: List[str]) -> Dict[str, str]:
+        """Delete in batches of up to 1000 keys per DeleteObjects call"""
+        failed: Dict[str, str] = {}
+
+        for start in range(0, len(keys), DELETE_OBJECTS_BATCH_SIZE):
+            batch = keys[start:start + DELETE_OBJECTS_BATCH_SIZE]
+            try:
+                response = await asyncio.to_thread(
+                    self.s3_client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+            except ClientError as e:
+                failed.update({key: str(e) for key in batch})
+                continue
+
+            for error in response.get("Errors", []):
+                failed[error["Key"]] = f"{error.get('Code')}: {error.get('Message')}"
+
+        return failed
+
+    async def presign_post(
+        self,
+        key: str,
+        fields: Dict[str, str],
+        conditions: List[Any],
+        expires_in: int
+    ) -> Dict[str, Any]:
+        try:
+            return await asyncio.to_thread(
+                self.s3_client.generate_presigned_post,
+                Bucket=self.bucket_name,
+                Key=key,
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to presign upload: {str(e)}")
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Objects stored as files under a local directory and served by the
+    API itself (see routes/files.py). Writes go to a temporary file that
+    is renamed into place, so readers never see a partial object.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str, base_url: str, chunk_size: int = 1024 * 1024):
+        super().__init__(base_url, chunk_size)
+        self.root = os.path.realpath(root)
+
+    def path(self, key: str) -> Optional[str]:
+        """Filesystem path of ``key``, or None if it would escape the storage root"""
+        path = os.path.realpath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            return None
+        return path
+
+    def _require_path(self, key: str) -> str:
+        path = self.path(key)
+        if path is None:
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    async def put(self, key: str, content: bytes, content_type: str) -> None:
+        await asyncio.to_thread(self._write, self._require_path(key), [content])
+
+    async def put_stream(self, key: str, file: AsyncReadable, content_type: str) -> None:
+        path = self._require_path(key)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    await asyncio.to_thread(out.write, chunk)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _write(path: str, chunks: List[bytes]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            stat = await asyncio.to_thread(os.stat, path)
+        except FileNotFoundError:
+            return None
+        return {
+            "size": stat.st_size,
+            "content_type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "metadata": {}
+        }
+
+    async def get(self, key: str) -> bytes:
+        path = self._require_path(key)
+        try:
+            return await asyncio.to_thread(self._read, path)
+        except OSError as e:
+            raise Exception(f"Failed to read {key}: {str(e)}")
+
+    async def get_into(self, key: str, out: BinaryIO) -> None:
+        path = self._require_path(key)
+        try:
+            await asyncio.to_thread(self._copy, path, out, self.chunk_size)
+        except OSError as e:
+            raise Exception(f"Failed to read {key}: {str(e)}")
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _copy(path: str, out: BinaryIO, chunk_size: int) -> None:
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, out, chunk_size)
+
+    async def delete_many(self, keys: List[str]) -> Dict[str, str]:
+        return await asyncio.to_thread(self._delete_many, keys)
+
+    def _delete_many(self, keys: List[str]) -> Dict[str, str]:
+        failed: Dict[str, str] = {}
+        for key in keys:
+            path = self.path(key)
+            if path is None:
+                failed[key] = "Invalid object key"
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                failed[key] = str(e)
+        return failed
+
+
+def build_storage_backend() -> StorageBackend:
+    """Storage backend selected by STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageBackend(settings.LOCAL_STORAGE_PATH, settings.LOCAL_STORAGE_PUBLIC_URL)
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
@@ -1,71 +1,304 @@
 """
-Storage Service for uploading bill images to AWS S3
+Storage Service for bill images
+Decides object keys and public URLs; the configured storage backend
+(S3 or local disk) stores the bytes
 """
-import boto3
-from botocore.exceptions import ClientError
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Any, BinaryIO, Dict, List, Optional
 import uuid
 import os
 from core.config import settings
+from core.instrumentation import traced
+from services.storage_backends import (
+    AsyncReadable, StorageBackend, _ThreadedReader, build_storage_backend
+)
+
+logger = logging.getLogger(__name__)
 
 
 class StorageService:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
-        self.bucket_name = settings.S3_BUCKET_NAME
-    
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or build_storage_backend()
+        self.chunk_size = self.backend.chunk_size
+
+    @traced("storage")
     async def upload_bill_image(self, file_content: bytes, filename: str) -> str:
         """
-        Upload bill image to S3
-        
+        Store a bill image under a content-addressed key
+
+        Identical content maps to the same key, so re-uploading an image
+        that is already stored is a HEAD request instead of a transfer.
+
         Args:
             file_content: Image file content as bytes
             filename: Original filename
-            
+
         Returns:
             Public URL of uploaded image
         """
-        try:
-            # Generate unique filename
-            file_extension = os.path.splitext(filename)[1]
-            unique_filename = f"bills/{uuid.uuid4()}{file_extension}"
-            
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=unique_filename,
-                Body=file_content,
-                ContentType=self._get_content_type(file_extension)
+        key = self._content_key(hashlib.sha256(file_content).hexdigest(), filename)
+
+        if not await self.object_exists(key):
+            await self.backend.put(
+                key, file_content, self._get_content_type(os.path.splitext(filename)[1])
             )
-            
-            # Generate public URL
-            url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{unique_filename}"
-            return url
-            
-        except ClientError as e:
-            raise Exception(f"Failed to upload to S3: {str(e)}")
-    
-    async def delete_bill_image(self, image_url: str) -> bool:
-        """Delete bill image from S3"""
+
+        return self._public_url(key)
+
+    @traced("storage")
+    async def upload_bill_stream(
+        self,
+        file: AsyncReadable,
+        filename: str,
+        spool: Optional[BinaryIO] = None,
+        max_size: Optional[int] = None
+    ) -> str:
+        """
+        Stream a bill image to storage under a content-addressed key
+
+        The upload is hashed while it is copied into a spooled temporary
+        file (in memory up to one chunk, on disk beyond that). If the key
+        already exists nothing is transferred; otherwise the backend copies
+        the spool in chunks (on S3, files larger than one chunk use a
+        multipart upload, holding at most two chunks in memory). An upload
+        larger than ``max_size`` raises ValueError before anything is stored.
+
+        Args:
+            file: Source with an async ``read(size)`` (e.g. an UploadFile)
+            filename: Original filename
+            spool: Writable file to copy the upload into instead, left open
+                for the caller (e.g. a NamedTemporaryFile to read it back from)
+            max_size: Largest accepted upload in bytes
+
+        Returns:
+            Public URL of uploaded image
+        """
+        digest = hashlib.sha256()
+        size = 0
+        owns_spool = spool is None
+        if owns_spool:
+            spool = tempfile.SpooledTemporaryFile(max_size=self.chunk_size)
+
         try:
-            # Extract key from URL
-            key = image_url.split(f"{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/")[1]
-            
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=key
-            )
-            return True
-            
-        except Exception as e:
-            print(f"Failed to delete from S3: {str(e)}")
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise ValueError(f"File must be at most {max_size} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(spool.write, chunk)
+
+            key = self._content_key(digest.hexdigest(), filename)
+            if await self.object_exists(key):
+                return self._public_url(key)
+
+            spool.seek(0)
+            content_type = self._get_content_type(os.path.splitext(filename)[1])
+            await self.backend.put_stream(key, _ThreadedReader(spool), content_type)
+            return self._public_url(key)
+
+        finally:
+            if owns_spool:
+                spool.close()
+            else:
+                await asyncio.to_thread(spool.flush)
+
+    @traced("storage")
+    async def upload_import_archive(self, file: AsyncReadable) -> str:
+        """
+        Stream a bulk import ZIP archive to storage for a worker to process
+
+        Args:
+            file: Source with an async ``read(size)`` (e.g. an UploadFile)
+
+        Returns:
+            Object key of the stored archive
+        """
+        key = f"imports/{uuid.uuid4()}.zip"
+        await self.backend.put_stream(key, file, "application/zip")
+        return key
+
+    @traced("storage")
+    async def download_to_file(self, key: str, out: BinaryIO) -> None:
+        """Copy the object stored under ``key`` into a writable file"""
+        await self.backend.get_into(key, out)
+
+    @traced("storage")
+    async def object_exists(self, key: str) -> bool:
+        """Check whether an object is stored under ``key``"""
+        return await self.object_size(key) is not None
+
+    @traced("storage")
+    async def object_size(self, key: str) -> Optional[int]:
+        """Size of the object stored under ``key``, or None if it doesn't exist"""
+        head = await self.backend.head(key)
+        return head["size"] if head is not None else None
+
+    @traced("storage")
+    async def create_presigned_upload(
+        self,
+        room_id: int,
+        user_id: int,
+        filename: str,
+        content_type: str,
+        size: int
+    ) -> Dict[str, Any]:
+        """
+        Issue a short-lived POST policy for uploading straight to the bucket
+
+        The policy pins the key, content type, a maximum size and the
+        room/uploader metadata that confirm_presigned_upload checks.
+        Raises NotImplementedError on backends without direct uploads.
+
+        Args:
+            room_id: Room the image will belong to
+            user_id: Uploading user
+            filename: Original filename
+            content_type: Image content type the client will send
+            size: Declared file size in bytes
+
+        Returns:
+            Dict with the POST url, form fields, object key and expiry
+        """
+        key = f"bills/{room_id}/{uuid.uuid4()}{os.path.splitext(filename)[1]}"
+        fields = {
+            "Content-Type": content_type,
+            "x-amz-meta-room-id": str(room_id),
+            "x-amz-meta-uploaded-by": str(user_id)
+        }
+        conditions = [
+            {"Content-Type": content_type},
+            {"x-amz-meta-room-id": str(room_id)},
+            {"x-amz-meta-uploaded-by": str(user_id)},
+            ["content-length-range", 1, min(size, settings.MAX_IMAGE_UPLOAD_BYTES)]
+        ]
+
+        post = await self.backend.presign_post(
+            key, fields, conditions, settings.S3_PRESIGNED_EXPIRES_SECONDS
+        )
+
+        return {
+            "url": post["url"],
+            "fields": post["fields"],
+            "key": key,
+            "expires_in": settings.S3_PRESIGNED_EXPIRES_SECONDS
+        }
+
+    @traced("storage")
+    async def confirm_presigned_upload(self, key: str, room_id: int, user_id: int) -> str:
+        """
+        Verify a direct upload landed as issued
+
+        Args:
+            key: Object key returned by create_presigned_upload
+            room_id: Room the upload is being registered for
+            user_id: User confirming the upload
+
+        Returns:
+            Public URL of the uploaded image
+        """
+        if not key.startswith(f"bills/{room_id}/"):
+            raise ValueError("Upload key does not belong to this room")
+
+        try:
+            head = await self.backend.head(key)
+        except Exception:
+            head = None
+        if head is None:
+            raise ValueError("Upload not found")
+
+        metadata = head["metadata"]
+        if metadata.get("room-id") != str(room_id) or metadata.get("uploaded-by") != str(user_id):
+            raise ValueError("Upload was not issued to this user for this room")
+        if not head["content_type"].startswith("image/"):
+            raise ValueError("File must be an image")
+
+        return self._public_url(key)
+
+    @traced("storage")
+    async def upload_derivative(self, image_url: str, variant: str, content: bytes, content_type: str) -> str:
+        """
+        Store a derived version of a bill image next to the original
+
+        Args:
+            image_url: URL of the original image
+            variant: Derivative name, e.g. "display" or "thumb"
+            content: Derivative content as bytes
+            content_type: Derivative content type
+
+        Returns:
+            Public URL of the derivative
+        """
+        key = self.derivative_key(image_url, variant, content_type)
+        await self.backend.put(key, content, content_type)
+        return self._public_url(key)
+
+    @traced("storage")
+    async def delete_objects(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Delete objects in batches (up to 1000 keys per S3 DeleteObjects call)
+
+        Args:
+            keys: Object keys to delete
+
+        Returns:
+            Mapping of keys that could not be deleted to their error message
+        """
+        return await self.backend.delete_many(keys)
+
+    def derivative_key(self, image_url: str, variant: str, content_type: str) -> str:
+        """Object key of a derived version of a bill image"""
+        original_key = self.key_from_url(image_url)
+        if original_key is None:
+            raise ValueError("Image is not stored by this service")
+        stem = os.path.splitext(original_key.split("bills/", 1)[-1])[0]
+        extension = {'image/webp': '.webp', 'image/jpeg': '.jpg', 'image/png': '.png'}.get(content_type, '')
+        return f"bills/derived/{stem}_{variant}{extension}"
+
+    def public_url(self, key: str) -> str:
+        """Public URL of an object key"""
+        return self._public_url(key)
+
+    @traced("storage")
+    async def download_bill_image(self, image_url: str) -> bytes:
+        """Download a stored bill image"""
+        key = self.key_from_url(image_url)
+        if key is None:
+            raise ValueError("Image is not stored by this service")
+        return await self.backend.get(key)
+
+    @traced("storage")
+    async def delete_bill_image(self, image_url: str) -> bool:
+        """Delete a stored bill image"""
+        key = self.key_from_url(image_url)
+        if key is None:
             return False
-    
+        failed = await self.backend.delete_many([key])
+        if key in failed:
+            logger.warning("Failed to delete %s: %s", key, failed[key])
+            return False
+        return True
+
+    def _content_key(self, content_hash: str, filename: str) -> str:
+        """Object key derived from the SHA-256 of the content"""
+        file_extension = os.path.splitext(filename)[1].lower()
+        return f"bills/{content_hash}{file_extension}"
+
+    def _public_url(self, key: str) -> str:
+        return f"{self.backend.base_url}/{key}"
+
+    def key_from_url(self, image_url: Optional[str]) -> Optional[str]:
+        """Object key of a URL produced by this service, or None for any other URL"""
+        prefix = f"{self.backend.base_url}/"
+        if not image_url or not image_url.startswith(prefix) or len(image_url) == len(prefix):
+            return None
+        return image_url[len(prefix):]
+
     def _get_content_type(self, file_extension: str) -> str:
         """Get content type based on file extension"""
         content_types = {
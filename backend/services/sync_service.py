@@ -0,0 +1,147 @@
+"""
+Sync Service
+Delta sync for offline clients: the rooms, members, bills and items a user
+can see that changed since their last sync, plus tombstones for what was
+deleted. Rows carry the id of the transaction that last wrote them
+(models.sync.SYNC_VERSION) and the cursor handed back is the oldest
+transaction still running at the snapshot, so a write that commits after
+the sync is picked up by the next one however its id compares.
+"""
+from typing import Iterable
+from sqlalchemy import and_, insert, literal, or_, select, text, update
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.bill import Bill, BillItem
+from models.room import Membership, Room
+from models.sync import SYNC_VERSION, SyncTombstone
+from models.user import User
+from schemas import (
+    BillBase, BillItemResponse, SyncMember, SyncResponse, SyncRoom, SyncTombstoneResponse
+)
+
+SNAPSHOT_XMIN = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+class SyncService:
+    @staticmethod
+    def record_deleted(db: Session, entity: str, room_id: int, entity_ids: Iterable[int]) -> None:
+        """Leave tombstones for deleted bills or items (the caller commits)"""
+        rows = [{"entity": entity, "entity_id": entity_id, "room_id": room_id} for entity_id in entity_ids]
+        if rows:
+            db.execute(insert(SyncTombstone), rows)
+
+    @staticmethod
+    def record_room_deleted(db: Session, room_id: int) -> None:
+        """
+        Leave a tombstone for a room addressed to each of its members
+
+        Must run before the delete: the memberships go with the room.
+        """
+        db.execute(
+            insert(SyncTombstone).from_select(
+                ["entity", "entity_id", "room_id", "user_id"],
+                select(literal("room"), Membership.room_id, Membership.room_id, Membership.user_id)
+                .where(Membership.room_id == room_id)
+            )
+        )
+
+    @staticmethod
+    def touch_item(db: Session, item_id: int) -> None:
+        """Mark an item changed when only its shares were rewritten"""
+        db.execute(
+            update(BillItem)
+            .where(BillItem.id == item_id)
+            .values(sync_version=SYNC_VERSION)
+            .execution_options(synchronize_session=False)
+        )
+
+    def changes(self, user_id: int, since: int = 0) -> SyncResponse:
+        """
+        Everything visible to a user that changed at or after ``since``
+
+        Rooms the user joined since then are sent in full. Reads one
+        REPEATABLE READ snapshot in its own session, so the cursor matches
+        exactly what was read.
+        """
+        db = SessionLocal()
+        try:
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            cursor = db.scalar(select(SNAPSHOT_XMIN))
+
+            memberships = db.execute(
+                select(Membership.room_id, Membership.sync_version).where(Membership.user_id == user_id)
+            ).all()
+            room_ids = [row.room_id for row in memberships]
+            joined = [row.room_id for row in memberships if row.sync_version >= since]
+
+            def changed(version_column, room_column):
+                if not joined:
+                    return version_column >= since
+                return or_(version_column >= since, room_column.in_(joined))
+
+            rooms, members, bills, items = [], [], [], []
+            if room_ids:
+                rooms = [
+                    SyncRoom.model_validate(room)
+                    for room in db.scalars(
+                        select(Room).where(Room.id.in_(room_ids), changed(Room.sync_version, Room.id))
+                    )
+                ]
+                members = [
+                    SyncMember(**row._mapping)
+                    for row in db.execute(
+                        select(
+                            Membership.id, Membership.room_id, Membership.user_id, Membership.joined_at,
+                            User.name, User.email, User.avatar
+                        )
+                        .join(User, User.id == Membership.user_id)
+                        .where(
+                            Membership.room_id.in_(room_ids),
+                            changed(Membership.sync_version, Membership.room_id)
+                        )
+                    )
+                ]
+                bills = [
+                    BillBase.model_validate(bill)
+                    for bill in db.scalars(
+                        select(Bill).where(Bill.room_id.in_(room_ids), changed(Bill.sync_version, Bill.room_id))
+                    )
+                ]
+                # Shares come with the items in one selectin batch
+                items = [
+                    BillItemResponse.model_validate(item)
+                    for item in db.scalars(
+                        select(BillItem)
+                        .join(Bill, Bill.id == BillItem.bill_id)
+                        .where(Bill.room_id.in_(room_ids), changed(BillItem.sync_version, Bill.room_id))
+                    )
+                ]
+
+            deleted = []
+            if since:
+                visible = [SyncTombstone.user_id == user_id]
+                if room_ids:
+                    visible.append(and_(SyncTombstone.user_id.is_(None), SyncTombstone.room_id.in_(room_ids)))
+                deleted = [
+                    SyncTombstoneResponse(entity=row.entity, entity_id=row.entity_id, room_id=row.room_id)
+                    for row in db.execute(
+                        select(SyncTombstone.entity, SyncTombstone.entity_id, SyncTombstone.room_id)
+                        .where(SyncTombstone.sync_version >= since, or_(*visible))
+                        .order_by(SyncTombstone.id)
+                    )
+                ]
+
+            return SyncResponse(
+                cursor=cursor,
+                rooms=rooms,
+                members=members,
+                bills=bills,
+                items=items,
+                deleted=deleted
+            )
+        finally:
+            db.close()
+
+
+# Singleton instance
+sync_service = SyncService()
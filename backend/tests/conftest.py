@@ -0,0 +1,39 @@
+import os
+import pytest
+
+# core.config requires these; only tests using the db fixture reach the database
+for name, value in {
+    "DATABASE_URL": "postgresql://localhost/splitperfect_test",
+    "SECRET_KEY": "test",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+    "OPENAI_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def db():
+    """
+    Session on DATABASE_URL inside a transaction that is rolled back
+
+    Skips the test when the database is unreachable. The schema must be
+    migrated (alembic upgrade head).
+    """
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+    from database import engine
+
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("database not available")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
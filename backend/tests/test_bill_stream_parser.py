@@ -0,0 +1,93 @@
+"""Incremental decoding of streamed bill JSON"""
+import json
+from typing import Any, List, Tuple
+import pytest
+from services.bill_stream_parser import IncrementalBillParser
+
+BILL = {
+    "merchant_name": "Joe's \"Best\" {Cafe}",
+    "date": None,
+    "items": [
+        {"description": "Latte, \"large\" [oat]", "quantity": 2, "unit_price": 4.5, "total": 9.0},
+        {"description": "Back\\slash } brace", "quantity": 1, "unit_price": 3.0, "total": 3.0,
+         "modifiers": {"extra": ["shot", {"syrup": "vanilla"}]}},
+    ],
+    "tax": 0.75,
+    "total_amount": 12.75,
+    "paid": True,
+}
+
+EXPECTED = [
+    ("field", ("merchant_name", BILL["merchant_name"])),
+    ("field", ("date", None)),
+    ("item", BILL["items"][0]),
+    ("item", BILL["items"][1]),
+    ("field", ("tax", 0.75)),
+    ("field", ("total_amount", 12.75)),
+    ("field", ("paid", True)),
+]
+
+
+def parse(chunks: List[str]) -> Tuple[IncrementalBillParser, List[Tuple[str, Any]]]:
+    parser = IncrementalBillParser()
+    events: List[Tuple[str, Any]] = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return parser, events
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_two_chunks_split_at_every_boundary(indent):
+    document = json.dumps(BILL, indent=indent)
+
+    for split in range(len(document) + 1):
+        parser, events = parse([document[:split], document[split:]])
+
+        assert events == EXPECTED, f"split at {split}: {document[split - 5:split + 5]!r}"
+        assert parser.result() == BILL
+
+
+def test_one_character_at_a_time():
+    document = json.dumps(BILL)
+
+    parser, events = parse(list(document))
+
+    assert events == EXPECTED
+    assert parser.result() == BILL
+
+
+def test_items_are_emitted_as_soon_as_they_close():
+    document = json.dumps(BILL)
+    first_item_end = document.index('"total": 9.0}') + len('"total": 9.0}')
+
+    _, events = parse([document[:first_item_end]])
+
+    assert events == EXPECTED[:3]
+
+
+def test_truncated_input_emits_only_complete_values():
+    document = json.dumps(BILL)
+
+    for end in range(len(document)):
+        parser, events = parse([document[:end]])
+
+        assert events == EXPECTED[:len(events)]
+        with pytest.raises(ValueError):
+            parser.result()
+
+
+def test_field_is_held_until_its_value_ends():
+    parser = IncrementalBillParser()
+
+    # "12" may still become "125"
+    assert parser.feed('{"total_amount": 12') == []
+    assert parser.feed('5, "tax": 1') == [("field", ("total_amount", 125))]
+    assert parser.feed("}") == [("field", ("tax", 1))]
+
+
+def test_nested_arrays_outside_items_are_not_emitted():
+    document = json.dumps({"payments": [{"method": "card"}], "items": [], "total_amount": 0})
+
+    _, events = parse([document])
+
+    assert events == [("field", ("total_amount", 0))]
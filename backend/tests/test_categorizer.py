@@ -0,0 +1,85 @@
+"""Rule-based item categorization"""
+import pytest
+from services.categorizer_service import DEFAULT_CATEGORY, MAX_CATEGORY_LENGTH, CategorizerService
+
+categorizer = CategorizerService()
+
+
+@pytest.mark.parametrize("description, merchant_name, expected", [
+    # A merchant match decides for every item on the bill
+    ("Coffee", "Walmart Supercenter #12", "Groceries"),
+    ("Batteries", "Starbucks", "Dining"),
+    # Items of an unknown merchant fall back to their description
+    ("Coffee", "Corner Shop", "Dining"),
+    ("Coffee", None, "Dining"),
+])
+def test_merchant_takes_precedence_over_description(description, merchant_name, expected):
+    assert categorizer.categorize(description, merchant_name) == expected
+
+
+@pytest.mark.parametrize("description, merchant_name, expected", [
+    # "gas" alone is Transport
+    ("Gas bill March", None, "Utilities"),
+    # "train" is Transport, "ticket" Entertainment
+    ("Train ticket to Pune", None, "Travel"),
+    # "water" alone matches nothing, "bill" neither
+    ("Water bill", None, "Utilities"),
+    # "uber" alone is Transport
+    ("Paneer tikka", "Uber Eats", "Dining"),
+])
+def test_longer_phrase_beats_its_words(description, merchant_name, expected):
+    assert categorizer.categorize(description, merchant_name) == expected
+
+
+def test_leftmost_phrase_wins_between_equal_lengths():
+    assert categorizer.categorize("Rent and tip") == "Rent"
+    assert categorizer.categorize("Tip and rent") == "Dining"
+
+
+def test_matching_ignores_case_and_punctuation():
+    assert categorizer.categorize("  MILK (2L)  ") == "Groceries"
+    assert categorizer.categorize("Burger", "MCDONALD'S #4411") == "Dining"
+    assert categorizer.categorize("Shirt", "H&M Store") == "Shopping"
+
+
+def test_words_only_match_whole_tokens():
+    # "rent" inside "parent", "tea" inside "steak"
+    assert categorizer.categorize("Parent teacher meeting") == DEFAULT_CATEGORY
+    assert categorizer.categorize("Steak") == DEFAULT_CATEGORY
+
+
+@pytest.mark.parametrize("description, merchant_name", [
+    ("Garden hose", None),
+    ("Garden hose", "Local Hardware"),
+    ("", None),
+    ("12.50", ""),
+])
+def test_unmatched_items_get_the_default(description, merchant_name):
+    assert categorizer.categorize(description, merchant_name) == DEFAULT_CATEGORY
+
+
+def test_first_listed_category_wins_a_shared_phrase():
+    service = CategorizerService(
+        merchant_rules={},
+        description_rules={"First": ("pass",), "Second": ("pass", "boarding pass")}
+    )
+
+    assert service.categorize("Pass") == "First"
+    assert service.categorize("Boarding pass") == "Second"
+    assert service.categories == sorted(["First", "Second", DEFAULT_CATEGORY])
+
+
+def test_resolve_keeps_a_user_category():
+    assert categorizer.resolve("  Gifts ", "Milk") == "Gifts"
+
+
+def test_resolve_truncates_a_long_user_category():
+    category = categorizer.resolve("x" * 80, "Milk")
+
+    assert category == "x" * MAX_CATEGORY_LENGTH
+
+
+@pytest.mark.parametrize("category", [None, "", "   "])
+def test_resolve_categorizes_without_a_user_category(category):
+    assert categorizer.resolve(category, "Milk") == "Groceries"
+    assert categorizer.resolve(category, "Milk", "Shell") == "Transport"
@@ -0,0 +1,138 @@
+"""Accept-Encoding negotiation and the compression middleware"""
+import asyncio
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Tuple
+import brotli
+import pytest
+from starlette.datastructures import Headers
+from core.compression import CompressionMiddleware, compression, negotiate
+
+BODY = json.dumps([{"description": f"Item {n}", "amount": n} for n in range(200)]).encode()
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("*", "br"),
+    ("*;q=0.2, br;q=0", "gzip"),
+    ("identity;q=0, gzip", "gzip"),
+    # Nothing else is acceptable either, so identity is all that can be sent
+    ("identity;q=0", None),
+    ("GZIP;Q=0.5", "gzip"),
+    ("gzip;q=invalid, br;q=0.1", "br"),
+])
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding) == expected
+
+
+def app_sending(chunks: List[bytes], content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+    """ASGI app answering with ``chunks`` as its body messages"""
+    async def app(scope, receive, send):
+        raw = [(b"content-type", content_type.encode())]
+        if len(chunks) == 1:
+            raw.append((b"content-length", str(len(chunks[0])).encode()))
+        raw += [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+        await send({"type": "http.response.start", "status": 200, "headers": raw})
+        for n, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": n < len(chunks) - 1})
+    return app
+
+
+def request(app, accept_encoding: str = "br, gzip", endpoint: Any = None) -> Tuple[Headers, List[bytes]]:
+    messages: List[Dict[str, Any]] = []
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request"}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "endpoint": endpoint
+    }
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    headers = Headers(raw=messages[0]["headers"])
+    return headers, [message.get("body", b"") for message in messages[1:]]
+
+
+def test_body_is_compressed_with_the_negotiated_encoding():
+    headers, chunks = request(app_sending([BODY]), accept_encoding="gzip")
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(chunks[0]) < len(BODY)
+    assert gzip.decompress(chunks[0]) == BODY
+
+
+def test_small_body_is_sent_as_is():
+    headers, chunks = request(app_sending([b'{"ok": true}']))
+
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert chunks == [b'{"ok": true}']
+
+
+def test_route_can_lower_the_minimum_size():
+    @compression(minimum_size=0)
+    def endpoint():
+        pass
+
+    headers, chunks = request(app_sending([b'{"ok": true}']), endpoint=endpoint)
+
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(chunks[0]) == b'{"ok": true}'
+
+
+def test_route_can_opt_out():
+    @compression(enabled=False)
+    def endpoint():
+        pass
+
+    headers, chunks = request(app_sending([BODY]), endpoint=endpoint)
+
+    assert "content-encoding" not in headers
+    assert chunks == [BODY]
+
+
+def test_streamed_body_is_compressed_as_it_streams():
+    lines = [json.dumps({"n": n}).encode() + b"\n" for n in range(50)]
+
+    headers, chunks = request(app_sending(lines, content_type="application/x-ndjson"), accept_encoding="gzip")
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert len(chunks) == len(lines)
+    assert gzip.decompress(b"".join(chunks)) == b"".join(lines)
+
+
+def test_already_encoded_body_passes_through():
+    encoded = gzip.compress(BODY)
+
+    headers, chunks = request(app_sending([encoded], headers={"Content-Encoding": "gzip"}))
+
+    assert headers["content-encoding"] == "gzip"
+    assert "vary" not in headers
+    assert chunks == [encoded]
+
+
+@pytest.mark.parametrize("content_type", ["image/jpeg", "application/pdf", "text/event-stream"])
+def test_incompressible_types_pass_through(content_type):
+    headers, chunks = request(app_sending([BODY], content_type=content_type))
+
+    assert "content-encoding" not in headers
+    assert chunks == [BODY]
+
+
+def test_identity_request_is_not_compressed():
+    headers, chunks = request(app_sending([BODY]), accept_encoding="identity")
+
+    assert "content-encoding" not in headers
+    assert chunks == [BODY]
@@ -0,0 +1,77 @@
+"""Bulk ZIP import pipeline with fake storage, OCR and LLM stages"""
+import asyncio
+import io
+import zipfile
+from typing import Dict
+import pytest
+from services import import_service as import_module
+from services.import_service import import_service
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    """Upload, OCR and parse in memory; files named 'blank*' have no text"""
+    uploaded: Dict[str, bytes] = {}
+
+    async def upload_bill_image(content: bytes, filename: str) -> str:
+        url = f"https://bucket/bills/{filename}"
+        uploaded[url] = content
+        return url
+
+    async def create_derivatives(image_url: str, content: bytes):
+        raise Exception("No image worker in tests")
+
+    async def extract_text_from_bytes(content: bytes, filename: str) -> str:
+        return "" if filename.startswith("blank") else content.decode()
+
+    async def parse_bill_text(text: str):
+        if text == "unparseable":
+            raise Exception("Model returned invalid JSON")
+        return {"merchant_name": "Cafe", "total_amount": 3.0, "items": []}
+
+    monkeypatch.setattr(import_module.storage_service, "upload_bill_image", upload_bill_image)
+    monkeypatch.setattr(import_module.image_service, "create_derivatives", create_derivatives)
+    monkeypatch.setattr(import_module.ocr_service, "extract_text_from_bytes", extract_text_from_bytes)
+    monkeypatch.setattr(import_module.llm_service, "parse_bill_text", parse_bill_text)
+    return uploaded
+
+
+def archive(files: Dict[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_parsed_entries_keep_their_images(fake_stages):
+    result = asyncio.run(import_service.import_zip(archive({"a.jpg": b"TEA 3.00", "notes.txt": b"skip"})))
+
+    assert [entry.filename for entry in result.entries] == ["a.jpg"]
+    assert result.entries[0].image_url == "https://bucket/bills/a.jpg"
+    assert result.entries[0].parsed["merchant_name"] == "Cafe"
+    assert result.failures == []
+    assert result.unused_image_urls == []
+
+
+def test_uploads_of_failed_entries_are_reported(fake_stages):
+    result = asyncio.run(import_service.import_zip(archive({
+        "a.jpg": b"TEA 3.00",
+        "blank.jpg": b"",
+        "b.jpg": b"unparseable",
+    })))
+
+    assert [entry.filename for entry in result.entries] == ["a.jpg"]
+    assert sorted((failure["filename"], failure["stage"]) for failure in result.failures) == [
+        ("b.jpg", "llm"), ("blank.jpg", "ocr")
+    ]
+    assert sorted(result.unused_image_urls) == ["https://bucket/bills/b.jpg", "https://bucket/bills/blank.jpg"]
+    assert set(fake_stages) == {entry.image_url for entry in result.entries} | set(result.unused_image_urls)
+
+
+def test_invalid_archive_is_rejected(fake_stages):
+    with pytest.raises(Exception, match="not a valid ZIP archive"):
+        asyncio.run(import_service.import_zip(io.BytesIO(b"not a zip")))
+
+    assert fake_stages == {}
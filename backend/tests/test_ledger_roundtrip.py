@@ -0,0 +1,86 @@
+"""Exported ledgers read back by the CSV importer"""
+import csv
+import io
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List
+from services.export_service import CSV_COLUMNS, export_service
+from services.ledger_import_service import (
+    LIST_SEPARATOR, STAGING_COLUMNS, LedgerImportResult, ledger_import_service
+)
+
+
+def export_row(item_id: int, emails: List[str], weights: List[float]) -> SimpleNamespace:
+    """A row of the export query for an item of bill 1"""
+    return SimpleNamespace(
+        bill_id=1,
+        created_at=datetime(2024, 3, 1, 12, 30),
+        merchant_name="Corner Cafe",
+        uploaded_by=10,
+        paid_by="ana@example.com",
+        item_id=item_id,
+        description=f"Item {item_id}",
+        quantity=2,
+        unit_price=1.5,
+        amount=3.0,
+        category="Food",
+        user_ids=list(range(10, 10 + len(emails))) or None,
+        emails=emails or None,
+        weights=weights or None
+    )
+
+
+def round_trip(rows: List[SimpleNamespace]) -> List[Dict[str, str]]:
+    """Export ``rows`` as CSV and return the importer's staged rows"""
+    exported = ",".join(CSV_COLUMNS).encode() + b"\r\n" + export_service._encode_csv(rows)
+    result = LedgerImportResult(dry_run=True)
+    staged = io.StringIO(newline="")
+
+    ledger_import_service._normalize(io.BytesIO(exported), staged, result, {}, None, ";")
+
+    assert result.error_count == 0, result.errors
+    staged.seek(0)
+    return [dict(zip(STAGING_COLUMNS, row)) for row in csv.reader(staged)]
+
+
+def test_shares_and_weights_survive_the_round_trip():
+    staged = round_trip([export_row(1, ["ana@example.com", "ben@example.com"], [1.0, 2.5])])
+
+    assert len(staged) == 1
+    row = staged[0]
+    assert row["bill_ref"] == "1"
+    assert row["bill_date"] == "2024-03-01T12:30:00"
+    assert row["paid_by"] == "ana@example.com"
+    assert (row["quantity"], row["unit_price"], row["amount"]) == ("2", "1.5", "3.0")
+    assert row["shared_by"].split(LIST_SEPARATOR) == ["ana@example.com", "ben@example.com"]
+    assert row["weights"].split(LIST_SEPARATOR) == ["1.0", "2.5"]
+    assert row["unshared"] == "False"
+    assert (row["merchant"], row["category"]) == ("Corner Cafe", "Food")
+
+
+def test_unshared_items_stay_unshared():
+    staged = round_trip([export_row(1, [], [])])
+
+    assert staged[0]["shared_by"] == ""
+    assert staged[0]["unshared"] == "True"
+
+
+def test_empty_shared_by_still_means_every_member():
+    source = io.BytesIO(b"paid_by,description,amount,shared_by\r\nana@example.com,Tea,3,\r\n")
+    result = LedgerImportResult(dry_run=True)
+    staged = io.StringIO(newline="")
+
+    ledger_import_service._normalize(source, staged, result, {}, None, ";")
+
+    row = dict(zip(STAGING_COLUMNS, next(csv.reader(io.StringIO(staged.getvalue())))))
+    assert row["shared_by"] == ""
+    assert row["unshared"] == "False"
+
+
+def test_unshared_items_take_no_weights():
+    source = io.BytesIO(b"paid_by,description,amount,shared_by,weights\r\nana@example.com,Tea,3,-,2\r\n")
+    result = LedgerImportResult(dry_run=True)
+
+    ledger_import_service._normalize(source, io.StringIO(newline=""), result, {}, None, ";")
+
+    assert result.errors == [{"line": 2, "error": "weights must be empty when shared_by is -"}]
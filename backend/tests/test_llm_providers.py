@@ -0,0 +1,140 @@
+"""Hedged LLM requests against local fake providers"""
+import asyncio
+import json
+from typing import Dict, List, Optional
+import pytest
+from services.llm_providers import HedgedLLMClient, LatencyHistogram, LLMProvider
+
+
+class FakeProvider(LLMProvider):
+    """Answers after ``delay`` seconds with ``response``, or raises ``error``"""
+
+    def __init__(self, name: str, delay: float, response: str = '{"ok": true}', error: Optional[Exception] = None):
+        super().__init__(name, model=f"{name}-model")
+        self.delay = delay
+        self.response = response
+        self.error = error
+        self.calls: List[Optional[str]] = []
+        self.cancelled = 0
+
+    async def complete(self, messages: List[Dict[str, str]], model: Optional[str] = None, **options) -> str:
+        self.calls.append(model)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def run(client: HedgedLLMClient):
+    return asyncio.run(client.complete([{"role": "user", "content": "receipt"}], validate=json.loads))
+
+
+def test_fast_primary_is_not_hedged():
+    primary, hedge = FakeProvider("primary", 0.01), FakeProvider("hedge", 0.01)
+    client = HedgedLLMClient([primary, hedge], default_hedge_delay=0.5)
+
+    assert run(client) == {"ok": True}
+    assert hedge.calls == []
+    assert client.stats()["hedges"] == 0
+    assert client.stats()["providers"]["primary"]["wins"] == 1
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary, hedge = FakeProvider("primary", 5.0), FakeProvider("hedge", 0.01, '{"from": "hedge"}')
+    client = HedgedLLMClient([primary, hedge], default_hedge_delay=0.05)
+
+    assert run(client) == {"from": "hedge"}
+    assert primary.cancelled == 1
+    stats = client.stats()
+    assert stats["hedges"] == 1
+    assert stats["providers"]["hedge"]["wins"] == 1
+    assert stats["providers"]["primary"]["cancelled"] == 1
+
+
+def test_cancelled_primary_is_recorded_as_censored_sample():
+    primary, hedge = FakeProvider("primary", 5.0), FakeProvider("hedge", 0.01)
+    client = HedgedLLMClient([primary, hedge], default_hedge_delay=0.05)
+
+    run(client)
+
+    latency = primary.latency().snapshot()
+    assert latency["count"] == 1
+    assert latency["censored"] == 1
+    # At least as long as the primary ran before the hedge answered
+    assert latency["p50"] >= 0.05
+
+
+def test_hedge_delay_does_not_collapse_when_primary_keeps_losing():
+    primary, hedge = FakeProvider("primary", 0.01), FakeProvider("hedge", 0.01)
+    client = HedgedLLMClient([primary, hedge], hedge_percentile=50, min_samples=4, default_hedge_delay=0.05)
+    for _ in range(4):
+        run(client)
+    fast_delay = client.hedge_delay()
+
+    # The primary degrades: every request is hedged and the primary cancelled
+    primary.delay = 5.0
+    hedge.delay = 0.2
+    for _ in range(8):
+        run(client)
+
+    # Cancelled requests count at the time they ran, so the delay rises
+    assert primary.latency().censored_count == 8
+    assert client.hedge_delay() > fast_delay
+
+
+def test_hedge_delay_is_kept_per_model():
+    primary, hedge = FakeProvider("primary", 0.01), FakeProvider("hedge", 0.01)
+    client = HedgedLLMClient([primary, hedge], hedge_percentile=50, min_samples=4, default_hedge_delay=1.0)
+    for _ in range(4):
+        run(client)
+
+    # Slow requests to another model leave the default model's delay alone
+    primary.delay = 0.1
+    for _ in range(4):
+        asyncio.run(client.complete([], validate=json.loads, models={"primary": "strong"}))
+
+    assert primary.latency().count == 4 and primary.latency("strong").count == 4
+    assert client.hedge_delay() < 0.1 <= client.hedge_delay("strong")
+    assert set(client.stats()["hedge_delay_seconds"]) == {"primary-model", "strong"}
+
+
+def test_invalid_primary_response_hedges_immediately():
+    primary = FakeProvider("primary", 0.01, "not json")
+    hedge = FakeProvider("hedge", 0.01, '{"from": "hedge"}')
+    client = HedgedLLMClient([primary, hedge], default_hedge_delay=10.0)
+
+    assert run(client) == {"from": "hedge"}
+    assert client.stats()["hedges"] == 1
+
+
+def test_all_providers_failing_raises_last_error():
+    primary = FakeProvider("primary", 0.01, error=RuntimeError("primary down"))
+    hedge = FakeProvider("hedge", 0.01, error=RuntimeError("hedge down"))
+    client = HedgedLLMClient([primary, hedge], default_hedge_delay=10.0)
+
+    with pytest.raises(RuntimeError, match="hedge down"):
+        run(client)
+
+
+def test_per_provider_model_overrides():
+    primary = FakeProvider("primary", 0.01)
+    client = HedgedLLMClient([primary])
+
+    asyncio.run(client.complete([], validate=json.loads, models={"primary": "gpt-4o"}))
+
+    assert primary.calls == ["gpt-4o"]
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram(window=4)
+    for seconds in (0.1, 0.2, 0.3, 0.4, 0.5):
+        histogram.record(seconds)
+
+    # The oldest sample left the window
+    assert histogram.count == 4
+    assert histogram.percentile(50) == 0.3
+    assert histogram.percentile(99) == 0.5
@@ -0,0 +1,90 @@
+"""Model routing and escalation of bill parses, streamed and not"""
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional
+from services.llm_providers import HedgedLLMClient, LLMProvider
+from services.llm_router import BillParseRouter, FAST, STRONG
+from services.llm_service import LLMService
+
+SHORT_RECEIPT = "Cafe\nLatte 3.50\nMuffin 2.50\nTOTAL 6.00"
+
+
+def bill(*totals: float, total_amount: float) -> str:
+    return json.dumps({
+        "merchant_name": "Cafe",
+        "items": [{"description": f"Item {i}", "quantity": 1, "unit_price": t, "total": t} for i, t in enumerate(totals)],
+        "total_amount": total_amount
+    })
+
+
+class ScriptedProvider(LLMProvider):
+    """Answers with the response configured for each model"""
+
+    def __init__(self, responses: Dict[str, str]):
+        super().__init__("primary", model="default")
+        self.responses = responses
+        self.calls: List[Optional[str]] = []
+
+    async def complete(self, messages, model: Optional[str] = None, **options) -> str:
+        self.calls.append(model)
+        return self.responses[model]
+
+    async def stream(self, messages, model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        self.calls.append(model)
+        text = self.responses[model]
+        for start in range(0, len(text), 7):
+            yield text[start:start + 7]
+
+
+def service(responses: Dict[str, str]):
+    provider = ScriptedProvider(responses)
+    router = BillParseRouter()
+    router.models = {FAST: "fast-model", STRONG: "strong-model"}
+    return LLMService(client=HedgedLLMClient([provider]), router=router), provider
+
+
+def collect(llm: LLMService) -> List:
+    async def run():
+        return [event async for event in llm.stream_bill_text(SHORT_RECEIPT)]
+    return asyncio.run(run())
+
+
+def test_stream_that_adds_up_is_not_escalated():
+    llm, provider = service({"fast-model": bill(3.5, 2.5, total_amount=6.0)})
+
+    events = collect(llm)
+
+    assert provider.calls == ["fast-model"]
+    assert [kind for kind, _ in events].count("item") == 2
+    assert events[-1][0] == "result"
+    assert llm.router.stats[FAST].escalations == 0
+    assert llm.router.stats[FAST].latency.count == 1
+
+
+def test_stream_that_does_not_add_up_is_reparsed_on_strong_model():
+    llm, provider = service({
+        "fast-model": bill(3.5, total_amount=6.0),
+        "strong-model": bill(3.5, 2.5, total_amount=6.0),
+    })
+
+    events = collect(llm)
+
+    assert provider.calls == ["fast-model", "strong-model"]
+    assert ("reparsing", "strong-model") in events
+    kind, result = events[-1]
+    assert kind == "result"
+    assert [item["total"] for item in result["items"]] == [3.5, 2.5]
+    assert llm.router.stats[FAST].escalations == 1
+    assert llm.router.stats[STRONG].requests == 1
+
+
+def test_parse_escalates_when_fast_result_does_not_add_up():
+    llm, provider = service({
+        "fast-model": bill(1.0, total_amount=6.0),
+        "strong-model": bill(3.5, 2.5, total_amount=6.0),
+    })
+
+    result = asyncio.run(llm.parse_bill_text(SHORT_RECEIPT))
+
+    assert provider.calls == ["fast-model", "strong-model"]
+    assert len(result["items"]) == 2
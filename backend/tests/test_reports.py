@@ -0,0 +1,168 @@
+"""Streamed PDF output and the per-version report cache"""
+import asyncio
+import re
+import zlib
+from typing import Dict, Iterator, List
+import pytest
+from services import report_service as report_module
+from services.pdf_writer import MARGIN, PdfDocument, _escape
+from services.report_service import ReportService
+
+
+def write(doc: PdfDocument, lines: int) -> bytes:
+    output = doc.start()
+    for n in range(lines):
+        output += doc.line([(MARGIN, f"Line {n}")])
+    return output + doc.finish()
+
+
+def objects(pdf: bytes) -> Dict[int, bytes]:
+    """Objects by number, located through the cross-reference table"""
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))
+    assert pdf[startxref:].startswith(b"xref\n")
+    header, *entries = pdf[startxref:].split(b"trailer")[0].splitlines()[1:]
+    first, count = map(int, header.split())
+    assert first == 0 and len(entries) == count
+
+    found = {}
+    for number, entry in enumerate(entries):
+        offset, _, kind = entry.split()
+        if kind == b"n":
+            offset = int(offset)
+            assert pdf[offset:].startswith(b"%d 0 obj\n" % number), f"object {number} is not at {offset}"
+            found[number] = pdf[offset:pdf.index(b"\nendobj\n", offset)]
+    return found
+
+
+def page_texts(pdf: bytes) -> List[bytes]:
+    streams = re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)
+    return [zlib.decompress(stream) for stream in streams]
+
+
+def test_single_page_document():
+    pdf = write(PdfDocument(title="Flat 4"), 3)
+
+    found = objects(pdf)
+    assert pdf.startswith(b"%PDF-1.4\n")
+    assert b"/Type /Catalog /Pages 2 0 R" in found[1]
+    assert b"/Count 1" in found[2]
+    assert b"(Line 2) Tj" in page_texts(pdf)[0]
+
+
+def test_long_document_breaks_into_pages():
+    pdf = write(PdfDocument(footer="Flat 4"), 200)
+
+    found = objects(pdf)
+    page_ids = [int(n) for n in re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[(.*?)\]", found[2]).group(1))]
+    assert len(page_ids) > 1
+    assert re.search(rb"/Count (\d+)", found[2]).group(1) == str(len(page_ids)).encode()
+    assert all(b"/Type /Page " in found[page_id] for page_id in page_ids)
+
+    texts = page_texts(pdf)
+    assert b"(Line 199) Tj" in texts[-1]
+    assert b"(Flat 4  -  page %d) Tj" % len(page_ids) in texts[-1]
+
+
+def test_empty_document_still_has_a_page():
+    pdf = write(PdfDocument(), 0)
+
+    assert b"/Count 1" in objects(pdf)[2]
+
+
+def test_text_is_escaped():
+    assert _escape("a (b) \\ c") == b"a \\(b\\) \\\\ c"
+    # Outside WinAnsiEncoding
+    assert _escape("€5 ₹5") == b"\x805 ?5"
+
+    pdf = write(PdfDocument(title="Trip (2024)"), 0)
+    assert b"/Title (Trip \\(2024\\))" in pdf
+
+
+class FakeSession:
+    """The calls _render_to_cache makes on its session"""
+
+    def __init__(self, versions: Dict[int, int]):
+        self.versions = versions
+
+    def connection(self, execution_options=None):
+        pass
+
+    def scalar(self, statement):
+        room_id = statement.whereclause.right.value
+        return self.versions[room_id]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def reports(tmp_path, monkeypatch):
+    """A report service caching in tmp_path, rendering from fake room versions"""
+    versions = {1: 1, 2: 1}
+    renders: List[int] = []
+    service = ReportService()
+    service.cache_dir = str(tmp_path)
+
+    def render(db, room_id: int) -> Iterator[bytes]:
+        renders.append(room_id)
+        yield b"%PDF room " + str(room_id).encode()
+        yield b" version " + str(versions[room_id]).encode()
+
+    monkeypatch.setattr(report_module, "SessionLocal", lambda: FakeSession(versions))
+    monkeypatch.setattr(service, "_render", render)
+    return service, versions, renders
+
+
+async def collect(service: ReportService, room_id: int) -> bytes:
+    return b"".join([chunk async for chunk in service.stream_pdf(room_id)])
+
+
+def test_rendered_report_is_cached_for_its_version(reports):
+    service, versions, renders = reports
+    assert service.cached_pdf(1, 1) is None
+
+    streamed = asyncio.run(collect(service, 1))
+
+    assert streamed == b"%PDF room 1 version 1"
+    with open(service.cached_pdf(1, 1), "rb") as cached:
+        assert cached.read() == streamed
+    assert renders == [1]
+
+
+def test_version_bump_replaces_the_cached_report(reports, tmp_path):
+    service, versions, _ = reports
+    asyncio.run(collect(service, 1))
+    asyncio.run(collect(service, 2))
+
+    versions[1] = 2
+    asyncio.run(collect(service, 1))
+
+    assert service.cached_pdf(1, 1) is None
+    assert service.cached_pdf(1, 2) is not None
+    # Other rooms keep their reports
+    assert service.cached_pdf(2, 1) is not None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["room-1-v2.pdf", "room-2-v1.pdf"]
+
+
+def test_deleted_room_reports_are_evicted(reports):
+    service, _, _ = reports
+    asyncio.run(collect(service, 1))
+
+    service.evict_room(1)
+
+    assert service.cached_pdf(1, 1) is None
+
+
+def test_failed_render_leaves_nothing_cached(reports, tmp_path, monkeypatch):
+    service, _, _ = reports
+
+    def render(db, room_id: int) -> Iterator[bytes]:
+        yield b"%PDF partial"
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(service, "_render", render)
+
+    with pytest.raises(RuntimeError, match="database went away"):
+        asyncio.run(collect(service, 1))
+
+    assert list(tmp_path.iterdir()) == []
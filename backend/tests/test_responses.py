@@ -0,0 +1,103 @@
+"""Serving byte ranges of open files"""
+import asyncio
+import os
+from typing import Any, Dict, List
+import pytest
+from core.responses import FileRangeResponse, open_file
+
+
+def send_response(response: FileRangeResponse, method: str = "GET", extensions: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    messages: List[Dict[str, Any]] = []
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "method": method, "extensions": extensions or {}}
+    asyncio.run(response(scope, receive, send))
+    return messages
+
+
+def body(messages: List[Dict[str, Any]]) -> bytes:
+    return b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+
+
+def is_open(fd: int) -> bool:
+    try:
+        os.fstat(fd)
+    except OSError:
+        return False
+    return True
+
+
+def test_sends_the_range_and_closes_the_file(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"0123456789")
+    fd, stat = open_file(str(path))
+
+    messages = send_response(FileRangeResponse(fd, 2, 5, status_code=206))
+
+    assert stat.st_size == 10
+    assert messages[0]["status"] == 206
+    assert body(messages) == b"23456"
+    assert not is_open(fd)
+
+
+def test_sends_the_opened_file_after_it_is_replaced(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"version one")
+    fd, stat = open_file(str(path))
+
+    replacement = tmp_path / "new.pdf"
+    replacement.write_bytes(b"v2")
+    os.replace(replacement, path)
+    messages = send_response(FileRangeResponse(fd, 0, stat.st_size))
+
+    assert body(messages) == b"version one"
+
+
+def test_sends_the_opened_file_after_it_is_evicted(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"cached report")
+    fd, stat = open_file(str(path))
+
+    os.unlink(path)
+    messages = send_response(FileRangeResponse(fd, 0, stat.st_size))
+
+    assert body(messages) == b"cached report"
+
+
+def test_zero_copy_send_gets_the_descriptor(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"0123456789")
+    fd, stat = open_file(str(path))
+
+    messages = send_response(
+        FileRangeResponse(fd, 0, stat.st_size),
+        extensions={"http.response.zerocopysend": {}}
+    )
+
+    assert messages[1] == {
+        "type": "http.response.zerocopysend", "file": fd, "offset": 0, "count": 10, "more_body": False
+    }
+    assert not is_open(fd)
+
+
+def test_head_sends_no_body_and_closes_the_file(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"0123456789")
+    fd, _ = open_file(str(path))
+
+    messages = send_response(FileRangeResponse(fd, 0, 10), method="HEAD")
+
+    assert body(messages) == b""
+    assert not is_open(fd)
+
+
+def test_open_file_refuses_directories_and_missing_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        open_file(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        open_file(str(tmp_path / "missing.pdf"))
@@ -0,0 +1,85 @@
+"""Spending rollups against a database (skipped without one)"""
+import uuid
+from datetime import date, datetime
+from typing import List, Tuple
+from models.bill import Bill, BillItem, BillItemShare
+from models.room import Room
+from models.user import User
+from services.rollup_service import rollup_service
+
+
+def seed_room(db) -> Tuple[Room, List[User]]:
+    """Three days of bills, one item nobody shares and one draft"""
+    tag = uuid.uuid4().hex[:8]
+    users = [User(name=f"User {i}", email=f"{tag}-{i}@example.com", google_id=f"{tag}-{i}") for i in range(2)]
+    db.add_all(users)
+    db.flush()
+    room = Room(name="Flat", secret=Room.generate_secret(), created_by=users[0].id)
+    db.add(room)
+    db.flush()
+
+    bills = [
+        (datetime(2024, 3, 1, 9), False, [("Groceries", 30.0, {0: 1}), ("Dining", 12.5, {0: 1, 1: 1})]),
+        (datetime(2024, 3, 1, 23), False, [("Groceries", 4.25, {0: 2, 1: 1})]),
+        (datetime(2024, 3, 15, 12), False, [("Rent", 800.0, {0: 1, 1: 1}), ("Other", 7.0, {})]),
+        (datetime(2024, 4, 2, 8), False, [("Dining", 60.0, {1: 1})]),
+        (datetime(2024, 4, 3, 8), True, [("Dining", 999.0, {0: 1})]),
+    ]
+    for created_at, is_draft, items in bills:
+        bill = Bill(room_id=room.id, uploaded_by=users[0].id, image_url="", created_at=created_at,
+                    total_amount=sum(amount for _, amount, _ in items), is_draft=is_draft)
+        bill.items = [
+            BillItem(description=category, unit_price=amount, amount=amount, category=category,
+                     shares=[BillItemShare(user_id=users[n].id, weight=w) for n, w in weights.items()])
+            for category, amount, weights in items
+        ]
+        db.add(bill)
+        db.flush()
+        rollup_service.apply_bill(db, bill)
+    return room, users
+
+
+def test_date_filters_covering_every_day_match_the_totals(db):
+    room, _ = seed_room(db)
+
+    unfiltered = rollup_service.category_breakdown(db, room.id)
+
+    assert unfiltered == [("Rent", 800.0), ("Dining", 72.5), ("Groceries", 34.25), ("Other", 7.0)]
+    assert rollup_service.category_breakdown(db, room.id, start=date(2024, 3, 1)) == unfiltered
+    assert rollup_service.category_breakdown(db, room.id, end=date(2024, 4, 2)) == unfiltered
+    assert rollup_service.category_breakdown(
+        db, room.id, start=date(2000, 1, 1), end=date(2100, 1, 1)
+    ) == unfiltered
+
+
+def test_date_filters_select_days(db):
+    room, _ = seed_room(db)
+
+    assert rollup_service.category_breakdown(db, room.id, start=date(2024, 3, 1), end=date(2024, 3, 1)) == [
+        ("Groceries", 34.25), ("Dining", 12.5)
+    ]
+    assert rollup_service.category_breakdown(db, room.id, start=date(2024, 4, 1)) == [("Dining", 60.0)]
+
+
+def test_user_breakdowns_are_weighted_shares(db):
+    room, users = seed_room(db)
+
+    per_user = [dict(rollup_service.category_breakdown(db, room.id, user_id=user.id)) for user in users]
+
+    assert per_user[0] == {"Groceries": 32.83, "Dining": 6.25, "Rent": 400.0}
+    assert per_user[1] == {"Groceries": 1.42, "Dining": 66.25, "Rent": 400.0}
+
+
+def test_rebuild_matches_incremental_rollups(db):
+    room, _ = seed_room(db)
+    incremental = [
+        rollup_service.category_breakdown(db, room.id),
+        rollup_service.category_breakdown(db, room.id, start=date(2024, 3, 10)),
+    ]
+
+    rollup_service.rebuild(db, [room.id])
+
+    assert [
+        rollup_service.category_breakdown(db, room.id),
+        rollup_service.category_breakdown(db, room.id, start=date(2024, 3, 10)),
+    ] == incremental
@@ -0,0 +1,319 @@
+"""Bill image uploads against an in-memory S3 client and a local directory"""
+import asyncio
+import hashlib
+import io
+from typing import Any, Dict, List, Optional
+import pytest
+from botocore.exceptions import ClientError
+from core.config import settings
+from services.storage_backends import LocalStorageBackend, S3StorageBackend
+from services.storage_service import StorageService
+
+CHUNK_SIZE = 4
+
+
+class FakeS3Client:
+    """The boto3 S3 calls the backend makes, keeping objects in a dict"""
+
+    def __init__(self, fail_part: Optional[int] = None):
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[str] = []
+        self.fail_part = fail_part
+        self.reader: Optional["CountingReader"] = None
+        self.max_unsent = 0
+        self.sent = 0
+
+    def put_object(self, Bucket, Key, Body, ContentType, CacheControl=None, **kwargs):
+        self.calls.append("put_object")
+        self.objects[Key] = {"body": Body, "content_type": ContentType, "metadata": {}}
+
+    def head_object(self, Bucket, Key):
+        self.calls.append("head_object")
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        stored = self.objects[Key]
+        return {
+            "ContentLength": len(stored["body"]),
+            "ContentType": stored["content_type"],
+            "Metadata": stored["metadata"]
+        }
+
+    def create_multipart_upload(self, Bucket, Key, ContentType, CacheControl=None):
+        self.calls.append("create_multipart_upload")
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {"key": Key, "content_type": ContentType, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        if self.reader is not None:
+            # Bytes read from the source but not yet handed to S3
+            self.max_unsent = max(self.max_unsent, self.reader.bytes_read - self.sent)
+        if PartNumber == self.fail_part:
+            raise ClientError({"Error": {"Code": "InternalError"}}, "UploadPart")
+        self.uploads[UploadId]["parts"][PartNumber] = Body
+        self.sent += len(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append("complete_multipart_upload")
+        upload = self.uploads.pop(UploadId)
+        body = b"".join(upload["parts"][part["PartNumber"]] for part in MultipartUpload["Parts"])
+        self.objects[Key] = {"body": body, "content_type": upload["content_type"], "metadata": {}}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+        self.uploads.pop(UploadId)
+
+    def download_fileobj(self, Bucket, Key, Fileobj):
+        self.calls.append("download_fileobj")
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        Fileobj.write(self.objects[Key]["body"])
+
+    def generate_presigned_post(self, Bucket, Key, Fields, Conditions, ExpiresIn):
+        self.calls.append("generate_presigned_post")
+        self.policy = {"key": Key, "conditions": Conditions, "expires_in": ExpiresIn}
+        return {"url": f"https://{Bucket}.s3.amazonaws.com/", "fields": {**Fields, "key": Key, "policy": "signed"}}
+
+    def post_object(self, fields: Dict[str, str], body: bytes):
+        """Store an object the way a browser POST with ``fields`` would"""
+        self.objects[fields["key"]] = {
+            "body": body,
+            "content_type": fields.get("Content-Type", "binary/octet-stream"),
+            "metadata": {
+                name[len("x-amz-meta-"):]: value
+                for name, value in fields.items() if name.startswith("x-amz-meta-")
+            }
+        }
+
+
+class CountingReader:
+    """Async reader over bytes that counts what has been read"""
+
+    def __init__(self, content: bytes):
+        self.file = io.BytesIO(content)
+        self.bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = self.file.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def s3_backend(client: FakeS3Client) -> S3StorageBackend:
+    backend = S3StorageBackend()
+    backend.s3_client = client
+    backend.chunk_size = CHUNK_SIZE
+    return backend
+
+
+def test_small_upload_is_a_single_put():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+
+    url = asyncio.run(service.upload_bill_stream(CountingReader(b"abc"), "bill.jpg"))
+
+    key = service.key_from_url(url)
+    assert key.endswith(".jpg") and hashlib.sha256(b"abc").hexdigest() in key
+    assert client.objects[key]["body"] == b"abc"
+    assert client.objects[key]["content_type"] == "image/jpeg"
+    assert "create_multipart_upload" not in client.calls
+
+
+def test_large_upload_is_multipart():
+    content = b"0123456789abcdefghij!"
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+
+    url = asyncio.run(service.upload_bill_stream(CountingReader(content), "bill.png"))
+
+    assert client.objects[service.key_from_url(url)]["body"] == content
+    assert client.calls.count("upload_part") == 6
+    assert "complete_multipart_upload" in client.calls
+    assert not client.uploads
+
+
+def test_existing_content_is_not_transferred_again():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+    asyncio.run(service.upload_bill_stream(CountingReader(b"0123456789"), "bill.jpg"))
+    client.calls.clear()
+
+    asyncio.run(service.upload_bill_stream(CountingReader(b"0123456789"), "bill.jpg"))
+
+    assert client.calls == ["head_object"]
+
+
+def test_failed_part_aborts_the_multipart_upload():
+    client = FakeS3Client(fail_part=2)
+    service = StorageService(s3_backend(client))
+
+    with pytest.raises(Exception, match="Failed to upload to S3"):
+        asyncio.run(service.upload_bill_stream(CountingReader(b"0123456789abcdef"), "bill.jpg"))
+
+    assert client.calls[-1] == "abort_multipart_upload"
+    assert "complete_multipart_upload" not in client.calls
+    assert not client.uploads and not client.objects
+
+
+def test_oversized_upload_is_refused_before_anything_is_stored():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+
+    with pytest.raises(ValueError, match="at most 10 bytes"):
+        asyncio.run(service.upload_bill_stream(CountingReader(b"0123456789a"), "bill.jpg", max_size=10))
+
+    assert client.calls == []
+
+
+def test_multipart_upload_holds_at_most_two_chunks():
+    content = bytes(range(256)) * 4
+    client = FakeS3Client()
+    backend = s3_backend(client)
+    client.reader = CountingReader(content)
+
+    asyncio.run(backend.put_stream("bills/large.jpg", client.reader, "image/jpeg"))
+
+    assert client.objects["bills/large.jpg"]["body"] == content
+    assert client.calls.count("upload_part") == len(content) // CHUNK_SIZE
+    assert client.max_unsent <= 2 * CHUNK_SIZE
+
+
+def test_local_backend_streams_to_a_file(tmp_path):
+    service = StorageService(LocalStorageBackend(str(tmp_path), "http://files", chunk_size=CHUNK_SIZE))
+
+    url = asyncio.run(service.upload_bill_stream(CountingReader(b"0123456789"), "bill.jpg"))
+
+    key = service.key_from_url(url)
+    assert (tmp_path / key).read_bytes() == b"0123456789"
+    assert not [path for path in tmp_path.rglob(".upload-*")]
+
+
+def test_local_backend_keeps_nothing_of_an_oversized_upload(tmp_path):
+    service = StorageService(LocalStorageBackend(str(tmp_path), "http://files", chunk_size=CHUNK_SIZE))
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.upload_bill_stream(CountingReader(b"0123456789"), "bill.jpg", max_size=8))
+
+    assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+
+def test_import_archive_round_trips_through_s3():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+
+    key = asyncio.run(service.upload_import_archive(CountingReader(b"PK-archive-bytes")))
+    out = io.BytesIO()
+    asyncio.run(service.download_to_file(key, out))
+
+    assert key.startswith("imports/") and key.endswith(".zip")
+    assert client.objects[key]["content_type"] == "application/zip"
+    assert out.getvalue() == b"PK-archive-bytes"
+
+
+def test_import_archive_round_trips_through_local_storage(tmp_path):
+    service = StorageService(LocalStorageBackend(str(tmp_path), "http://files", chunk_size=CHUNK_SIZE))
+
+    key = asyncio.run(service.upload_import_archive(CountingReader(b"PK-archive-bytes")))
+    out = io.BytesIO()
+    asyncio.run(service.download_to_file(key, out))
+
+    assert out.getvalue() == b"PK-archive-bytes"
+
+
+def presign(service: StorageService, room_id: int = 7, user_id: int = 3, size: int = 1000) -> Dict[str, Any]:
+    return asyncio.run(service.create_presigned_upload(room_id, user_id, "bill.jpg", "image/jpeg", size))
+
+
+def test_presigned_upload_pins_key_type_metadata_and_size():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+
+    upload = presign(service, size=1000)
+
+    assert upload["key"].startswith("bills/7/") and upload["key"].endswith(".jpg")
+    assert upload["fields"]["key"] == upload["key"]
+    assert upload["expires_in"] == settings.S3_PRESIGNED_EXPIRES_SECONDS
+    assert client.policy["conditions"] == [
+        {"Content-Type": "image/jpeg"},
+        {"x-amz-meta-room-id": "7"},
+        {"x-amz-meta-uploaded-by": "3"},
+        ["content-length-range", 1, 1000]
+    ]
+
+
+def test_presigned_upload_size_is_capped():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+
+    presign(service, size=settings.MAX_IMAGE_UPLOAD_BYTES * 2)
+
+    assert client.policy["conditions"][-1] == ["content-length-range", 1, settings.MAX_IMAGE_UPLOAD_BYTES]
+
+
+def test_presigned_upload_keys_are_unique():
+    service = StorageService(s3_backend(FakeS3Client()))
+
+    assert presign(service)["key"] != presign(service)["key"]
+
+
+def test_confirm_accepts_the_upload_as_issued():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+    upload = presign(service)
+    client.post_object(upload["fields"], b"jpeg")
+
+    url = asyncio.run(service.confirm_presigned_upload(upload["key"], 7, 3))
+
+    assert service.key_from_url(url) == upload["key"]
+
+
+@pytest.mark.parametrize("room_id, user_id, message", [
+    (8, 3, "does not belong to this room"),
+    (7, 4, "not issued to this user"),
+])
+def test_confirm_rejects_another_room_or_user(room_id, user_id, message):
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+    upload = presign(service)
+    client.post_object(upload["fields"], b"jpeg")
+
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(service.confirm_presigned_upload(upload["key"], room_id, user_id))
+
+
+def test_confirm_rejects_a_missing_upload():
+    service = StorageService(s3_backend(FakeS3Client()))
+    upload = presign(service)
+
+    with pytest.raises(ValueError, match="not found"):
+        asyncio.run(service.confirm_presigned_upload(upload["key"], 7, 3))
+
+
+def test_confirm_rejects_an_object_without_the_issued_metadata():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+    key = "bills/7/planted.jpg"
+    client.put_object(Bucket="bucket", Key=key, Body=b"jpeg", ContentType="image/jpeg")
+
+    with pytest.raises(ValueError, match="not issued to this user"):
+        asyncio.run(service.confirm_presigned_upload(key, 7, 3))
+
+
+def test_confirm_rejects_a_non_image():
+    client = FakeS3Client()
+    service = StorageService(s3_backend(client))
+    upload = presign(service)
+    client.post_object({**upload["fields"], "Content-Type": "text/html"}, b"<html>")
+
+    with pytest.raises(ValueError, match="must be an image"):
+        asyncio.run(service.confirm_presigned_upload(upload["key"], 7, 3))
+
+
+def test_local_backend_has_no_direct_uploads(tmp_path):
+    service = StorageService(LocalStorageBackend(str(tmp_path), "http://files"))
+
+    with pytest.raises(NotImplementedError):
+        presign(service)
@@ -0,0 +1,73 @@
+"""
+Background worker for queued bill parse and ZIP import jobs
+Run with: python worker.py
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from core.config import settings
+from database import SessionLocal
+from services.ocr_service import ocr_service
+from services.llm_service import llm_service
+from services.parse_job_service import parse_job_service
+from services.import_job_service import import_job_service
+from services.image_cleanup_service import image_cleanup_service
+
+logger = logging.getLogger("worker")
+
+
+async def run_parse(content: bytes, filename: str) -> dict:
+    """Run OCR + LLM parsing on an image"""
+    ocr_text = await ocr_service.extract_text_from_bytes(content, filename)
+
+    if not ocr_text.strip():
+        raise Exception("Could not extract text from image")
+
+    return await llm_service.parse_bill_text(ocr_text)
+
+
+async def run_worker(worker_id: str) -> None:
+    """Claim and process jobs until interrupted"""
+    logger.info("Parse worker %s started", worker_id)
+
+    while True:
+        db = SessionLocal()
+        try:
+            job = parse_job_service.claim(db, worker_id)
+
+            if job is None:
+                import_job = import_job_service.claim(db, worker_id)
+                if import_job is not None:
+                    if await import_job_service.process(db, import_job, worker_id):
+                        logger.info("Import job %s finished", import_job.id)
+                    else:
+                        logger.warning(
+                            "Import job %s attempt %s failed: %s",
+                            import_job.id, import_job.attempts, import_job.error or "reclaimed"
+                        )
+                    continue
+
+                # Pick up image deletions whose request-time cleanup failed
+                await image_cleanup_service.run_in_background()
+                await asyncio.sleep(settings.PARSE_WORKER_POLL_INTERVAL_SECONDS)
+                continue
+
+            try:
+                result = await run_parse(job.image_data, job.filename)
+            except Exception as e:
+                parse_job_service.fail(db, job, worker_id, str(e))
+                logger.warning("Job %s attempt %s failed: %s", job.id, job.attempts, e)
+            else:
+                if not parse_job_service.complete(db, job, worker_id, result):
+                    logger.warning("Job %s was reclaimed before it finished", job.id)
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    asyncio.run(run_worker(worker_id))
@@ -32,3 +32,68 @@ api.interceptors.response.use(
 )
 
 export default api
+
+export interface ServerSentEvent {
+  event: string
+  data: any
+}
+
+// POST form data and read a text/event-stream response, invoking onEvent per frame
+export async function postEventStream(
+  path: string,
+  body: FormData,
+  onEvent: (event: ServerSentEvent) => void
+) {
+  const token = localStorage.getItem('token')
+  const response = await fetch(`${API_URL}${path}`, {
+    method: 'POST',
+    body,
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  })
+  await readEventStream(response, onEvent)
+}
+
+// GET a long-lived text/event-stream until the server closes it or signal aborts
+export async function subscribeEventStream(
+  path: string,
+  onEvent: (event: ServerSentEvent) => void,
+  signal: AbortSignal
+) {
+  const token = localStorage.getItem('token')
+  const response = await fetch(`${API_URL}${path}`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+    signal,
+  })
+  await readEventStream(response, onEvent)
+}
+
+async function readEventStream(response: Response, onEvent: (event: ServerSentEvent) => void) {
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed with status ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+
+      let event = 'message'
+      let data = ''
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (data) onEvent({ event, data: JSON.parse(data) })
+    }
+  }
+}
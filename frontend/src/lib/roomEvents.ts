@@ -0,0 +1,51 @@
+import { useEffect } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+import { subscribeEventStream } from '@/lib/api'
+
+// Refetch a room's cached queries when the server reports a change instead
+// of polling. Reconnects with backoff until the component unmounts.
+export function useRoomEvents(roomId: number | string | null | undefined) {
+  const queryClient = useQueryClient()
+
+  useEffect(() => {
+    if (!roomId) return
+    const controller = new AbortController()
+
+    const refresh = () => {
+      queryClient.invalidateQueries({ queryKey: ['room', String(roomId)] })
+      queryClient.invalidateQueries({ queryKey: ['summary', Number(roomId)] })
+      queryClient.invalidateQueries({ queryKey: ['my-bills'] })
+    }
+
+    const run = async () => {
+      let delay = 1000
+      let connected = false
+      while (!controller.signal.aborted) {
+        try {
+          await subscribeEventStream(
+            `/rooms/${roomId}/events`,
+            ({ event }) => {
+              delay = 1000
+              if (event === 'room_deleted') {
+                queryClient.invalidateQueries({ queryKey: ['rooms'] })
+                controller.abort()
+              }
+              refresh()
+            },
+            controller.signal
+          )
+        } catch {
+          if (controller.signal.aborted) return
+        }
+        // Anything published while disconnected was missed
+        if (connected) refresh()
+        connected = true
+        await new Promise((resolve) => setTimeout(resolve, delay))
+        delay = Math.min(delay * 2, 30000)
+      }
+    }
+
+    run()
+    return () => controller.abort()
+  }, [roomId, queryClient])
+}
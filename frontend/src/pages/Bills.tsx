@@ -1,37 +1,26 @@
-import { useQuery } from '@tanstack/react-query'
+import { useInfiniteQuery } from '@tanstack/react-query'
 import { Receipt } from 'lucide-react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
+import { Button } from '@/components/ui/button'
 import api from '@/lib/api'
-import { Bill, Room } from '@/types'
+import { BillFeedPage } from '@/types'
 import { formatCurrency, formatDate } from '@/lib/utils'
 
 export function Bills() {
-  const { data: rooms } = useQuery({
-    queryKey: ['rooms'],
-    queryFn: async () => {
-      const response = await api.get<Room[]>('/rooms')
+  // One request per page across all rooms, newest first
+  const { data, isLoading, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
+    queryKey: ['my-bills'],
+    queryFn: async ({ pageParam }) => {
+      const response = await api.get<BillFeedPage>('/bills/mine', {
+        params: pageParam ? { cursor: pageParam } : undefined,
+      })
       return response.data
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? null,
   })
 
-  const { data: allBills, isLoading } = useQuery({
-    queryKey: ['all-bills', rooms],
-    queryFn: async () => {
-      if (!rooms || rooms.length === 0) return []
-      
-      const billPromises = rooms.map((room) =>
-        api.get<Bill[]>(`/bills/room/${room.id}`).then((res) =>
-          res.data.map((bill) => ({ ...bill, roomName: room.name }))
-        )
-      )
-      
-      const billArrays = await Promise.all(billPromises)
-      return billArrays.flat().sort((a, b) => 
-        new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-      )
-    },
-    enabled: !!rooms && rooms.length > 0,
-  })
+  const allBills = data?.pages.flatMap((page) => page.bills)
 
   return (
     <div className="container max-w-2xl mx-auto p-4 space-y-6">
@@ -41,7 +30,7 @@ export function Bills() {
         <p className="text-muted-foreground">Loading...</p>
       ) : allBills && allBills.length > 0 ? (
         <div className="space-y-3">
-          {allBills.map((bill: any) => (
+          {allBills.map((bill) => (
             <Card key={bill.id}>
               <CardHeader>
                 <CardTitle className="flex items-center justify-between">
@@ -49,12 +38,12 @@ export function Bills() {
                   <Receipt className="h-5 w-5 text-muted-foreground" />
                 </CardTitle>
                 <CardDescription>
-                  {bill.roomName} • {formatDate(bill.created_at)}
+                  {bill.room_name} • {formatDate(bill.created_at)}
                 </CardDescription>
               </CardHeader>
               <CardContent>
                 <img
-                  src={bill.image_url}
+                  src={bill.thumbnail_url || bill.image_url}
                   alt="Bill"
                   className="w-full rounded-lg border"
                   loading="lazy"
@@ -65,6 +54,16 @@ export function Bills() {
               </CardContent>
             </Card>
           ))}
+          {hasNextPage && (
+            <Button
+              variant="outline"
+              className="w-full"
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+            >
+              {isFetchingNextPage ? 'Loading...' : 'Load more'}
+            </Button>
+          )}
         </div>
       ) : (
         <Card>
@@ -15,7 +15,12 @@ export function EditBill() {
   const { roomId } = useParams()
   const navigate = useNavigate()
   const location = useLocation()
-  const { parsedData, imageUrl } = location.state as { parsedData: ParsedBill; imageUrl: string }
+  const { parsedData, imageUrl, displayUrl, thumbnailUrl } = location.state as {
+    parsedData: ParsedBill
+    imageUrl: string
+    displayUrl?: string
+    thumbnailUrl?: string
+  }
 
   const [items, setItems] = useState<BillItem[]>([])
 
@@ -46,6 +51,8 @@ export function EditBill() {
         params: {
           room_id: roomId,
           image_url: imageUrl,
+          display_url: displayUrl,
+          thumbnail_url: thumbnailUrl,
         },
         data: items,
       })
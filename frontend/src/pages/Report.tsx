@@ -6,14 +6,15 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { Button } from '@/components/ui/button'
 import { Label } from '@/components/ui/label'
 import api from '@/lib/api'
+import { useRoomEvents } from '@/lib/roomEvents'
 import { Room, RoomSummary } from '@/types'
 import { formatCurrency } from '@/lib/utils'
-import jsPDF from 'jspdf'
 
 const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884D8', '#82CA9D']
 
 export function Report() {
   const [selectedRoomId, setSelectedRoomId] = useState<number | null>(null)
+  useRoomEvents(selectedRoomId)
 
   const { data: rooms } = useQuery({
     queryKey: ['rooms'],
@@ -33,32 +34,19 @@ export function Report() {
     enabled: !!selectedRoomId,
   })
 
-  const downloadPDF = () => {
+  const downloadPDF = async () => {
     if (!summary) return
 
-    const doc = new jsPDF()
-    
-    doc.setFontSize(20)
-    doc.text(summary.room_name, 20, 20)
-    
-    doc.setFontSize(12)
-    doc.text(`Total Expenses: ${formatCurrency(summary.total_expenses)}`, 20, 35)
-    
-    doc.setFontSize(14)
-    doc.text('Settlement Summary', 20, 50)
-    
-    doc.setFontSize(10)
-    let y = 60
-    summary.transactions.forEach((txn) => {
-      doc.text(
-        `${txn.from_user_name} pays ${txn.to_user_name}: ${formatCurrency(txn.amount)}`,
-        20,
-        y
-      )
-      y += 10
+    // Rendered server-side and cached per room version
+    const response = await api.get<Blob>(`/rooms/${selectedRoomId}/report.pdf`, {
+      responseType: 'blob',
     })
-    
-    doc.save(`${summary.room_name}-report.pdf`)
+    const url = URL.createObjectURL(response.data)
+    const link = document.createElement('a')
+    link.href = url
+    link.download = `${summary.room_name}-report.pdf`
+    link.click()
+    URL.revokeObjectURL(url)
   }
 
   // Prepare chart data
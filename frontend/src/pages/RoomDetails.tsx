@@ -5,6 +5,7 @@ import { useState } from 'react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import api from '@/lib/api'
+import { useRoomEvents } from '@/lib/roomEvents'
 import { Room } from '@/types'
 import { formatDate } from '@/lib/utils'
 
@@ -12,6 +13,7 @@ export function RoomDetails() {
   const { roomId } = useParams()
   const navigate = useNavigate()
   const [copied, setCopied] = useState(false)
+  useRoomEvents(roomId)
 
   const { data: room, isLoading } = useQuery({
     queryKey: ['room', roomId],
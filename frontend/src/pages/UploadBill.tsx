@@ -6,8 +6,8 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
 import { Label } from '@/components/ui/label'
-import api from '@/lib/api'
-import { ParsedBill, BillItem } from '@/types'
+import { postEventStream } from '@/lib/api'
+import { ParsedBill, ParsedBillItem, UploadedImage } from '@/types'
 
 export function UploadBill() {
   const { roomId } = useParams()
@@ -15,36 +15,52 @@ export function UploadBill() {
   const [file, setFile] = useState<File | null>(null)
   const [preview, setPreview] = useState<string | null>(null)
   const [parsedData, setParsedData] = useState<ParsedBill | null>(null)
-  const [imageUrl, setImageUrl] = useState<string | null>(null)
+  const [uploadedImage, setUploadedImage] = useState<UploadedImage | null>(null)
+  const [uploadError, setUploadError] = useState<string | null>(null)
+  const [streamedItems, setStreamedItems] = useState<ParsedBillItem[]>([])
+  const [merchantName, setMerchantName] = useState<string | null>(null)
+  const [parseStage, setParseStage] = useState<string | null>(null)
 
-  const uploadMutation = useMutation({
+  const parseMutation = useMutation({
     mutationFn: async (file: File) => {
+      // One request uploads the image and streams the parse
       const formData = new FormData()
       formData.append('file', file)
       formData.append('room_id', roomId!)
-      
-      const response = await api.post('/bills/upload', formData, {
-        headers: { 'Content-Type': 'multipart/form-data' },
-      })
-      return response.data.image_url
-    },
-    onSuccess: (url) => {
-      setImageUrl(url)
-      if (file) {
-        parseMutation.mutate(file)
-      }
-    },
-  })
+      setStreamedItems([])
+      setMerchantName(null)
+      setUploadedImage(null)
+      setUploadError(null)
+      setParseStage('Reading receipt...')
 
-  const parseMutation = useMutation({
-    mutationFn: async (file: File) => {
-      const formData = new FormData()
-      formData.append('file', file)
-      
-      const response = await api.post<ParsedBill>('/bills/parse', formData, {
-        headers: { 'Content-Type': 'multipart/form-data' },
+      let result: ParsedBill | null = null
+      await postEventStream('/bills/parse/stream', formData, ({ event, data }) => {
+        if (event === 'progress' && data.stage === 'ocr_complete') {
+          setParseStage('Parsing bill with AI...')
+        } else if (event === 'progress' && data.stage === 'reparsing') {
+          // The streamed items didn't add up; the result replaces them
+          setParseStage('Double-checking totals...')
+          setStreamedItems([])
+        } else if (event === 'uploaded') {
+          setUploadedImage(data)
+        } else if (event === 'upload_error') {
+          // The parse still completes; only the image has to be sent again
+          setUploadError(data.detail)
+        } else if (event === 'merchant') {
+          setMerchantName(data.merchant_name)
+        } else if (event === 'item') {
+          setStreamedItems((items) => [...items, data])
+        } else if (event === 'result') {
+          result = data
+        } else if (event === 'error') {
+          throw new Error(data.detail)
+        }
       })
-      return response.data
+
+      if (!result) {
+        throw new Error('Bill parsing ended without a result')
+      }
+      return result as ParsedBill
     },
     onSuccess: (data) => {
       setParsedData(data)
@@ -65,14 +81,19 @@ export function UploadBill() {
 
   const handleUpload = () => {
     if (file) {
-      uploadMutation.mutate(file)
+      parseMutation.mutate(file)
     }
   }
 
   const handleContinue = () => {
-    if (parsedData && imageUrl) {
+    if (parsedData && uploadedImage) {
       navigate(`/bills/edit/${roomId}`, {
-        state: { parsedData, imageUrl },
+        state: {
+          parsedData,
+          imageUrl: uploadedImage.image_url,
+          displayUrl: uploadedImage.display_url,
+          thumbnailUrl: uploadedImage.thumbnail_url,
+        },
       })
     }
   }
@@ -97,7 +118,7 @@ export function UploadBill() {
               type="file"
               accept="image/*"
               onChange={handleFileChange}
-              disabled={uploadMutation.isPending || parseMutation.isPending}
+              disabled={parseMutation.isPending}
             />
           </div>
 
@@ -107,22 +128,38 @@ export function UploadBill() {
             </div>
           )}
 
-          {!parsedData && file && !uploadMutation.isPending && !parseMutation.isPending && (
+          {!parsedData && file && !parseMutation.isPending && (
             <Button onClick={handleUpload} className="w-full">
               <Upload className="h-4 w-4 mr-2" />
               Upload & Parse Bill
             </Button>
           )}
 
-          {(uploadMutation.isPending || parseMutation.isPending) && (
+          {parseMutation.isPending && (
             <div className="flex items-center justify-center p-8">
               <Loader2 className="h-8 w-8 animate-spin text-primary" />
               <p className="ml-4">
-                {uploadMutation.isPending ? 'Uploading...' : 'Parsing bill with AI...'}
+                {parseStage}
               </p>
             </div>
           )}
 
+          {parseMutation.isPending && (merchantName || streamedItems.length > 0) && (
+            <div className="border rounded-lg p-4 space-y-1 text-sm">
+              {merchantName && <p className="font-medium">{merchantName}</p>}
+              {streamedItems.map((item, index) => (
+                <div key={index} className="flex justify-between text-muted-foreground">
+                  <span>{item.quantity} × {item.description}</span>
+                  <span>${item.total.toFixed(2)}</span>
+                </div>
+              ))}
+            </div>
+          )}
+
+          {parseMutation.isError && (
+            <p className="text-sm text-destructive">{(parseMutation.error as Error).message}</p>
+          )}
+
           {parsedData && (
             <div className="space-y-4">
               <div className="bg-green-50 border border-green-200 rounded-lg p-4">
@@ -135,9 +172,19 @@ export function UploadBill() {
                 </p>
               </div>
 
-              <Button onClick={handleContinue} className="w-full">
-                Continue to Edit Items
-              </Button>
+              {uploadError ? (
+                <>
+                  <p className="text-sm text-destructive">{uploadError}</p>
+                  <Button onClick={handleUpload} className="w-full">
+                    <Upload className="h-4 w-4 mr-2" />
+                    Try Again
+                  </Button>
+                </>
+              ) : (
+                <Button onClick={handleContinue} className="w-full">
+                  Continue to Edit Items
+                </Button>
+              )}
             </div>
           )}
         </CardContent>
@@ -16,6 +16,11 @@ export interface Room {
   members?: User[]
 }
 
+export interface ItemShare {
+  user_id: number
+  weight: number
+}
+
 export interface BillItem {
   id?: number
   bill_id?: number
@@ -24,6 +29,8 @@ export interface BillItem {
   unit_price: number
   amount: number
   shared_by: number[]
+  shares?: ItemShare[]
+  category?: string
   created_at?: string
 }
 
@@ -32,11 +39,48 @@ export interface Bill {
   room_id: number
   uploaded_by: number
   image_url: string
+  display_url?: string
+  thumbnail_url?: string
+  merchant_name?: string
   total_amount: number
+  is_draft?: boolean
   created_at: string
   items: BillItem[]
 }
 
+export interface FeedBill extends Bill {
+  room_name: string
+}
+
+export interface BillFeedPage {
+  bills: FeedBill[]
+  next_cursor?: string | null
+}
+
+export interface SearchResult {
+  item_id: number
+  bill_id: number
+  room_id: number
+  room_name: string
+  description: string
+  amount: number
+  category: string
+  merchant_name?: string | null
+  created_at: string
+  score: number
+}
+
+export interface SearchPage {
+  results: SearchResult[]
+  next_offset?: number | null
+}
+
+export interface UploadedImage {
+  image_url: string
+  display_url?: string
+  thumbnail_url?: string
+}
+
 export interface ParsedBillItem {
   description: string
   quantity: number
@@ -49,6 +93,7 @@ export interface ParsedBill {
   total_amount: number
   merchant_name?: string
   date?: string
+  image_url?: string | null
 }
 
 export interface DebtTransaction {
@@ -74,3 +119,46 @@ export interface RoomSummary {
   transactions: DebtTransaction[]
   balances: UserBalance[]
 }
+
+export interface CategoryExpense {
+  category: string
+  amount: number
+}
+
+export interface RoomReport extends RoomSummary {
+  category_breakdown: CategoryExpense[]
+}
+
+export interface SyncRoom {
+  id: number
+  name: string
+  secret: string
+  created_by: number
+  created_at: string
+  version: number
+}
+
+export interface SyncMember {
+  id: number
+  room_id: number
+  user_id: number
+  name: string
+  email: string
+  avatar?: string
+  joined_at: string
+}
+
+export interface SyncTombstone {
+  entity: 'room' | 'bill' | 'bill_item'
+  entity_id: number
+  room_id: number
+}
+
+export interface SyncResponse {
+  cursor: number
+  rooms: SyncRoom[]
+  members: SyncMember[]
+  bills: Omit<Bill, 'items'>[]
+  items: BillItem[]
+  deleted: SyncTombstone[]
+}